@@ -45,10 +45,17 @@ def expire_latest_enabled_build_profiles(sender, application, **kwargs):
         get_latest_enabled_versions_per_profile.clear(application.copy_of)
 
 
+def cache_export_schemas(sender, application, **kwargs):
+    from corehq.apps.export.tasks import cache_app_build_export_schemas
+    if application.copy_of and toggles.CACHED_EXPORT_SCHEMAS.enabled(application.domain):
+        cache_app_build_export_schemas.delay(application.domain, application.get_id)
+
+
 app_post_save = Signal()  # providing args: application
 
 app_post_save.connect(create_app_structure_repeat_records)
 app_post_save.connect(update_callcenter_config)
 app_post_save.connect(expire_latest_enabled_build_profiles)
+app_post_save.connect(cache_export_schemas)
 
 app_post_release = Signal()  # providing args: application
@@ -1,3 +1,5 @@
+from functools import partial
+
 from looseversion import LooseVersion
 
 from django.urls import reverse
@@ -9,6 +11,9 @@ from corehq.apps.app_manager.exceptions import MediaResourceError
 from corehq.apps.app_manager.suite_xml.features.scheduler import (
     SchedulerFixtureContributor,
 )
+from corehq.apps.app_manager.suite_xml.module_cache import (
+    ModuleContributionsCache,
+)
 from corehq.apps.app_manager.suite_xml.post_process.instances import (
     EntryInstances,
 )
@@ -79,6 +84,7 @@ class SuiteGenerator(object):
         # by module
         entries = EntriesContributor(self.suite, self.app, self.modules, self.build_profile_id)
         menus = MenuContributor(self.suite, self.app, self.modules, self.build_profile_id)
+        module_cache = ModuleContributionsCache(self.app, self.modules, self.build_profile_id)
 
         if any(module.is_training_module for module in self.modules):
             training_menu = LocalizedMenu(id='training-root')
@@ -87,11 +93,17 @@ class SuiteGenerator(object):
             training_menu = None
 
         for module in self.modules:
-            self.suite.entries.extend(entries.get_module_contributions(module))
+            self.suite.entries.extend(module_cache.get_module_contributions(
+                module, 'entries', partial(entries.get_module_contributions, module)
+            ))
 
-            self.suite.menus.extend(
-                menus.get_module_contributions(module, training_menu)
-            )
+            if module.is_training_module:
+                # the menus of training modules add commands to the training menu
+                self.suite.menus.extend(menus.get_module_contributions(module, training_menu))
+            else:
+                self.suite.menus.extend(module_cache.get_module_contributions(
+                    module, 'menus', partial(menus.get_module_contributions, module, training_menu)
+                ))
 
         if training_menu:
             self.suite.menus.append(training_menu)
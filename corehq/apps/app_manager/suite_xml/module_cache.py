@@ -0,0 +1,187 @@
+"""
+ModuleContributionsCache
+------------------------
+
+Caches the entries and menus that each module contributes to the suite,
+so that a build only generates them again for modules that changed.
+
+The contributions of a module can depend on other modules: its root
+module, its child modules, its shadow modules, the module of its case
+list form, etc. Rather than list every way a module can refer to
+another, modules that refer to the unique id of another module or of
+one of its forms are grouped together, as are modules with the same case
+type, whose case details forms can fall back to (e.g. ``get_target_module``
+in the entries section). The contributions of a module
+are cached by a hash of its whole group, of the app-level settings, and
+of the domain settings that they depend on.
+
+Report modules are not cached, because their contributions depend on
+the UCR report configurations that they refer to.
+"""
+import hashlib
+from collections import defaultdict
+
+from django.core.cache import cache
+
+from eulxml.xmlmap import load_xmlobject_from_string
+from memoized import memoized
+
+from corehq import toggles
+from corehq.apps.app_manager.suite_xml import xml_models
+from corehq.apps.app_manager.util import (
+    is_usercase_in_use,
+    module_loads_registry_case,
+    module_uses_inline_search,
+)
+from corehq.util.json import hash_json
+from corehq.util.metrics import metrics_counter
+
+SUITE_MODULE_CACHE_TIMEOUT = 24 * 60 * 60
+
+# app properties that change with each build or save, and are not used
+# to generate entries or menus
+VOLATILE_APP_PROPERTIES = (
+    '_id',
+    '_rev',
+    '_attachments',
+    'external_blobs',
+    'modules',
+    'version',
+    'built_on',
+    'built_with',
+    'build_comment',
+    'copy_of',
+    'date_created',
+    'last_modified',
+    'is_released',
+    'last_released',
+)
+
+
+class ModuleContributionsCache(object):
+
+    def __init__(self, app, modules, build_profile_id=None):
+        self.app = app
+        self.modules = modules
+        self.build_profile_id = build_profile_id
+        self.enabled = toggles.CACHED_SUITE_MODULES.enabled(app.domain)
+
+    def get_module_contributions(self, module, section, generate):
+        """Get the contributions of a module to a section of the suite
+
+        :param section: Name of the suite section, e.g. "entries"
+        :param generate: Function that generates the contributions if
+        they are not cached.
+        """
+        if not self.enabled or module.module_type == 'report':
+            # The contributions of report modules depend on their report
+            # configurations, which are not part of the app
+            return generate()
+
+        key = 'suite-module-{}-{}'.format(section, self._get_module_hash(module))
+        cached = cache.get(key)
+        metrics_counter('commcare.app_build.suite_module_cache', tags={
+            'section': section,
+            'result': 'miss' if cached is None else 'hit',
+        })
+        if cached is not None:
+            return [
+                load_xmlobject_from_string(xml, xmlclass=getattr(xml_models, class_name))
+                for class_name, xml in cached
+            ]
+
+        elements = generate()
+        cache.set(key, [
+            (type(element).__name__, element.serialize())
+            for element in elements
+        ], SUITE_MODULE_CACHE_TIMEOUT)
+        return elements
+
+    def _get_module_hash(self, module):
+        hashes = [self._app_hash(), self._module_group_hashes()[module.unique_id]]
+        if module_loads_registry_case(module) or module_uses_inline_search(module):
+            # the URLs of remote requests include the app id
+            hashes.append(self.app.get_id)
+        return hash_json(hashes)
+
+    @memoized
+    def _module_group_hashes(self):
+        return get_module_group_hashes(self.modules)
+
+    @memoized
+    def _app_hash(self):
+        app_json = self.app.to_json()
+        for name in VOLATILE_APP_PROPERTIES:
+            app_json.pop(name, None)
+        return hash_json([
+            app_json,
+            self.build_profile_id,
+            sorted(toggles.toggles_enabled_for_domain(self.app.domain)),
+            is_usercase_in_use(self.app.domain),
+        ])
+
+
+def get_module_group_hashes(modules):
+    """Hash each module together with the modules it is grouped with
+
+    Modules are grouped with the modules whose unique id, or the unique
+    id of one of their forms, they refer to, with the modules that refer
+    to them, and with the modules that have the same case type. The
+    index of each module is part of its hash, so moving a module changes
+    the hashes of its whole group.
+
+    :returns: dict of ``{module unique id: hash}``
+    """
+    module_ids_by_id = {}
+    for module in modules:
+        module_ids_by_id[module.unique_id] = module.unique_id
+        for form in module.get_forms():
+            module_ids_by_id[form.unique_id] = module.unique_id
+
+    own_hashes = {}
+    related = defaultdict(set)
+    first_module_ids_by_case_type = {}
+    for module in modules:
+        case_type = getattr(module, 'case_type', None)
+        if case_type:
+            first_id = first_module_ids_by_case_type.setdefault(case_type, module.unique_id)
+            if first_id != module.unique_id:
+                related[module.unique_id].add(first_id)
+                related[first_id].add(module.unique_id)
+        module_json = module.to_json()
+        own_hashes[module.unique_id] = hash_json([
+            module.id,
+            module_json,
+            [hashlib.sha1(form.source.encode('utf-8')).hexdigest() for form in module.get_forms()],
+        ])
+        for value in _iter_strings(module_json):
+            other_id = module_ids_by_id.get(value)
+            if other_id and other_id != module.unique_id:
+                related[module.unique_id].add(other_id)
+                related[other_id].add(module.unique_id)
+
+    group_hashes = {}
+    for module in modules:
+        if module.unique_id in group_hashes:
+            continue
+        group = {module.unique_id}
+        pending = [module.unique_id]
+        while pending:
+            for other_id in related[pending.pop()] - group:
+                group.add(other_id)
+                pending.append(other_id)
+        group_hash = hash_json(sorted(own_hashes[unique_id] for unique_id in group))
+        for unique_id in group:
+            group_hashes[unique_id] = hash_json([own_hashes[unique_id], group_hash])
+    return group_hashes
+
+
+def _iter_strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _iter_strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _iter_strings(item)
@@ -0,0 +1,83 @@
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from corehq.apps.app_manager.suite_xml.module_cache import (
+    ModuleContributionsCache,
+    get_module_group_hashes,
+)
+from corehq.apps.app_manager.tests.app_factory import AppFactory
+from corehq.apps.app_manager.tests.util import (
+    SuiteMixin,
+    patch_get_xform_resource_overrides,
+)
+from corehq.util.test_utils import flag_enabled
+
+
+@patch_get_xform_resource_overrides()
+class SuiteModuleCacheTest(SimpleTestCase, SuiteMixin):
+
+    def setUp(self):
+        self.factory = AppFactory(build_version='2.9.0', include_xmlns=True)
+        self.m0, self.m0f0 = self.factory.new_basic_module('m0', 'case')
+        self.m1, self.m1f0 = self.factory.new_basic_module('m1', 'case', parent_module=self.m0)
+        self.m2, self.m2f0 = self.factory.new_basic_module('m2', 'other')
+        self.factory.form_requires_case(self.m1f0)
+
+    def _get_hashes(self):
+        return get_module_group_hashes(list(self.factory.app.get_modules()))
+
+    def test_module_change_changes_its_hash_only(self, *args):
+        before = self._get_hashes()
+        self.m2f0.form_filter = "true()"
+        after = self._get_hashes()
+        self.assertNotEqual(before['m2_module'], after['m2_module'])
+        self.assertEqual(before['m0_module'], after['m0_module'])
+        self.assertEqual(before['m1_module'], after['m1_module'])
+
+    def test_child_module_change_changes_parent_hash(self, *args):
+        before = self._get_hashes()
+        self.m1f0.form_filter = "true()"
+        after = self._get_hashes()
+        self.assertNotEqual(before['m0_module'], after['m0_module'])
+        self.assertNotEqual(before['m1_module'], after['m1_module'])
+        self.assertEqual(before['m2_module'], after['m2_module'])
+
+    def test_module_order_changes_hash(self, *args):
+        before = self._get_hashes()
+        self.factory.app.rearrange_modules(2, 0)
+        after = self._get_hashes()
+        self.assertNotEqual(before['m2_module'], after['m2_module'])
+
+    def test_module_order_changes_hash_of_modules_with_same_case_type(self, *args):
+        # the forms of m3 use the case details of m2, the first module
+        # with their case type
+        m3, m3f0 = self.factory.new_advanced_module('m3', 'other')
+        self.factory.form_requires_case(m3f0, 'other')
+        before = self._get_hashes()
+        self.factory.app.rearrange_modules(2, 0)
+        after = self._get_hashes()
+        self.assertNotEqual(before['m3_module'], after['m3_module'])
+
+    @flag_enabled('CACHED_SUITE_MODULES')
+    @patch('corehq.apps.app_manager.suite_xml.module_cache.is_usercase_in_use', return_value=False)
+    @patch('corehq.apps.app_manager.suite_xml.module_cache.toggles.toggles_enabled_for_domain',
+           return_value=set())
+    def test_cached_suite(self, *args):
+        self.addCleanup(cache.clear)
+        expected = self.factory.app.create_suite()
+        with patch('corehq.apps.app_manager.suite_xml.sections.entries.EntriesHelper.entry_for_module') as entries:
+            suite = self.factory.app.create_suite()
+        entries.assert_not_called()
+        self.assertXmlEqual(expected, suite)
+
+    @flag_enabled('CACHED_SUITE_MODULES')
+    def test_report_module_is_not_cached(self, *args):
+        self.addCleanup(cache.clear)
+        report_module = self.factory.new_report_module('reports')
+        module_cache = ModuleContributionsCache(self.factory.app, list(self.factory.app.get_modules()))
+        generate = Mock(return_value=[])
+        module_cache.get_module_contributions(report_module, 'entries', generate)
+        module_cache.get_module_contributions(report_module, 'entries', generate)
+        self.assertEqual(generate.call_count, 2)
@@ -18,7 +18,8 @@ from corehq.apps.change_feed.exceptions import UnknownDocumentStore
 from corehq.apps.change_feed.topics import validate_offsets
 
 MIN_TIMEOUT = 500
-MAX_TIMEOUT = 1000 * 60 * 60 * 24  # 1 day in ms
+# when iterating forever, yield None after this long without changes
+IDLE_TIMEOUT = 1000 * 5
 
 
 class KafkaChangeFeed(ChangeFeed):
@@ -62,8 +63,12 @@ class KafkaChangeFeed(ChangeFeed):
     ) -> Iterator[Change]:
         """
         ``since`` must be a dictionary of topic partition offsets, or None
+
+        If ``forever`` is set this never stops, and yields ``None`` whenever
+        there are no new changes for ``IDLE_TIMEOUT`` ms so that callers can
+        act on changes they are holding on to.
         """
-        timeout = MAX_TIMEOUT if forever else MIN_TIMEOUT
+        timeout = IDLE_TIMEOUT if forever else MIN_TIMEOUT
         start_from_latest = since is None
         reset = 'largest' if start_from_latest else 'smallest'
         self._init_consumer(timeout, auto_offset_reset=reset)
@@ -90,13 +95,18 @@ class KafkaChangeFeed(ChangeFeed):
             for topic_partition, offset in since.items():
                 self.consumer.seek(TopicPartition(topic_partition[0], topic_partition[1]), int(offset))
 
-        try:
-            for message in self.consumer:
-                self._processed_topic_offsets[(message.topic, message.partition)] = message.offset
-                yield change_from_kafka_message(message)
-        except StopIteration:
-            # no need to do anything since this is just telling us we've reached the end of the feed
-            pass
+        while True:
+            try:
+                for message in self.consumer:
+                    self._processed_topic_offsets[(message.topic, message.partition)] = message.offset
+                    yield change_from_kafka_message(message)
+            except StopIteration:
+                # no need to do anything since this is just telling us we've reached the end of the feed
+                pass
+            if not forever:
+                break
+            # the consumer resumes from where it stopped when iterated again
+            yield None
 
     def get_current_checkpoint_offsets(self):
         # the way kafka works, the checkpoint should increment by 1 because
@@ -73,20 +73,24 @@ def get_document_store(data_source_type, data_source_name, domain, load_source="
     return DocStoreLoadTracker(store, track_load)
 
 
-def get_document_store_for_doc_type(domain, doc_type, case_type_or_xmlns=None, load_source="unknown"):
+def get_document_store_for_doc_type(domain, doc_type, case_type_or_xmlns=None, load_source="unknown",
+                                    limit_db_aliases=None):
     """Only applies to documents that have a document type:
     * forms
     * cases
     * locations
     * leddgers (V2 only)
     * all couch models
+
+    ``limit_db_aliases`` restricts the document ids of form and case
+    stores to those form processor databases.
     """
     from corehq.apps.change_feed import document_types
     if doc_type in XFormInstance.ALL_DOC_TYPES:
-        store = FormDocumentStore(domain, xmlns=case_type_or_xmlns)
+        store = FormDocumentStore(domain, xmlns=case_type_or_xmlns, limit_db_aliases=limit_db_aliases)
         load_counter = form_load_counter
     elif doc_type in document_types.CASE_DOC_TYPES:
-        store = CaseDocumentStore(domain, case_type=case_type_or_xmlns)
+        store = CaseDocumentStore(domain, case_type=case_type_or_xmlns, limit_db_aliases=limit_db_aliases)
         load_counter = case_load_counter
     elif doc_type == LOCATION_DOC_TYPE:
         return LocationDocumentStore(domain)
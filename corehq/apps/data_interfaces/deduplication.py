@@ -1,4 +1,6 @@
+from collections import defaultdict
 from datetime import datetime
+from itertools import islice
 
 from django.utils.text import slugify
 
@@ -8,6 +10,7 @@ from corehq.apps.es import queries
 from corehq.apps.es.case_search import CaseSearchES, case_property_missing
 from corehq.messaging.util import MessagingRuleProgressHelper
 from corehq.apps.locations.dbaccessors import user_ids_at_locations
+from corehq.toggles import CASE_DEDUPE_BULK_BACKFILL
 
 DUPLICATE_LIMIT = 1000
 DEDUPE_XMLNS = 'http://commcarehq.org/hq_case_deduplication_rule'
@@ -78,18 +81,10 @@ def find_duplicate_case_ids(
         es = es.is_closed(False)
 
     clause = queries.MUST if match_type == "ALL" else queries.SHOULD
-    _case_json = None
 
     at_least_one_property_query = False
 
-    for case_property_name in case_properties:
-        if case_property_name in SPECIAL_CASE_PROPERTIES_MAP:
-            if _case_json is None:
-                _case_json = case.to_json()
-            case_property_value = SPECIAL_CASE_PROPERTIES_MAP[case_property_name].value_getter(_case_json)
-        else:
-            case_property_value = case.get_case_property(case_property_name)
-
+    for case_property_name, case_property_value in get_case_property_values(case, case_properties).items():
         if not case_property_value:
             continue
 
@@ -108,6 +103,149 @@ def find_duplicate_case_ids(
         return [case.case_id]
 
 
+def get_case_property_values(case, case_properties):
+    """Get the values of case properties, including special case
+    properties, as they are indexed for case search
+
+    :returns: dict of ``{case_property_name: value}``
+    """
+    values = {}
+    _case_json = None
+    for case_property_name in case_properties:
+        if case_property_name in SPECIAL_CASE_PROPERTIES_MAP:
+            if _case_json is None:
+                _case_json = case.to_json()
+            values[case_property_name] = SPECIAL_CASE_PROPERTIES_MAP[case_property_name].value_getter(_case_json)
+        else:
+            values[case_property_name] = case.get_case_property(case_property_name)
+    return values
+
+
+def get_case_filter(case_filter_criteria):
+    """Get a function that returns whether a case passes the filters that
+    ``_get_es_filtered_case_query`` adds to the query for its duplicates
+    """
+    # Import here to avoid circular import error
+    from corehq.apps.data_interfaces.models import (
+        LocationFilterDefinition,
+        MatchPropertyDefinition,
+    )
+
+    checks = []
+    for criterion in case_filter_criteria:
+        definition = criterion.definition
+        if isinstance(definition, MatchPropertyDefinition):
+            checks.append(_get_match_property_check(definition))
+        elif isinstance(definition, LocationFilterDefinition):
+            owners_ids = set(user_ids_at_locations([definition.location_id]))
+            owners_ids.add(definition.location_id)
+            checks.append(lambda case, owners_ids=owners_ids: case.owner_id in owners_ids)
+
+    return lambda case: all(check(case) for check in checks)
+
+
+def _get_match_property_check(definition):
+    from corehq.apps.data_interfaces.models import MatchPropertyDefinition
+
+    property_name = definition.property_name
+
+    def has_value(case):
+        value = get_case_property_values(case, [property_name])[property_name]
+        return value is not None and value != ''
+
+    def is_equal(case):
+        if not definition.property_value:
+            # an empty value matches cases that don't have the property
+            return not has_value(case)
+        value = get_case_property_values(case, [property_name])[property_name]
+        return value == definition.property_value
+
+    return {
+        MatchPropertyDefinition.MATCH_HAS_NO_VALUE: lambda case: not has_value(case),
+        MatchPropertyDefinition.MATCH_HAS_VALUE: has_value,
+        MatchPropertyDefinition.MATCH_EQUAL: is_equal,
+        MatchPropertyDefinition.MATCH_NOT_EQUAL: lambda case: not is_equal(case),
+    }.get(definition.match_type, lambda case: True)
+
+
+class DuplicateCaseIndex:
+    """Finds duplicate cases in memory, the same way that
+    ``find_duplicate_case_ids`` finds them with Elasticsearch
+
+    Cases are grouped into blocks by a key for each of their case
+    properties: the name of the property and its exact value. The
+    duplicates of a case are found in the blocks of its keys only: cases
+    in all of them for the "ALL" match type, and cases in any of them
+    for the "ANY" match type.
+    """
+
+    def __init__(self, match_type):
+        self.match_type = match_type
+        self.blocks = defaultdict(set)
+
+    def add_case(self, case_id, case_property_values):
+        for key in self._get_blocking_keys(case_property_values):
+            self.blocks[key].add(case_id)
+
+    def find_duplicate_case_ids(self, case_id, case_property_values):
+        keys = self._get_blocking_keys(case_property_values)
+        if not keys:
+            return {case_id}
+        blocks = [self.blocks.get(key, set()) for key in keys]
+        if self.match_type == "ALL":
+            duplicate_case_ids = set.intersection(*sorted(blocks, key=len))
+        else:
+            duplicate_case_ids = set.union(*blocks)
+        # Elasticsearch returns at most DUPLICATE_LIMIT duplicates
+        duplicate_case_ids = set(islice(duplicate_case_ids, DUPLICATE_LIMIT))
+        duplicate_case_ids.add(case_id)
+        return duplicate_case_ids
+
+    @staticmethod
+    def _get_blocking_keys(case_property_values):
+        return [(name, value) for name, value in case_property_values.items() if value]
+
+
+def bulk_find_and_save_duplicates(domain, rule, action, case_iterator, now, progress_helper=None):
+    """Find the duplicates of all the cases that match the rule, and save
+    them in bulk
+
+    This finds the same duplicates as running the rule on each case, but
+    reads each case once and compares cases in memory, instead of
+    querying Elasticsearch for each case.
+
+    :returns: A tuple of the number of cases checked and the number of
+    cases updated
+    """
+    from corehq.apps.data_interfaces.models import CaseDuplicate
+
+    index = DuplicateCaseIndex(action.match_type)
+    is_candidate = get_case_filter(rule.memoized_criteria)
+    cases_to_check = []
+    cases_checked = 0
+    for case in case_iterator:
+        case_property_values = get_case_property_values(case, action.case_properties)
+        if is_candidate(case):
+            index.add_case(case.case_id, case_property_values)
+        if rule.criteria_match(case, now):
+            cases_to_check.append((case.case_id, case_property_values))
+        cases_checked += 1
+        if progress_helper is not None:
+            progress_helper.increment_current_case_count()
+
+    duplicates = {}
+    for case_id, case_property_values in cases_to_check:
+        duplicate_case_ids = index.find_duplicate_case_ids(case_id, case_property_values)
+        if len(duplicate_case_ids) > 1:
+            duplicates[case_id] = duplicate_case_ids
+    CaseDuplicate.bulk_create_duplicates(action, duplicates)
+
+    num_updates = 0
+    if action.properties_to_update and duplicates:
+        num_updates = action._update_cases(domain, rule, set.union(*duplicates.values()))
+    return cases_checked, num_updates
+
+
 def reset_and_backfill_deduplicate_rule(rule):
     from corehq.apps.data_interfaces.models import AutomaticUpdateRule
     from corehq.apps.data_interfaces.tasks import (
@@ -140,6 +278,7 @@ def backfill_deduplicate_rule(domain, rule):
     from corehq.apps.data_interfaces.models import (
         AutomaticUpdateRule,
         CaseDeduplicationActionDefinition,
+        CaseRuleActionResult,
         DomainCaseRuleRun,
     )
 
@@ -160,15 +299,21 @@ def backfill_deduplicate_rule(domain, rule):
         case_iterator = AutomaticUpdateRule.iter_cases(
             domain, rule.case_type, include_closed=action.include_closed
         )
-        iter_cases_and_run_rules(
-            domain,
-            case_iterator,
-            [rule],
-            now,
-            run_record.id,
-            rule.case_type,
-            progress_helper=progress_helper,
-        )
+        if CASE_DEDUPE_BULK_BACKFILL.enabled(domain):
+            cases_checked, num_updates = bulk_find_and_save_duplicates(
+                domain, rule, action, case_iterator, now, progress_helper=progress_helper
+            )
+            DomainCaseRuleRun.done(run_record.id, cases_checked, CaseRuleActionResult(num_updates=num_updates))
+        else:
+            iter_cases_and_run_rules(
+                domain,
+                case_iterator,
+                [rule],
+                now,
+                run_record.id,
+                rule.case_type,
+                progress_helper=progress_helper,
+            )
     finally:
         progress_helper.set_rule_complete()
         rule.last_run = now
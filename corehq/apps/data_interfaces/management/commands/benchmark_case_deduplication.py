@@ -0,0 +1,41 @@
+import random
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from corehq.apps.data_interfaces.deduplication import DuplicateCaseIndex
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the time it takes to find the duplicates of generated cases "
+        "in memory, for increasing numbers of cases"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--match-type', choices=['ALL', 'ANY'], default='ALL')
+        parser.add_argument('--distinct-values', type=int, default=1000,
+                            help='Number of distinct values of each case property')
+
+    def handle(self, sizes, match_type, distinct_values, **options):
+        print("cases\tindex secs\tfind secs\tcases/sec")
+        for size in sizes:
+            cases = [_get_case_property_values(distinct_values) for i in range(size)]
+            start = time.perf_counter()
+            index = DuplicateCaseIndex(match_type)
+            for case_id, values in cases:
+                index.add_case(case_id, values)
+            indexed = time.perf_counter()
+            for case_id, values in cases:
+                index.find_duplicate_case_ids(case_id, values)
+            found = time.perf_counter()
+            print(f"{size}\t{indexed - start:.3f}\t{found - indexed:.3f}\t{size / (found - start):.0f}")
+
+
+def _get_case_property_values(distinct_values):
+    return uuid.uuid4().hex, {
+        'name': f'name {random.randrange(distinct_values)}',
+        'dob': f'dob {random.randrange(distinct_values)}',
+    }
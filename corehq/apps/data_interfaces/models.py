@@ -1219,6 +1219,39 @@ class CaseDuplicate(models.Model):
         ]
         cls.potential_duplicates.through.objects.bulk_create(through_models)
 
+    @classmethod
+    def bulk_create_duplicates(cls, action, duplicates, batch_size=1000):
+        """Save the duplicates of many cases at once
+
+        :param duplicates: dict of ``{case_id: duplicate_case_ids}``, where
+        the duplicate case ids of each case include the case itself.
+        """
+        case_ids = set().union(*duplicates.values())
+        existing_case_ids = set(cls.objects.filter(action=action).values_list('case_id', flat=True))
+        cls.objects.bulk_create([
+            cls(case_id=case_id, action=action)
+            for case_id in case_ids
+            if case_id not in existing_case_ids
+        ], batch_size=batch_size)
+        ids_by_case_id = dict(cls.objects.filter(action=action).values_list('case_id', 'id'))
+
+        Through = cls.potential_duplicates.through
+        # Create symmetrical many-to-many relationships
+        pairs = {
+            pair
+            for case_id, duplicate_case_ids in duplicates.items()
+            for duplicate_case_id in duplicate_case_ids
+            if duplicate_case_id != case_id
+            for pair in [(case_id, duplicate_case_id), (duplicate_case_id, case_id)]
+        }
+        Through.objects.bulk_create([
+            Through(
+                from_caseduplicate_id=ids_by_case_id[from_case_id],
+                to_caseduplicate_id=ids_by_case_id[to_case_id],
+            )
+            for from_case_id, to_case_id in pairs
+        ], batch_size=batch_size, ignore_conflicts=True)
+
 
 class VisitSchedulerIntegrationHelper(object):
 
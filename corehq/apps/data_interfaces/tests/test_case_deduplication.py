@@ -2,7 +2,7 @@ from datetime import datetime
 from itertools import chain
 from unittest.mock import patch
 
-from django.test import TestCase, override_settings
+from django.test import SimpleTestCase, TestCase, override_settings
 
 from faker import Faker
 
@@ -11,6 +11,7 @@ from casexml.apps.case.mock import CaseFactory
 from corehq.apps.change_feed import topics
 from corehq.apps.change_feed.topics import get_topic_offset
 from corehq.apps.data_interfaces.deduplication import (
+    DuplicateCaseIndex,
     _get_es_filtered_case_query,
     backfill_deduplicate_rule,
     find_duplicate_case_ids,
@@ -1173,3 +1174,50 @@ class DeduplicationBackfillTest(TestCase):
 
         backfill_deduplicate_rule(self.domain, self.rule)
         self.assertEqual(CaseDuplicate.objects.filter(action=self.action).count(), 2)
+
+    @flag_enabled('CASE_DEDUPE_BULK_BACKFILL')
+    def test_bulk_backfill_include_closed_finds_open_and_closed_cases(self):
+        self._set_up_rule(include_closed=True)
+
+        backfill_deduplicate_rule(self.domain, self.rule)
+        self.assertEqual(CaseDuplicate.objects.filter(action=self.action).count(), 3)
+
+    @flag_enabled('CASE_DEDUPE_BULK_BACKFILL')
+    def test_bulk_backfill_finds_open_cases_only(self):
+        self._set_up_rule(include_closed=False)
+
+        backfill_deduplicate_rule(self.domain, self.rule)
+        duplicates = CaseDuplicate.objects.filter(action=self.action)
+        self.assertEqual(duplicates.count(), 2)
+        for duplicate in duplicates:
+            self.assertEqual(duplicate.potential_duplicates.count(), 1)
+
+
+class DuplicateCaseIndexTest(SimpleTestCase):
+    cases = {
+        'a': {'name': 'Padme Amidala', 'dob': '1990-01-01'},
+        'b': {'name': 'Padme Amidala', 'dob': '1990-01-01'},
+        'c': {'name': 'Padme Amidala', 'dob': '1980-01-01'},
+        'd': {'name': 'Anakin Skywalker', 'dob': '1990-01-01'},
+        'e': {'name': '', 'dob': ''},
+    }
+
+    def _get_index(self, match_type):
+        index = DuplicateCaseIndex(match_type)
+        for case_id, values in self.cases.items():
+            index.add_case(case_id, values)
+        return index
+
+    def test_match_all(self):
+        index = self._get_index("ALL")
+        self.assertEqual(index.find_duplicate_case_ids('a', self.cases['a']), {'a', 'b'})
+        self.assertEqual(index.find_duplicate_case_ids('c', self.cases['c']), {'c'})
+
+    def test_match_any(self):
+        index = self._get_index("ANY")
+        self.assertEqual(index.find_duplicate_case_ids('a', self.cases['a']), {'a', 'b', 'c', 'd'})
+        self.assertEqual(index.find_duplicate_case_ids('c', self.cases['c']), {'a', 'b', 'c'})
+
+    def test_empty_values(self):
+        index = self._get_index("ANY")
+        self.assertEqual(index.find_duplicate_case_ids('e', self.cases['e']), {'e'})
@@ -1 +1,5 @@
 DATETIME_FORMAT = '%Y-%m-%dT%H%M%SZ'
+
+# lists the files of a dump with their counts and checksums, for dumps that
+# have a file for each model and database
+MANIFEST_FILENAME = 'manifest.json'
@@ -6,7 +6,7 @@ from datetime import datetime
 
 from django.core.management.base import BaseCommand, CommandError
 
-from corehq.apps.dump_reload.const import DATETIME_FORMAT
+from corehq.apps.dump_reload.const import DATETIME_FORMAT, MANIFEST_FILENAME
 from corehq.apps.dump_reload.couch import CouchDataDumper
 from corehq.apps.dump_reload.couch.dump import DomainDumper, ToggleDumper
 from corehq.apps.dump_reload.sql import SqlDataDumper
@@ -34,6 +34,11 @@ class Command(BaseCommand):
         )
         parser.add_argument('--dumper', dest='dumpers', action='append', default=[],
                             help='Dumper slug to run (use multiple --dumper to run multiple dumpers).')
+        parser.add_argument(
+            '--workers', type=int, default=0,
+            help='Dump SQL data to a file for each model and database, with this many processes. '
+                 'These files are loaded in parallel by load_domain_data.'
+        )
 
     def handle(self, domain_name, **options):
         excludes = options.get('exclude')
@@ -41,17 +46,27 @@ class Command(BaseCommand):
         console = options.get('console')
         show_traceback = options.get('traceback')
         requested_dumpers = options.get('dumpers')
+        workers = options.get('workers')
+        if workers and console:
+            raise CommandError("--workers can't be used with --console")
 
         self.utcnow = datetime.utcnow().strftime(DATETIME_FORMAT)
         zipname = 'data-dump-{}-{}.zip'.format(domain_name, self.utcnow)
 
         self.stdout.ending = None
         meta = {}  # {dumper_slug: {model_name: count}}
+        manifest = {}  # {file_slug: file_meta}
         # domain dumper should be first since it validates domain exists
         for dumper in [DomainDumper, SqlDataDumper, CouchDataDumper, ToggleDumper]:
             if requested_dumpers and dumper.slug not in requested_dumpers:
                 continue
 
+            if dumper is SqlDataDumper and workers:
+                manifest.update(self._dump_split_sql(
+                    domain_name, excludes, includes, workers, zipname, show_traceback))
+                meta.update({slug: file_meta['counts'] for slug, file_meta in manifest.items()})
+                continue
+
             filename = _get_dump_stream_filename(dumper.slug, domain_name, self.utcnow)
             stream = self.stdout if console else gzip.open(filename, 'wt')
             try:
@@ -73,10 +88,29 @@ class Command(BaseCommand):
         if not console:
             with zipfile.ZipFile(zipname, mode='a', allowZip64=True) as z:
                 z.writestr('meta.json', json.dumps(meta, indent=4))
+                if manifest:
+                    z.writestr(MANIFEST_FILENAME, json.dumps(manifest, indent=4))
 
         self._print_stats(meta)
         self.stdout.write('\nData dumped to file: {}'.format(zipname))
 
+    def _dump_split_sql(self, domain_name, excludes, includes, workers, zipname, show_traceback):
+        filename_prefix = _get_dump_stream_filename(SqlDataDumper.slug, domain_name, self.utcnow)[:-len('.gz')]
+        dumper = SqlDataDumper(domain_name, excludes, includes, stdout=self.stdout)
+        try:
+            files = dumper.dump_split(filename_prefix, workers)
+        except Exception as e:
+            if show_traceback:
+                raise
+            raise CommandError("Unable to serialize database: %s" % e)
+
+        with zipfile.ZipFile(zipname, mode='a', allowZip64=True) as z:
+            for slug in files:
+                filename = '{}-{}.gz'.format(filename_prefix, slug)
+                z.write(filename, '{}.gz'.format(slug))
+                os.remove(filename)
+        return files
+
     def _print_stats(self, meta):
         self.stdout.ending = '\n'
         self.stdout.write('{0} Dump Stats {0}'.format('-' * 32))
@@ -1,9 +1,12 @@
+import gzip
+import multiprocessing as mp
 from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
 from django.apps import apps
 from django.conf import settings
 from django.core import serializers
-from django.db import router
+from django.db import connections, router
 
 from corehq.apps.dump_reload.exceptions import DomainDumpError
 from corehq.apps.dump_reload.interface import DataDumper
@@ -17,7 +20,11 @@ from corehq.apps.dump_reload.sql.filters import (
     UsernameFilter,
 )
 from corehq.apps.dump_reload.sql.serialization import JsonLinesSerializer
-from corehq.apps.dump_reload.util import get_model_class, get_model_label
+from corehq.apps.dump_reload.util import (
+    get_file_sha256,
+    get_model_class,
+    get_model_label,
+)
 from corehq.sql_db.config import plproxy_config
 
 APP_LABELS_WITH_FILTER_KWARGS_TO_DUMP = defaultdict(list)
@@ -227,6 +234,65 @@ class SqlDataDumper(DataDumper):
         )
         return stats
 
+    def dump_split(self, filename_prefix, workers):
+        """
+        Dump the objects of each model in each database to a separate
+        gzipped file, with ``workers`` processes.
+
+        :param filename_prefix: Prefix of the paths of the files
+        :return: a dict of ``{slug: file_meta}`` for each file, where the
+        file is at ``<filename_prefix>-<slug>.gz``, and file_meta has the
+        model label, the position of the model in the dump order, the
+        counts of the objects in the file and the SHA-256 of the file.
+        """
+        model_orders = {}
+        files = {}
+        builders = get_model_iterator_builders_to_dump(self.domain, self.excludes, self.includes)
+        for model_class, builder in builders:
+            model_label = get_model_label(model_class)
+            order = model_orders.setdefault(model_label, len(model_orders))
+            slug = '{}-{:04d}-{}-{}'.format(self.slug, order, model_label, builder.db_alias)
+            files[slug] = {'model': model_label, 'order': order, 'db_alias': builder.db_alias}
+
+        # don't share database connections with the workers
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('fork')) as executor:
+            futures = {
+                slug: executor.submit(
+                    dump_model_to_file,
+                    self.domain,
+                    file_meta['model'],
+                    file_meta['db_alias'],
+                    '{}-{}.gz'.format(filename_prefix, slug),
+                )
+                for slug, file_meta in files.items()
+            }
+            for slug, future in futures.items():
+                counts, sha256 = future.result()
+                files[slug].update(counts=counts, sha256=sha256)
+                if self.stdout:
+                    self.stdout.write('Dumped {} {} from {}\n'.format(
+                        sum(counts.values()), files[slug]['model'], files[slug]['db_alias']))
+        return files
+
+
+def dump_model_to_file(domain, model_label, db_alias, path):
+    """
+    Dump the objects of one model in one database to a gzipped file
+
+    :return: a tuple of the counts of the objects dumped, and the SHA-256 of the file
+    """
+    stats = Counter()
+    builders = get_model_iterator_builders_to_dump(domain, [], [model_label], limit_to_db=db_alias)
+    with gzip.open(path, 'wt') as stream:
+        JsonLinesSerializer().serialize(
+            get_objects_to_dump_from_builders(builders, stats),
+            use_natural_foreign_keys=False,
+            use_natural_primary_keys=True,
+            stream=stream
+        )
+    return dict(stats), get_file_sha256(path)
+
 
 def get_objects_to_dump(domain, excludes, includes, stats_counter=None, stdout=None):
     """
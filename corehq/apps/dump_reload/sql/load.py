@@ -1,6 +1,8 @@
+import gzip
 import json
 import logging
 import multiprocessing as mp
+import os
 from collections import Counter, defaultdict
 from concurrent.futures import ProcessPoolExecutor
 from contextlib import contextmanager
@@ -14,9 +16,10 @@ from django.core.management.color import no_style
 from django.core.serializers.python import Deserializer as PythonDeserializer
 from django.db import DatabaseError, connections, router, transaction
 
+from corehq.apps.dump_reload.const import MANIFEST_FILENAME
 from corehq.apps.dump_reload.exceptions import DataLoadException
 from corehq.apps.dump_reload.interface import DataLoader
-from corehq.apps.dump_reload.util import get_model_label
+from corehq.apps.dump_reload.util import get_file_sha256, get_model_label
 from corehq.sql_db.routers import HINT_PARTITION_VALUE
 
 
@@ -24,6 +27,7 @@ logger = logging.getLogger("load_sql")
 
 CHUNK_SIZE = 200
 ENQUEUE_TIMEOUT = 10
+BULK_CREATE_BATCH_SIZE = 1000
 
 
 class SqlDataLoader(DataLoader):
@@ -38,6 +42,25 @@ class SqlDataLoader(DataLoader):
                     dry_run_stats[obj['model']] += 1
             return dry_run_stats
 
+        objects = (self.line_to_object(line) for line in object_strings)
+        load_stats = self._load_with_workers(obj for obj in objects if obj is not None)
+        _reset_sequences(load_stats)
+        loaded_model_counts = Counter()
+        for db_stats in load_stats:
+            model_labels = (f'{get_model_label(model)}'
+                            for model in db_stats.model_counter.elements())
+            loaded_model_counts.update(model_labels)
+        return loaded_model_counts
+
+    def _load_with_workers(self, objects, batch_size=None):
+        """
+        Load objects with a worker for each database, which saves all of
+        its objects in one transaction with constraint checks deferred.
+
+        :param batch_size: If given, workers save objects of the same
+        model with ``bulk_create`` in batches of this size.
+        :return: a list of ``LoadStat`` objects, one for each database
+        """
         def enqueue_object(dbalias_to_workerqueue, obj):
             db_alias = get_db_alias(obj)
             worker, queue = dbalias_to_workerqueue[db_alias]
@@ -68,33 +91,70 @@ class SqlDataLoader(DataLoader):
         manager = mp.Manager()
         with ProcessPoolExecutor(max_workers=num_aliases) as executor:
             # Map each db_alias to a queue + a worker task to consume the queue
-            worker_queue_factory = partial(get_worker_queue, executor, manager)
+            worker_queue_factory = partial(get_worker_queue, executor, manager, batch_size=batch_size)
             # DefaultDictWithKey passes the key to its factory function so that
             # the worker knows its db_alias without having to figure it out
             dbalias_to_workerqueue = DefaultDictWithKey(worker_queue_factory)
 
-            for line in object_strings:
-                obj = self.line_to_object(line)
-                if obj is not None:
-                    try:
-                        enqueue_object(dbalias_to_workerqueue, obj)
-                    except Exception as err:
-                        __, errors = collect_results(dbalias_to_workerqueue)
-                        if not isinstance(err, Full):
-                            errors.append(err)
-                        break
+            for obj in objects:
+                try:
+                    enqueue_object(dbalias_to_workerqueue, obj)
+                except Exception as err:
+                    __, errors = collect_results(dbalias_to_workerqueue)
+                    if not isinstance(err, Full):
+                        errors.append(err)
+                    break
             else:
                 load_stats, errors = collect_results(dbalias_to_workerqueue)
 
         if errors:
             raise errors[0] if len(errors) == 1 else Exception(errors)
+        return load_stats
+
+    def load_from_path(self, extracted_dump_path, dump_meta, force=False, dry_run=False):
+        manifest_path = os.path.join(extracted_dump_path, MANIFEST_FILENAME)
+        if dry_run or not os.path.isfile(manifest_path):
+            return super().load_from_path(extracted_dump_path, dump_meta, force, dry_run)
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+        return self.load_split_dump(extracted_dump_path, manifest)
+
+    def load_split_dump(self, extracted_dump_path, manifest):
+        """
+        Load a dump that has a file for each model and database (see
+        ``SqlDataDumper.dump_split()``).
+
+        The files are read in the order that their models were dumped in.
+        Like other dumps, the objects of each database are saved by one
+        worker in one transaction, so that foreign keys between files are
+        checked when all of the files have been loaded, and nothing is
+        committed if a file fails to load. Objects are saved in batches.
+
+        :param manifest: ``{slug: file_meta}`` of the files in the dump
+        :return: ``{slug: loaded object Counter}``
+        """
+        for slug, file_meta in manifest.items():
+            path = os.path.join(extracted_dump_path, f'{slug}.gz')
+            if get_file_sha256(path) != file_meta['sha256']:
+                raise DataLoadException(f"Checksum of {slug}.gz does not match the manifest")
+
+        slugs = sorted(manifest, key=lambda slug: (manifest[slug]['order'], slug))
+        loaded_object_count = {slug: Counter() for slug in slugs}
+
+        def iter_objects():
+            for slug in slugs:
+                counts = loaded_object_count[slug]
+                with gzip.open(os.path.join(extracted_dump_path, f'{slug}.gz'), 'rt') as dump_file:
+                    for line in dump_file:
+                        obj = self.line_to_object(line)
+                        if obj is not None:
+                            counts[get_model_label(apps.get_model(obj['model']))] += 1
+                            yield obj
+                self.stdout.write(f"\nRead {sum(counts.values())} objects from {slug}.gz")
+
+        load_stats = self._load_with_workers(iter_objects(), batch_size=BULK_CREATE_BATCH_SIZE)
         _reset_sequences(load_stats)
-        loaded_model_counts = Counter()
-        for db_stats in load_stats:
-            model_labels = (f'{get_model_label(model)}'
-                            for model in db_stats.model_counter.elements())
-            loaded_model_counts.update(model_labels)
-        return loaded_model_counts
+        return loaded_object_count
 
     def line_to_object(self, line):
         line = line.strip()
@@ -112,20 +172,20 @@ class SqlDataLoader(DataLoader):
         return self.object_filter.findall(model_label)
 
 
-def get_worker_queue(process_pool_executor, manager, db_alias):
+def get_worker_queue(process_pool_executor, manager, db_alias, batch_size=None):
     """
     Instantiates a queue, and starts a worker task in its own process
     """
     queue = manager.JoinableQueue(maxsize=CHUNK_SIZE)
-    worker_task = process_pool_executor.submit(worker, queue, db_alias)
+    worker_task = process_pool_executor.submit(worker, queue, db_alias, batch_size)
     return worker_task, queue
 
 
-def worker(queue, db_alias):
+def worker(queue, db_alias, batch_size=None):
     """
     Pulls objects from queue and loads them into their DB.
     """
-    coro = load_data_for_db(db_alias)
+    coro = load_data_for_db(db_alias, batch_size)
     next(coro)
     while True:
         obj = queue.get()
@@ -151,13 +211,19 @@ def _reset_sequences(load_stats):
                         cursor.execute(line)
 
 
-def load_data_for_db(db_alias):
+def load_data_for_db(db_alias, batch_size=None):
     """
     A coroutine that is sent object dictionaries and loads them into the
     database identified by ``db_alias``. When it is terminated with
     ``None``, it yields a LoadStat object.
+
+    If ``batch_size`` is given, consecutive objects of the same model are
+    saved with ``bulk_create`` in batches of that size. ``bulk_create``
+    does not send ``pre_save`` or ``post_save`` signals. Like other raw
+    saves, signal receivers would skip them anyway.
     """
     model_counter = Counter()
+    batch = []
     with transaction.atomic(using=db_alias), \
          constraint_checks_deferred(db_alias):
         while True:
@@ -169,6 +235,15 @@ def load_data_for_db(db_alias):
                 if not router.allow_migrate_model(db_alias, Model):
                     continue
                 model_counter.update([Model])
+                if batch_size:
+                    if batch and type(batch[-1].object) is not Model:
+                        _save_batch(db_alias, batch)
+                        batch.clear()
+                    batch.append(obj)
+                    if len(batch) >= batch_size:
+                        _save_batch(db_alias, batch)
+                        batch.clear()
+                    continue
                 try:
                     # Force insert here to prevent Django from attempting to do an update.
                     # We want to ensure that if there is already data in the DB that we don't
@@ -184,10 +259,33 @@ def load_data_for_db(db_alias):
                         f'Could not load {m.app_label}.{m.object_name}'
                         f'({key}) in DB {db_alias!r}'
                     ) from err
+        if batch:
+            _save_batch(db_alias, batch)
     print(f'Loading DB {db_alias!r} complete')
     yield LoadStat(db_alias, model_counter)
 
 
+def _save_batch(db_alias, deserialized_objects):
+    Model = type(deserialized_objects[0].object)
+    try:
+        if Model._meta.parents:
+            # bulk_create does not support multi-table inheritance
+            for obj in deserialized_objects:
+                obj.save(using=db_alias, force_insert=True)
+            return
+        Model._base_manager.using(db_alias).bulk_create([obj.object for obj in deserialized_objects])
+        for obj in deserialized_objects:
+            for accessor_name, object_list in (obj.m2m_data or {}).items():
+                getattr(obj.object, accessor_name).set(object_list)
+    except DatabaseError as err:
+        logger.exception("Error saving data")
+        m = Model._meta
+        raise type(err)(
+            f'Could not load a batch of {len(deserialized_objects)} '
+            f'{m.app_label}.{m.object_name} in DB {db_alias!r}'
+        ) from err
+
+
 @contextmanager
 def constraint_checks_deferred(db_alias):
     """
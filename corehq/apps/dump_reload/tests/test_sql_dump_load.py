@@ -5,6 +5,7 @@ from collections import Counter
 from datetime import datetime
 from io import StringIO
 from pathlib import Path
+from tempfile import TemporaryDirectory
 
 from unittest import mock
 from django.contrib.admin.utils import NestedObjects
@@ -19,7 +20,9 @@ from corehq.apps.commtrack.helpers import make_product
 from corehq.apps.commtrack.tests.util import get_single_balance_block
 from corehq.apps.domain.models import Domain
 from corehq.apps.dump_reload.sql import SqlDataDumper, SqlDataLoader
+from corehq.apps.dump_reload.exceptions import DataLoadException
 from corehq.apps.dump_reload.sql.dump import (
+    dump_model_to_file,
     get_model_iterator_builders_to_dump,
     get_objects_to_dump,
 )
@@ -783,6 +786,55 @@ class TestSqlLoadWithError(BaseDumpLoadTest):
             loader.load_objects(dump_lines)
 
 
+class TestSplitDumpLoad(BaseDumpLoadTest):
+    def setUp(self):
+        for product_id in ['test1', 'test2', 'test3']:
+            SQLProduct.objects.create(domain=self.domain_name, product_id=product_id, name=product_id)
+
+    def _dump_split(self, dump_dir, model_labels):
+        manifest = {}
+        for order, model_label in enumerate(model_labels):
+            slug = f'sql-{order:04d}-{model_label}-default'
+            path = Path(dump_dir) / f'{slug}.gz'
+            counts, sha256 = dump_model_to_file(self.domain_name, model_label, 'default', path)
+            manifest[slug] = {'model': model_label, 'order': order, 'counts': counts, 'sha256': sha256}
+        return manifest
+
+    @mock.patch("corehq.apps.dump_reload.sql.load.BULK_CREATE_BATCH_SIZE", 2)
+    def test_load_split_dump_in_batches(self):
+        with TemporaryDirectory() as tmp:
+            manifest = self._dump_split(tmp, ['products.SQLProduct'])
+            self.delete_sql_data()
+            loaded = SqlDataLoader(stdout=StringIO()).load_split_dump(tmp, manifest)
+
+        self.assertEqual(loaded, {'sql-0000-products.SQLProduct-default': {'products.SQLProduct': 3}})
+        self.assertEqual(
+            set(SQLProduct.objects.filter(domain=self.domain_name).values_list('product_id', flat=True)),
+            {'test1', 'test2', 'test3'},
+        )
+
+    def test_load_split_dump_with_foreign_key_to_later_file(self):
+        from corehq.apps.fixtures.models import LookupTable, LookupTableRow
+        table = LookupTable.objects.create(domain=self.domain_name, tag="split-dump")
+        LookupTableRow.objects.create(domain=self.domain_name, table_id=table.id, sort_key=0)
+        with TemporaryDirectory() as tmp:
+            # rows are loaded before the table that they refer to
+            manifest = self._dump_split(tmp, ['fixtures.LookupTableRow', 'fixtures.LookupTable'])
+            self.delete_sql_data()
+            SqlDataLoader(stdout=StringIO()).load_split_dump(tmp, manifest)
+
+        row, = LookupTableRow.objects.filter(domain=self.domain_name)
+        self.assertEqual(row.table_id, table.id)
+
+    def test_load_split_dump_checksum_mismatch(self):
+        with TemporaryDirectory() as tmp:
+            slug = 'sql-0000-products.SQLProduct-default'
+            dump_model_to_file(self.domain_name, 'products.SQLProduct', 'default', Path(tmp) / f'{slug}.gz')
+            manifest = {slug: {'model': 'products.SQLProduct', 'order': 0, 'sha256': 'abc'}}
+            with self.assertRaises(DataLoadException):
+                SqlDataLoader().load_split_dump(tmp, manifest)
+
+
 class DefaultDictWithKeyTests(SimpleTestCase):
 
     def test_intended_use_case(self):
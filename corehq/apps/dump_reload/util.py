@@ -1,3 +1,5 @@
+import hashlib
+
 from django.apps import apps
 
 from corehq.apps.dump_reload.exceptions import DomainDumpError
@@ -20,3 +22,11 @@ def get_model_class(model_label):
         raise DomainDumpError("Unknown model: %s.%s" % (app_label, model_label))
 
     return app_config, model
+
+
+def get_file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as file_:
+        for chunk in iter(lambda: file_.read(1024 * 1024), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
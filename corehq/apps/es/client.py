@@ -570,7 +570,7 @@ class ElasticDocumentAdapter(BaseAdapter):
         """
         return self._es.search(self.index_name, self.type, query, **kw)
 
-    def scroll(self, query, scroll=SCROLL_KEEPALIVE, size=None):
+    def scroll(self, query, scroll=SCROLL_KEEPALIVE, size=None, preference=None):
         """Perfrom a scrolling search, yielding each doc until the entire context
         is exhausted.
 
@@ -580,11 +580,13 @@ class ElasticDocumentAdapter(BaseAdapter):
         :param size: ``int`` scroll size (number of documents per "scroll" page)
                      When set to ``None`` (the default), the default scroll size
                      is used.
+        :param preference: ``str`` search preference, e.g. ``_shards:0`` to
+                           only scroll the documents of one shard.
         :yields: ``dict`` documents
         """
         # TODO: standardize all result collections returned by this class.
         try:
-            for result in self._scroll(query, scroll, size):
+            for result in self._scroll(query, scroll, size, preference):
                 self._report_and_fail_on_shard_failures(result)
                 self._fix_hits_in_result(result)
                 for hit in result["hits"]["hits"]:
@@ -592,13 +594,14 @@ class ElasticDocumentAdapter(BaseAdapter):
         except ElasticsearchException as e:
             raise ESError(e)
 
-    def _scroll(self, query, scroll, size):
+    def _scroll(self, query, scroll, size, preference=None):
         """Perform one or more scroll requests to completely exhaust a scrolling
         search context.
 
         :param query: ``dict`` search query to execute
         :param scroll: ``str`` duration to keep scroll context alive
         :param size: ``int`` scroll size (number of documents per "scroll" page)
+        :param preference: ``str`` search preference of the initial search
         :yields: ``dict``s of Elasticsearch result objects
 
         Providing a query with ``size`` specified as well as the ``size``
@@ -638,6 +641,8 @@ class ElasticDocumentAdapter(BaseAdapter):
         elif size is not None:
             raise ValueError(f"ambiguous scroll size (specified in both query "
                              f"and arguments): query={size_qy}, arg={size}")
+        if preference is not None:
+            kwargs["preference"] = preference
         result = self._search(query, **kwargs)
         scroll_id = result.get("_scroll_id")
         if scroll_id is None:
@@ -1279,6 +1284,14 @@ def _client_for_export():
     )
 
 
+def reset_clients():
+    """Discard the cached client instances, so that a forked process does
+    not share connections with its parent.
+    """
+    _client_default.reset_cache()
+    _client_for_export.reset_cache()
+
+
 def _client(**override_kw):
     """Configure an elasticsearch.Elasticsearch instance."""
     hosts = _elastic_hosts()
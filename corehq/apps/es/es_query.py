@@ -131,6 +131,7 @@ class ESQuery(object):
     _size = None
     _aggregations = None
     _source = None
+    _preference = None
     default_filters = {
         "match_all": filters.match_all()
     }
@@ -222,7 +223,10 @@ class ESQuery(object):
         # The '_assemble()' method sets size=SIZE_LIMIT when no query size is
         # configured, and overrides that with size=0 for aggregation queries,
         # neither of which are acceptable for a scroll query.
-        for result in self.adapter.scroll(raw_query):
+        scroll_kwargs = {}
+        if self._preference is not None:
+            scroll_kwargs['preference'] = self._preference
+        for result in self.adapter.scroll(raw_query, **scroll_kwargs):
             yield ESQuerySet.normalize_result(self, result)
 
     @property
@@ -465,6 +469,19 @@ class ESQuery(object):
     def count(self):
         return self.adapter.count(self.raw_query)
 
+    def get_shard_count(self):
+        """Returns the number of shards of the index"""
+        return self.size(0).run().raw['_shards']['total']
+
+    def shard(self, shard_id):
+        """
+        Restrict scrolling to the documents in one shard of the index, so
+        that the shards of an index can be scrolled in parallel.
+        """
+        query = self.clone()
+        query._preference = '_shards:{}'.format(shard_id)
+        return query
+
     def get_ids(self):
         """Performs a minimal query to get the ids of the matching documents
 
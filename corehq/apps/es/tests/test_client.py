@@ -1067,6 +1067,14 @@ class TestElasticDocumentAdapter(AdapterWithIndexTestCase, ESTestHelpers):
                                            self.adapter.type, search_query,
                                            **scroll_kw)
 
+    def test_scroll_with_preference(self):
+        with patch.object(self.adapter._es, "search", return_value={}) as search:
+            list(self.adapter.scroll({}, size=10, preference="_shards:1"))
+            search.assert_called_once_with(self.adapter.index_name,
+                                           self.adapter.type, {"sort": "_doc"},
+                                           scroll=SCROLL_KEEPALIVE, size=10,
+                                           preference="_shards:1")
+
     def test_scroll_ambiguous_size_raises(self):
         query = {"size": 1}
         with self.assertRaises(ValueError):
@@ -100,6 +100,8 @@ CASE_EXPORT = 'case'
 SMS_EXPORT = 'sms'
 MAX_NORMAL_EXPORT_SIZE = 100000
 MAX_DAILY_EXPORT_SIZE = 1000000
+# number of rows of a table that are written to the export file at once
+EXPORT_WRITE_BATCH_SIZE = 1000
 CASE_SCROLL_SIZE = 10000
 
 # When a question is missing completely from a form/case this should be the value
@@ -2,7 +2,7 @@ import contextlib
 import datetime
 import sys
 import time
-from collections import Counter
+from collections import Counter, defaultdict
 
 from couchdbkit import ResourceConflict
 
@@ -10,10 +10,15 @@ from corehq.apps.export.exceptions import ExportTooLargeException
 from corehq.util.metrics import metrics_counter, metrics_track_errors
 from couchexport.export import FormattedRow, get_writer
 from couchexport.models import Format
+from couchexport.writers import ColumnarExportWriter
 from dimagi.utils.logging import notify_exception
 from soil import DownloadBase
 
-from corehq.apps.export.const import MAX_NORMAL_EXPORT_SIZE, MAX_DAILY_EXPORT_SIZE
+from corehq.apps.export.const import (
+    EXPORT_WRITE_BATCH_SIZE,
+    MAX_DAILY_EXPORT_SIZE,
+    MAX_NORMAL_EXPORT_SIZE,
+)
 from corehq.apps.export.dbaccessors import get_properly_wrapped_export_instance
 from corehq.apps.export.models.new import (
     CaseExportInstance,
@@ -74,11 +79,16 @@ class _ExportWriter(object):
             # open the ExportWriter
             headers = []
             table_titles = {}
+            column_types = {}
             for instance_index, instance in enumerate(export_instances):
                 headers += [
                     (t, (t.get_headers(split_columns=instance.split_multiselects),))
                     for t in instance.selected_tables
                 ]
+                column_types.update({
+                    t: t.get_column_types(split_columns=instance.split_multiselects)
+                    for t in instance.selected_tables
+                })
                 for table_index, table in enumerate(instance.selected_tables):
                     sheet_name = table.label or "Sheet{}".format(table_index + 1)
                     # If it's a bulk export and the sheet has the same name as another sheet,
@@ -89,7 +99,8 @@ class _ExportWriter(object):
                             sheet_name
                         )
                     table_titles[table] = sheet_name
-            self.writer.open(headers, file, table_titles=table_titles, archive_basepath=name)
+            self.writer.open(headers, file, table_titles=table_titles, archive_basepath=name,
+                             column_types=column_types)
             try:
                 yield
             finally:
@@ -102,13 +113,23 @@ class _ExportWriter(object):
         :param table: A TableConfiguration
         :param row: An ExportRow
         """
-        return self.writer.write([
-            (table, [FormattedRow(
+        return self.write_rows(table, [row])
+
+    def write_rows(self, table, rows):
+        """
+        Write the given rows to the given table of the export.
+        _Writer must be opened first.
+        :param table: A TableConfiguration
+        :param rows: A list of ExportRows
+        """
+        return self.writer.write_rows(table, [
+            FormattedRow(
                 data=row.data,
                 hyperlink_column_indices=row.hyperlink_column_indices,
                 skip_excel_formatting=row.skip_excel_formatting
                 if hasattr(row, 'skip_excel_formatting') else ()
-            )])
+            )
+            for row in rows
         ])
 
     def get_preview(self):
@@ -251,16 +272,32 @@ class _PaginatedExportWriter(object):
         :param table: A TableConfiguration
         :param row: An ExportRow
         """
-        if self.rows_written[table] >= MAX_NORMAL_EXPORT_SIZE * (self.pages[table] + 1):
-            self.pages[table] += 1
-            self.writer.add_table(
+        self.write_rows(table, [row])
+
+    def write_rows(self, table, rows):
+        """
+        Write the given rows to the given table of the export, starting
+        new tables as pages fill up.
+        :param table: A TableConfiguration
+        :param rows: A list of ExportRows
+        """
+        while rows:
+            page_space = MAX_NORMAL_EXPORT_SIZE * (self.pages[table] + 1) - self.rows_written[table]
+            if page_space <= 0:
+                self.pages[table] += 1
+                self.writer.add_table(
+                    self._paged_table_index(table),
+                    self._get_paginated_headers()[self._paged_table_index(table)][0],
+                    table_title=self._get_paginated_table_titles()[self._paged_table_index(table)],
+                )
+                continue
+
+            page_rows, rows = rows[:page_space], rows[page_space:]
+            self.writer.write_rows(
                 self._paged_table_index(table),
-                self._get_paginated_headers()[self._paged_table_index(table)][0],
-                table_title=self._get_paginated_table_titles()[self._paged_table_index(table)],
+                [FormattedRow(data=row.data) for row in page_rows]
             )
-
-        self.writer.write([(self._paged_table_index(table), [FormattedRow(data=row.data)])])
-        self.rows_written[table] += 1
+            self.rows_written[table] += len(page_rows)
 
 
 def get_export_writer(export_instances, temp_path, allow_pagination=True):
@@ -276,7 +313,9 @@ def get_export_writer(export_instances, temp_path, allow_pagination=True):
 
     legacy_writer = get_writer(format, use_formatted_cells=format_data_in_excel)
 
-    if allow_pagination and PAGINATED_EXPORTS.enabled(export_instances[0].domain):
+    # columnar files have no row limit, so they are not paginated
+    if (allow_pagination and PAGINATED_EXPORTS.enabled(export_instances[0].domain)
+            and not isinstance(legacy_writer, ColumnarExportWriter)):
         writer = _PaginatedExportWriter(legacy_writer, temp_path)
     else:
         writer = _ExportWriter(legacy_writer, temp_path)
@@ -361,18 +400,22 @@ def write_export_instance(writer, export_instance, documents,
         total_bytes = 0
         total_rows = 0
         track_load = load_counter(export_instance.type, "export", export_instance.domain)
+        tables = [
+            (table, table.get_row_extractor(
+                split_columns=export_instance.split_multiselects,
+                transform_dates=export_instance.transform_dates,
+                include_hyperlinks=include_hyperlinks,
+            ))
+            for table in export_instance.selected_tables
+        ]
+        # rows are buffered for each table and written in batches
+        row_batches = defaultdict(list)
 
         for row_number, doc in enumerate(documents):
             total_bytes += sys.getsizeof(doc)
-            for table in export_instance.selected_tables:
+            for table, row_extractor in tables:
                 try:
-                    rows = table.get_rows(
-                        doc,
-                        row_number,
-                        split_columns=export_instance.split_multiselects,
-                        transform_dates=export_instance.transform_dates,
-                        include_hyperlinks=include_hyperlinks,
-                    )
+                    rows = row_extractor.get_rows(doc, row_number)
                 except Exception as e:
                     notify_exception(None, "Error exporting doc", details={
                         'domain': export_instance.domain,
@@ -383,10 +426,9 @@ def write_export_instance(writer, export_instance, documents,
                     e.sentry_capture = False
                     raise
 
-                for row in rows:
-                    # It might be bad to write one row at a time from a performance perspective.
-                    # Regardless, we should handle the batching of rows in the _Writer class, not here.
-                    writer.write(table, row)
+                row_batches[table].extend(rows)
+                if len(row_batches[table]) >= EXPORT_WRITE_BATCH_SIZE:
+                    writer.write_rows(table, row_batches.pop(table))
 
                 total_rows += len(rows)
 
@@ -394,6 +436,9 @@ def write_export_instance(writer, export_instance, documents,
             if progress_tracker:
                 progress_manager.set_progress(row_number + 1, documents.count)
 
+        for table, rows in row_batches.items():
+            writer.write_rows(table, rows)
+
     end = _time_in_milliseconds()
     tags = {'format': writer.format}
     _record_datadog_export_duration(end - start, total_bytes, total_rows, tags)
@@ -0,0 +1,69 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from corehq.apps.export.models import (
+    ExportColumn,
+    PathNode,
+    RowNumberColumn,
+    ScalarItem,
+    TableConfiguration,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the rows per second of TableConfiguration.get_rows and of "
+        "its row extractor for a generated form export"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--columns', type=int, default=300)
+        parser.add_argument('--docs', type=int, default=2000)
+        parser.add_argument('--groups', type=int, default=10,
+                            help='Number of groups the questions are spread over')
+
+    def handle(self, columns, docs, groups, **options):
+        table = _get_table(columns, groups)
+        documents = [_get_form(columns, groups) for i in range(docs)]
+
+        def get_rows(doc, row_number):
+            return table.get_rows(doc, row_number, transform_dates=True)
+
+        extractor = table.get_row_extractor(transform_dates=True)
+        print(f"{columns} columns, {docs} forms")
+        for name, func in [('get_rows', get_rows), ('row extractor', extractor.get_rows)]:
+            start = time.perf_counter()
+            n_rows = sum(len(func(doc, i)) for i, doc in enumerate(documents))
+            duration = time.perf_counter() - start
+            print(f"{name}: {n_rows / duration:.0f} rows/sec")
+
+
+def _question_path(index, groups):
+    return ['form', f'group{index % groups}', f'question{index}']
+
+
+def _get_table(columns, groups):
+    return TableConfiguration(
+        path=[],
+        columns=[RowNumberColumn(selected=True)] + [
+            ExportColumn(
+                item=ScalarItem(path=[PathNode(name=name) for name in _question_path(i, groups)]),
+                selected=True,
+            )
+            for i in range(columns)
+        ]
+    )
+
+
+def _get_form(columns, groups):
+    form = {
+        'domain': 'benchmark',
+        '_id': uuid.uuid4().hex,
+        'form': {f'group{i}': {} for i in range(groups)},
+    }
+    for i in range(columns):
+        _, group, question = _question_path(i, groups)
+        form['form'][group][question] = f'value {i}'
+    return form
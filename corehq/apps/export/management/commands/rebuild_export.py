@@ -26,6 +26,13 @@ class Command(BaseCommand):
             default=multiprocessing.cpu_count() - 1,
             help='Number of parallel processes to run.'
         )
+        parser.add_argument(
+            '--by-shard',
+            action='store_true',
+            dest='by_shard',
+            default=False,
+            help='Dump the docs of each shard of the ES index in a separate process.'
+        )
 
     def handle(self, **options):
         if __debug__:
@@ -34,7 +41,8 @@ class Command(BaseCommand):
         export_id = options.pop('export_id')
         page_size = options.pop('page_size')
         processes = options.pop('processes')
+        by_shard = options.pop('by_shard')
 
-        rebuild_export_mutiprocess(export_id, processes, page_size)
+        rebuild_export_mutiprocess(export_id, processes, page_size, by_shard=by_shard)
 
         self.stdout.write(self.style.SUCCESS('Rebuild Complete'))
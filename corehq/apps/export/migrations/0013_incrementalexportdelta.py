@@ -0,0 +1,36 @@
+# Generated by Django 3.2.18 on 2026-10-18 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('export', '0012_defaultexportsettings_remove_duplicates_option'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='incrementalexport',
+            name='delta_log_start',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.CreateModel(
+            name='IncrementalExportDelta',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doc_id', models.CharField(max_length=255)),
+                ('deleted', models.BooleanField(default=False)),
+                ('date_modified', models.DateTimeField()),
+                ('incremental_export', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deltas', to='export.incrementalexport')),
+            ],
+            options={
+                'unique_together': {('incremental_export', 'doc_id')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='incrementalexportdelta',
+            index=models.Index(fields=['incremental_export', 'date_modified'], name='export_delta_date_idx'),
+        ),
+    ]
@@ -39,12 +39,14 @@ from .new import (
     StockFormExportColumn,
     StockItem,
     TableConfiguration,
+    TableRowExtractor,
     UserDefinedExportColumn,
 )
 
 from .incremental import (
     IncrementalExport,
-    IncrementalExportCheckpoint
+    IncrementalExportCheckpoint,
+    IncrementalExportDelta,
 )
 
 from .export_settings import (
@@ -1,8 +1,11 @@
+from datetime import datetime, timedelta
 from uuid import uuid4
 
 from django.db import models
 
+from couchexport.export import get_writer
 from couchexport.models import Format
+from dimagi.utils.chunked import chunked
 
 from corehq.apps.export.dbaccessors import get_properly_wrapped_export_instance
 from corehq.apps.export.export import (
@@ -12,10 +15,21 @@ from corehq.apps.export.export import (
     write_export_instance,
 )
 from corehq.apps.export.filters import ServerModifiedOnRangeFilter
+from corehq.apps.export.models.new import CaseExportInstance, FormExportInstance
 from corehq.blobs import CODES, get_blob_db
 from corehq.motech.models import RequestLog
+from corehq.toggles import INCREMENTAL_EXPORT_DELTA_LOG
 from corehq.util.files import TransientTempfile
 from corehq.util.metrics import metrics_track_errors
+from corehq.util.quickcache import quickcache
+
+# deltas logged more recently than this may not be committed yet when a
+# checkpoint is generated, so they are left for the next checkpoint
+DELTA_LOG_SETTLE_TIME = timedelta(minutes=1)
+# the processor logs the changes of an export once the toggle and the
+# domain's exports it has cached (see get_delta_log_exports) are current
+DELTA_LOG_START_DELAY = timedelta(minutes=10)
+DELTA_LOG_CHUNK_SIZE = 1000
 
 
 class IncrementalExport(models.Model):
@@ -26,6 +40,13 @@ class IncrementalExport(models.Model):
     date_created = models.DateTimeField(auto_now_add=True)
     date_modified = models.DateTimeField(auto_now=True)
     active = models.BooleanField(default=True)
+    # the time from which all changes to the export's documents are in
+    # its delta log
+    delta_log_start = models.DateTimeField(null=True)
+
+    def start_delta_log(self):
+        self.delta_log_start = datetime.utcnow() + DELTA_LOG_START_DELAY
+        self.save()
 
     def checkpoint(self, doc_count, last_doc_date):
         return IncrementalExportCheckpoint.objects.create(
@@ -93,6 +114,68 @@ class IncrementalExportCheckpoint(models.Model):
         return f'{self.incremental_export.name}-{date_suffix}.csv'
 
 
+class IncrementalExportDelta(models.Model):
+    """
+    The latest change to a document of an incremental export, logged from
+    the change feed. The log is compacted by keeping one delta for each
+    document, which is updated when the document changes again.
+    """
+    incremental_export = models.ForeignKey(IncrementalExport, related_name='deltas', on_delete=models.CASCADE)
+    doc_id = models.CharField(max_length=255)
+    deleted = models.BooleanField(default=False)
+    date_modified = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('incremental_export', 'doc_id')
+        indexes = [
+            models.Index(fields=['incremental_export', 'date_modified'], name='export_delta_date_idx'),
+        ]
+
+
+@quickcache(['domain'], timeout=5 * 60, memoize_timeout=60)
+def get_delta_log_exports(domain):
+    """
+    :returns: a list of ``(incremental_export_id, doc_type, subtype)``
+        for the active incremental exports of the domain, where doc_type is
+        'form' or 'case' and subtype is the xmlns or case type of the export
+    """
+    exports = []
+    for incremental_export in IncrementalExport.objects.filter(domain=domain, active=True):
+        export_instance = incremental_export.export_instance
+        if isinstance(export_instance, FormExportInstance):
+            exports.append((incremental_export.id, 'form', export_instance.xmlns))
+        elif isinstance(export_instance, CaseExportInstance):
+            exports.append((incremental_export.id, 'case', export_instance.case_type))
+    return exports
+
+
+def log_incremental_export_delta(incremental_export_id, doc_id, deleted):
+    IncrementalExportDelta.objects.update_or_create(
+        incremental_export_id=incremental_export_id,
+        doc_id=doc_id,
+        defaults={'deleted': deleted, 'date_modified': datetime.utcnow()},
+    )
+
+
+def stop_incremental_export_delta_logs(domain):
+    """
+    Mark the delta logs of the domain's exports as not started, when the
+    delta log toggle is turned on or off. Changes are not logged while it
+    is off, so the logs are incomplete until the next export starts them
+    again. Deltas that were logged before are older than the new start,
+    and are not used.
+    """
+    IncrementalExport.objects.filter(
+        domain=domain, delta_log_start__isnull=False
+    ).update(delta_log_start=None)
+
+
+def clear_incremental_export_delta_log(incremental_export):
+    incremental_export.deltas.all().delete()
+    incremental_export.delta_log_start = None
+    incremental_export.save()
+
+
 def generate_and_send_incremental_export(incremental_export, from_date):
     checkpoint = _generate_incremental_export(incremental_export, from_date)
     if checkpoint:
@@ -107,6 +190,20 @@ def _generate_incremental_export(incremental_export, last_doc_date=None):
     # Remove the date period from the ExportInstance, since this is added automatically by Daily Saved exports
     export_instance.filters.date_period = None
     filters = export_instance.get_filters()
+    if INCREMENTAL_EXPORT_DELTA_LOG.enabled(incremental_export.domain):
+        if _can_use_delta_log(incremental_export, last_doc_date):
+            return _generate_incremental_export_from_delta_log(
+                incremental_export, export_instance, filters, last_doc_date
+            )
+        if incremental_export.delta_log_start is None:
+            incremental_export.start_delta_log()
+        return _generate_incremental_export_from_query(
+            incremental_export, export_instance, filters, last_doc_date
+        )
+    elif incremental_export.delta_log_start:
+        # the log is incomplete once changes stop being logged
+        clear_incremental_export_delta_log(incremental_export)
+
     if last_doc_date:
         filters.append(ServerModifiedOnRangeFilter(gt=last_doc_date))
 
@@ -130,25 +227,133 @@ def _generate_incremental_export(incremental_export, last_doc_date=None):
             docs = LastDocTracker(query.run().hits)
             write_export_instance(writer, export_instance, docs)
 
-        export_file = ExportFile(writer.path, writer.format)
-
         if docs.doc_count <= 0:
             return
 
-        new_checkpoint = incremental_export.checkpoint(
-            docs.doc_count, docs.last_doc.get('server_modified_on')
+        return _save_checkpoint(
+            incremental_export,
+            ExportFile(writer.path, writer.format),
+            docs.doc_count,
+            docs.last_doc.get('server_modified_on'),
         )
 
-        with export_file as file_:
-            db = get_blob_db()
-            db.put(
-                file_,
-                domain=incremental_export.domain,
-                parent_id=new_checkpoint.blob_parent_id,
-                type_code=CODES.data_export,
-                key=str(new_checkpoint.blob_key),
-                timeout=24 * 60
-            )
+
+def _can_use_delta_log(incremental_export, last_doc_date):
+    return (
+        last_doc_date is not None
+        and incremental_export.delta_log_start is not None
+        and last_doc_date >= incremental_export.delta_log_start
+    )
+
+
+def _generate_incremental_export_from_delta_log(incremental_export, export_instance, filters, last_doc_date):
+    """
+    Write the rows of the documents that changed since ``last_doc_date``,
+    according to the export's delta log. Only the docs in the log are
+    fetched, by id. Docs that were deleted, or that no longer match the
+    export, are written as tombstone rows.
+    """
+    last_valid_checkpoint = incremental_export.last_valid_checkpoint
+    if last_valid_checkpoint:
+        # deltas that have been sent are not needed anymore
+        incremental_export.deltas.filter(date_modified__lte=last_valid_checkpoint.last_doc_date).delete()
+
+    deltas = incremental_export.deltas.filter(
+        date_modified__gt=last_doc_date,
+        date_modified__lte=datetime.utcnow() - DELTA_LOG_SETTLE_TIME,
+    ).order_by('date_modified').values_list('doc_id', 'deleted', 'date_modified')
+    query = get_export_query(export_instance, filters)
+
+    def iter_chunks():
+        for chunk in chunked(deltas.iterator(), DELTA_LOG_CHUNK_SIZE):
+            doc_ids = [doc_id for doc_id, deleted, date_modified in chunk if not deleted]
+            docs = {}
+            if doc_ids:
+                docs = {doc['_id']: doc for doc in query.doc_id(doc_ids).size(len(doc_ids)).run().hits}
+            yield [(doc_id, docs.get(doc_id), date_modified) for doc_id, deleted, date_modified in chunk]
+
+    return _write_delta_log_export(incremental_export, export_instance, iter_chunks())
+
+
+def _generate_incremental_export_from_query(incremental_export, export_instance, filters, last_doc_date):
+    """
+    Write the rows of the documents modified since ``last_doc_date``, for
+    exports that use the delta log but cannot use it yet.
+
+    The checkpoint is dated by the time the export is generated, less the
+    settle time, like the deltas of the log, so that the next export can
+    read the log from it. Docs that change while the export is generated
+    are sent again by the next export.
+    """
+    checkpoint_date = datetime.utcnow() - DELTA_LOG_SETTLE_TIME
+    if last_doc_date:
+        filters.append(ServerModifiedOnRangeFilter(gt=last_doc_date))
+    query = get_export_query(export_instance, filters).sort('server_modified_on')
+    docs = ((doc['_id'], doc, checkpoint_date) for doc in query.run().hits)
+    return _write_delta_log_export(incremental_export, export_instance, chunked(docs, DELTA_LOG_CHUNK_SIZE))
+
+
+def _write_delta_log_export(incremental_export, export_instance, chunks):
+    """
+    Write the first table of an export that uses the delta log, with two
+    extra columns at the start: the id of the document and whether it was
+    deleted.
+
+    :param chunks: Lists of ``(doc_id, doc, date_modified)``, where doc
+    is None for documents that were deleted or no longer match the
+    export, ordered by ``date_modified``.
+    """
+    # incremental exports only send the first table
+    table = export_instance.selected_tables[0]
+    headers = table.get_headers(split_columns=export_instance.split_multiselects)
+    extractor = table.get_row_extractor(
+        split_columns=export_instance.split_multiselects,
+        transform_dates=export_instance.transform_dates,
+        include_hyperlinks=False,
+    )
+    tombstone = [''] * len(headers)
+
+    doc_count = 0
+    last_doc_date = None
+    with TransientTempfile() as temp_path, metrics_track_errors('generate_incremental_exports'):
+        writer = get_writer(Format.UNZIPPED_CSV)
+        with open(temp_path, 'wb') as file_:
+            writer.open([(table, [['doc_id', 'deleted'] + headers])], file_)
+            for chunk in chunks:
+                rows = []
+                for doc_id, doc, date_modified in chunk:
+                    if doc is None:
+                        rows.append([doc_id, 'true'] + tombstone)
+                    else:
+                        rows.extend(
+                            [doc_id, ''] + row.data
+                            for row in extractor.get_rows(doc, doc_count)
+                        )
+                    doc_count += 1
+                    last_doc_date = date_modified
+                writer.write_rows(table, rows)
+            writer.close()
+
+        if doc_count <= 0:
+            return
+
+        return _save_checkpoint(
+            incremental_export, ExportFile(temp_path, Format.UNZIPPED_CSV), doc_count, last_doc_date
+        )
+
+
+def _save_checkpoint(incremental_export, export_file, doc_count, last_doc_date):
+    new_checkpoint = incremental_export.checkpoint(doc_count, last_doc_date)
+    with export_file as file_:
+        db = get_blob_db()
+        db.put(
+            file_,
+            domain=incremental_export.domain,
+            parent_id=new_checkpoint.blob_parent_id,
+            type_code=CODES.data_export,
+            key=str(new_checkpoint.blob_key),
+            timeout=24 * 60
+        )
     return new_checkpoint
 
 
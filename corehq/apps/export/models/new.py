@@ -5,6 +5,7 @@ from datetime import datetime
 from functools import partial
 from itertools import groupby
 
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.db.models import Sum
@@ -24,6 +25,7 @@ from memoized import memoized
 from casexml.apps.case.const import DEFAULT_CASE_INDEX_IDENTIFIERS
 from couchexport.models import Format
 from couchexport.transforms import couch_to_excel_datetime
+from couchexport.util import COLUMN_TYPE_STRING, COLUMN_TYPES
 from dimagi.ext.couchdbkit import (
     DateProperty,
     DateTimeProperty,
@@ -40,6 +42,7 @@ from soil.progress import set_task_progress
 from corehq import feature_previews
 from corehq.apps.app_manager.app_schemas.case_properties import (
     ParentCasePropertyBuilder,
+    get_per_type_defaults,
 )
 from corehq.apps.app_manager.const import STOCK_QUESTION_TAG_NAMES
 from corehq.apps.app_manager.dbaccessors import (
@@ -100,6 +103,7 @@ from corehq.apps.products.models import SQLProduct
 from corehq.apps.reports.daterange import get_daterange_start_end_dates
 from corehq.apps.reports.display import xmlns_to_name
 from corehq.apps.reports.models import HQUserType
+from corehq.toggles import CACHED_EXPORT_SCHEMAS, DATA_DICTIONARY
 from corehq.apps.userreports.app_manager.data_source_meta import (
     get_form_indicator_data_type,
 )
@@ -111,10 +115,14 @@ from corehq.blobs.models import BlobMeta
 from corehq.blobs.util import random_url_id
 from corehq.form_processor.interfaces.dbaccessors import LedgerAccessors
 from corehq.util.global_request import get_request_domain
+from corehq.util.json import hash_json
 from corehq.util.timezones.utils import get_timezone_for_domain
 from corehq.util.view_utils import absolute_reverse
 from corehq.util.html_utils import strip_tags
-from corehq.apps.data_dictionary.util import get_deprecated_fields
+from corehq.apps.data_dictionary.util import (
+    get_data_dict_props_by_case_type,
+    get_deprecated_fields,
+)
 
 
 DAILY_SAVED_EXPORT_ATTACHMENT_NAME = "payload"
@@ -122,6 +130,10 @@ DAILY_SAVED_EXPORT_ATTACHMENT_NAME = "payload"
 
 ExcelFormatValue = namedtuple('ExcelFormatValue', 'format value')
 
+# schemas of app builds are cached by the content they are generated from,
+# so they are valid for as long as the schema version does not change
+APP_BUILD_SCHEMA_CACHE_TIMEOUT = 30 * 24 * 60 * 60
+
 
 class PathNode(DocumentSchema):
     """
@@ -248,6 +260,52 @@ class ExportItem(DocumentSchema, ReadablePathMixin):
         return item
 
 
+def _transform_value(value, doc, transform_dates, transform, deid_transform):
+    # When XML elements have additional attributes in them, the text node is
+    # put inside of the #text key. For example:
+    #
+    # <element id="123">value</element>  -> {'#text': 'value', 'id':'123'}
+    #
+    # Whereas elements without additional attributes just take on the string value:
+    #
+    # <element>value</element>  -> 'value'
+    #
+    # This line ensures that we grab the actual value instead of the dictionary
+    if isinstance(value, dict):
+        if '#text' in value:
+            value = value.get('#text')
+        else:
+            return EMPTY_VALUE
+
+    if transform_dates:
+        value = couch_to_excel_datetime(value, doc)
+    if transform:
+        value = transform(value, doc)
+    if deid_transform:
+        try:
+            value = deid_transform(value, doc)
+        except ValueError:
+            # Unable to convert the string to a date
+            pass
+    if value is None:
+        value = MISSING_VALUE
+
+    if isinstance(value, list):
+        def _serialize(str_or_dict):
+            """
+            Serialize old data for scalar questions that were previously a repeat
+
+            This is a total edge case. See https://manage.dimagi.com/default.asp?280549.
+            """
+            if isinstance(str_or_dict, dict):
+                return ','.join('{}={}'.format(k, v) for k, v in str_or_dict.items())
+            else:
+                return str_or_dict
+
+        value = ' '.join(_serialize(elem) for elem in value)
+    return value
+
+
 class ExportColumn(DocumentSchema):
     """
     The model that represents a column in an export. Each column has a one-to-one
@@ -292,50 +350,13 @@ class ExportColumn(DocumentSchema):
         Transform the given value with the transform specified in self.item.transform.
         Also transform dates if the transform_dates flag is true.
         """
-
-        # When XML elements have additional attributes in them, the text node is
-        # put inside of the #text key. For example:
-        #
-        # <element id="123">value</element>  -> {'#text': 'value', 'id':'123'}
-        #
-        # Whereas elements without additional attributes just take on the string value:
-        #
-        # <element>value</element>  -> 'value'
-        #
-        # This line ensures that we grab the actual value instead of the dictionary
-        if isinstance(value, dict):
-            if '#text' in value:
-                value = value.get('#text')
-            else:
-                return EMPTY_VALUE
-
-        if transform_dates:
-            value = couch_to_excel_datetime(value, doc)
-        if self.item.transform:
-            value = TRANSFORM_FUNCTIONS[self.item.transform](value, doc)
-        if self.deid_transform:
-            try:
-                value = DEID_TRANSFORM_FUNCTIONS[self.deid_transform](value, doc)
-            except ValueError:
-                # Unable to convert the string to a date
-                pass
-        if value is None:
-            value = MISSING_VALUE
-
-        if isinstance(value, list):
-            def _serialize(str_or_dict):
-                """
-                Serialize old data for scalar questions that were previously a repeat
-
-                This is a total edge case. See https://manage.dimagi.com/default.asp?280549.
-                """
-                if isinstance(str_or_dict, dict):
-                    return ','.join('{}={}'.format(k, v) for k, v in str_or_dict.items())
-                else:
-                    return str_or_dict
-
-            value = ' '.join(_serialize(elem) for elem in value)
-        return value
+        return _transform_value(
+            value,
+            doc,
+            transform_dates,
+            TRANSFORM_FUNCTIONS[self.item.transform] if self.item.transform else None,
+            DEID_TRANSFORM_FUNCTIONS[self.deid_transform] if self.deid_transform else None,
+        )
 
     @staticmethod
     def create_default_from_export_item(
@@ -500,6 +521,25 @@ class TableConfiguration(DocumentSchema, ReadablePathMixin):
             headers.extend(column.get_headers(split_column=split_columns))
         return headers
 
+    def get_column_types(self, split_columns=False):
+        """
+        Return the column type of each header, for columnar export
+        formats. Only the values of plain columns of typed questions and
+        case properties are typed, everything else is a string.
+        """
+        column_types = []
+        for column in self.selected_columns:
+            headers = column.get_headers(split_column=split_columns)
+            column_type = COLUMN_TYPE_STRING
+            if (type(column) is ExportColumn
+                    and len(headers) == 1
+                    and not column.item.transform
+                    and not column.deid_transform
+                    and column.item.datatype in COLUMN_TYPES):
+                column_type = column.item.datatype
+            column_types.extend([column_type] * len(headers))
+        return column_types
+
     def get_rows(self, document, row_number, split_columns=False,
                  transform_dates=False, as_json=False, include_hyperlinks=True):
         """
@@ -639,6 +679,18 @@ class TableConfiguration(DocumentSchema, ReadablePathMixin):
 
         return None, None
 
+    def get_row_extractor(self, split_columns=False, transform_dates=False, include_hyperlinks=True):
+        """
+        :returns: a ``TableRowExtractor`` to get the rows of many documents
+            faster than with ``get_rows``
+        """
+        return TableRowExtractor(
+            self,
+            split_columns=split_columns,
+            transform_dates=transform_dates,
+            include_hyperlinks=include_hyperlinks,
+        )
+
     @memoized
     def get_hyperlink_column_indices(self, split_columns):
         export_column_index = 0
@@ -692,6 +744,134 @@ class TableConfiguration(DocumentSchema, ReadablePathMixin):
         return TableConfiguration._get_sub_documents_helper(document_id, path[1:], new_docs)
 
 
+class TableRowExtractor(object):
+    """
+    Gives the same rows as ``TableConfiguration.get_rows``, but is created
+    once per export run so that column paths and transforms are resolved
+    up front instead of for every value of every document.
+
+    The values of plain ``ExportColumn``s are looked up with a tree of
+    their paths, so that path prefixes shared by several columns are
+    only walked once for each sub document. Other columns use their own
+    ``get_value``.
+    """
+
+    def __init__(self, table, split_columns=False, transform_dates=False, include_hyperlinks=True):
+        self.table = table
+        self.split_columns = split_columns
+        self.transform_dates = transform_dates
+        self.hyperlink_column_indices = (
+            table.get_hyperlink_column_indices(split_columns) if include_hyperlinks else []
+        )
+        self.columns = table.selected_columns
+        self.is_row_number = [isinstance(column, RowNumberColumn) for column in self.columns]
+        self.table_path = [(node.name, node.is_repeat) for node in table.path]
+        # {column index: (transform, deid transform)} of the columns in path_tree
+        self.transforms = {}
+        # {name: ([column index, ...], {name: ...})}
+        self.path_tree = {}
+        for index, column in enumerate(self.columns):
+            if type(column) is not ExportColumn:
+                continue
+            item_path = column.item.path
+            if item_path[:len(table.path)] != table.path:
+                # get_value raises an error for this
+                continue
+            names = [node.name for node in item_path[len(table.path):]]
+            if not names:
+                continue
+            self.transforms[index] = (
+                TRANSFORM_FUNCTIONS[column.item.transform] if column.item.transform else None,
+                DEID_TRANSFORM_FUNCTIONS[column.deid_transform] if column.deid_transform else None,
+            )
+            tree = self.path_tree
+            for name in names[:-1]:
+                tree = tree.setdefault(name, ([], {}))[1]
+            tree.setdefault(names[-1], ([], {}))[0].append(index)
+
+    def get_rows(self, document, row_number):
+        """
+        Return a list of ExportRows generated for the given document.
+        :param document: dictionary representation of a form submission or case
+        :param row_number: number indicating this documents index in the sequence of all documents in the export
+        :return: List of ExportRows
+        """
+        document_id = document.get('_id')
+        sub_documents = self._get_sub_documents(document, row_number)
+        domain = document.get('domain')
+
+        assert domain is not None, 'Form or Case must be associated with domain'
+        assert document_id is not None, 'Form or Case must have an id'
+
+        rows = []
+        for doc, row_index in sub_documents:
+            values = [None] * len(self.columns)
+            _lookup_path_tree(doc, self.path_tree, values)
+            row_data = []
+            skip_excel_formatting = []
+            for index, column in enumerate(self.columns):
+                if index in self.transforms:
+                    transform, deid_transform = self.transforms[index]
+                    val = _transform_value(values[index], doc, self.transform_dates, transform, deid_transform)
+                else:
+                    val = column.get_value(
+                        domain,
+                        document_id,
+                        doc,
+                        self.table.path,
+                        row_index=row_index,
+                        split_column=self.split_columns,
+                        transform_dates=self.transform_dates,
+                    )
+                # we never want to auto-format RowNumberColumn
+                # (always treat as text)
+                if isinstance(val, list):
+                    if self.is_row_number[index]:
+                        skip_excel_formatting.extend(range(len(row_data), len(row_data) + len(val)))
+                    row_data.extend(val)
+                else:
+                    if self.is_row_number[index]:
+                        skip_excel_formatting.append(len(row_data))
+                    row_data.append(val)
+            rows.append(ExportRow(
+                data=row_data,
+                hyperlink_column_indices=self.hyperlink_column_indices,
+                skip_excel_formatting=skip_excel_formatting
+            ))
+        return rows
+
+    def _get_sub_documents(self, document, row_number):
+        row_docs = [DocRow(row=(row_number,), doc=document)]
+        for name, is_repeat in self.table_path:
+            new_docs = []
+            for doc, row_index in row_docs:
+                next_doc = doc.get(name, {}) if isinstance(doc, dict) else {}
+                if is_repeat:
+                    if type(next_doc) != list:
+                        # This happens when a repeat group has a single repeat iteration
+                        next_doc = [next_doc]
+                    new_docs.extend(
+                        DocRow(row=row_index + (new_doc_index,), doc=new_doc)
+                        for new_doc_index, new_doc in enumerate(next_doc)
+                    )
+                elif next_doc:
+                    new_docs.append(DocRow(row=row_index, doc=next_doc))
+            row_docs = new_docs
+        return row_docs
+
+
+def _lookup_path_tree(doc, tree, values):
+    # equivalent to NestedDictGetter for each path in the tree
+    if not isinstance(doc, dict):
+        return
+    for name, (indices, subtree) in tree.items():
+        value = doc.get(name)
+        for index in indices:
+            values[index] = value
+        if subtree:
+            _lookup_path_tree(value, subtree, values)
+
+
 class DatePeriod(DocumentSchema):
     period_type = StringProperty(required=True)
     days = IntegerProperty()
@@ -1859,6 +2039,45 @@ class ExportDataSchema(Document):
 
         return schema
 
+    @classmethod
+    def _get_app_build_schema(cls, app, identifier):
+        """The part of the schema that comes from a single app build
+
+        Builds with the same content have the same schema apart from the
+        app version of the items, so the schema of a build is cached by a
+        hash of the content it is generated from.
+
+        :returns: an ExportDataSchema, or None if the identifier is not in the app
+        """
+        if not CACHED_EXPORT_SCHEMAS.enabled(app.domain):
+            return cls._generate_app_build_schema(app, identifier)
+
+        content_hash = cls._get_app_build_hash(app, identifier)
+        if content_hash is None:
+            return None
+        cache_key = 'export-app-build-schema-{}-{}-{}'.format(
+            cls.__name__, cls.schema_version(), content_hash)
+        schema_json = cache.get(cache_key)
+        if schema_json is not None:
+            _set_last_occurrences(schema_json, {app.origin_id: app.version})
+            return cls.wrap(schema_json)
+
+        schema = cls._generate_app_build_schema(app, identifier)
+        if schema is not None:
+            schema.domain = app.domain
+            schema._set_identifier(identifier)
+            cache.set(cache_key, schema.to_json(), APP_BUILD_SCHEMA_CACHE_TIMEOUT)
+        return schema
+
+    @classmethod
+    def cache_app_build_schemas(cls, app):
+        """Generate and cache the schemas of every identifier in an app build"""
+        for identifier in cls._get_identifiers_in_app(app):
+            try:
+                cls._get_app_build_schema(app, identifier)
+            except Exception as e:
+                logging.exception('Failed to process app {}. {}'.format(app._id, e))
+
     def record_update(self, app_id, app_version):
         self.last_app_versions[app_id] = max(
             self.last_app_versions.get(app_id, 0),
@@ -1937,9 +2156,16 @@ class FormExportDataSchema(ExportDataSchema):
 
     @classmethod
     def _process_app_build(cls, current_schema, app, form_xmlns):
+        build_schema = cls._get_app_build_schema(app, form_xmlns)
+        if build_schema is None:
+            return current_schema
+        return cls._merge_schemas(current_schema, build_schema)
+
+    @classmethod
+    def _generate_app_build_schema(cls, app, form_xmlns):
         forms = app.get_forms_by_xmlns(form_xmlns, log_missing=False)
         if not forms:
-            return current_schema
+            return None
 
         xform = forms[0].wrapped_xform()  # This will be the same for any form in the list
         xform_schema = cls._generate_schema_from_xform(
@@ -1949,11 +2175,30 @@ class FormExportDataSchema(ExportDataSchema):
             app.version,
         )
 
-        schemas = [current_schema, xform_schema]
         repeats = cls._get_repeat_paths(xform, app.langs)
-        schemas.extend(cls._add_export_items_for_cases(xform_schema.group_schemas[0], forms, repeats))
+        subcase_schemas = cls._add_export_items_for_cases(xform_schema.group_schemas[0], forms, repeats)
+        if not subcase_schemas:
+            return xform_schema
+        return cls._merge_schemas(xform_schema, *subcase_schemas)
+
+    @staticmethod
+    def _get_app_build_hash(app, form_xmlns):
+        forms = app.get_forms_by_xmlns(form_xmlns, log_missing=False)
+        if not forms:
+            return None
+        return hash_json([app.langs] + [
+            [
+                form.to_json(),
+                form.actions.to_json(),
+                form.source,
+                {key: value for key, value in form.get_module().to_json().items() if key != 'forms'},
+            ]
+            for form in forms
+        ])
 
-        return cls._merge_schemas(*schemas)
+    @staticmethod
+    def _get_identifiers_in_app(app):
+        return list(OrderedSet(form.xmlns for form in app.get_forms() if form.xmlns))
 
     @classmethod
     def _add_export_items_for_cases(cls, root_group_schema, forms, repeats):
@@ -2242,6 +2487,10 @@ class CaseExportDataSchema(ExportDataSchema):
 
     @classmethod
     def _process_app_build(cls, current_schema, app, case_type):
+        return cls._merge_schemas(cls._get_app_build_schema(app, case_type), current_schema)
+
+    @classmethod
+    def _generate_app_build_schema(cls, app, case_type):
         builder = ParentCasePropertyBuilder(
             app.domain,
             [app],
@@ -2268,10 +2517,34 @@ class CaseExportDataSchema(ExportDataSchema):
             app.origin_id,
             app.version,
         ))
-        case_schemas.append(current_schema)
 
         return cls._merge_schemas(*case_schemas)
 
+    @staticmethod
+    def _get_app_build_hash(app, case_type):
+        # the case properties of an app also come from the project's
+        # data dictionary and default properties
+        data_dictionary = {}
+        if DATA_DICTIONARY.enabled(app.domain):
+            # the properties of each case type are sets, whose order
+            # changes between processes
+            data_dictionary = {
+                type_: sorted(props)
+                for type_, props in get_data_dict_props_by_case_type(app.domain).items()
+            }
+        return hash_json([
+            app.domain,
+            case_type,
+            app.to_json()['modules'],
+            [form.source for form in app.get_forms()],
+            get_per_type_defaults(app.domain),
+            data_dictionary,
+        ])
+
+    @staticmethod
+    def _get_identifiers_in_app(app):
+        return sorted(case_type for case_type in app.get_case_types() if case_type)
+
     @classmethod
     def _generate_schema_from_case_property_mapping(cls, case_property_mapping, parent_types, app_id, app_version):
         """
@@ -2413,6 +2686,19 @@ def _path_nodes_to_string(path, separator=' '):
     return separator.join(["{}.{}".format(node.name, node.is_repeat) for node in path])
 
 
+def _set_last_occurrences(value, last_occurrences):
+    """Sets the last occurrences of everything in a schema's JSON in place"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key == 'last_occurrences':
+                value[key] = dict(last_occurrences)
+            else:
+                _set_last_occurrences(item, last_occurrences)
+    elif isinstance(value, list):
+        for item in value:
+            _set_last_occurrences(item, last_occurrences)
+
+
 def _merge_lists(one, two, keyfn, resolvefn):
     """Merges two lists. The algorithm is to first iterate over the first list. If the item in the first list
     does not exist in the second list, add that item to the merged list. If the item does exist in the second
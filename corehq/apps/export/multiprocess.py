@@ -11,6 +11,8 @@ See the 'process_skipped_pages' management command for an example.
 
 The export works as follows:
   * Dump raw docs from ES into files of size N docs
+    * With ``by_shard=True`` each shard of the ES index is dumped by a
+      separate process, instead of dumping all docs with one ES scroll
   * Once each file is complete add it to a multiprocessing Queue
   * Pool of X processes listen to queue and process the dump file
   * Results returned back to the main process
@@ -33,10 +35,12 @@ from queue import Empty
 from couchexport.export import get_writer
 from couchexport.writers import ZippedExportWriter
 
+from corehq.apps.es.client import reset_clients
 from corehq.apps.es.es_query import ScanResult
 from corehq.apps.export.dbaccessors import get_properly_wrapped_export_instance
 from corehq.apps.export.export import (
     get_export_documents,
+    get_export_query,
     get_export_size,
     get_export_writer,
     save_export_payload,
@@ -53,6 +57,10 @@ logger = logging.getLogger(__name__)
 
 ProgressValue = namedtuple('ProgressValue', 'page progress total')
 
+# messages sent by shard dump processes
+DumpedPage = namedtuple('DumpedPage', 'shard path page_size docs_per_second')
+ShardDumped = namedtuple('ShardDumped', 'shard doc_count docs_per_second success')
+
 
 class BaseResult(object):
     success = False
@@ -118,17 +126,20 @@ class OutputPaginator(object):
         return RetryResult(self.page, self.path, self.page_size, 0)
 
 
-def rebuild_export_mutiprocess(export_id, num_processes, page_size=100000):
+def rebuild_export_mutiprocess(export_id, num_processes, page_size=100000, by_shard=False):
     assert num_processes > 0
 
     export_instance = get_properly_wrapped_export_instance(export_id)
     filters = export_instance.get_filters()
     total_docs = get_export_size(export_instance, filters)
     exporter = MultiprocessExporter(export_instance, total_docs, num_processes)
-    paginator = OutputPaginator(export_id)
 
     logger.info('Starting data dump of {} docs'.format(total_docs))
-    run_multiprocess_exporter(exporter, filters, paginator, page_size)
+    if by_shard:
+        run_sharded_multiprocess_exporter(exporter, filters, page_size)
+    else:
+        paginator = OutputPaginator(export_id)
+        run_multiprocess_exporter(exporter, filters, paginator, page_size)
 
 
 def run_multiprocess_exporter(exporter, filters, paginator, page_size):
@@ -149,6 +160,99 @@ def run_multiprocess_exporter(exporter, filters, paginator, page_size):
     exporter.wait_till_completion()
 
 
+def run_sharded_multiprocess_exporter(exporter, filters, page_size):
+    """
+    Like ``run_multiprocess_exporter``, but the docs of each shard of the
+    ES index are dumped by a separate process. Pages are processed as soon
+    as any of the shards has dumped them, and are numbered in the order
+    in which they are dumped.
+    """
+    export_instance = exporter.export_instance
+    # build the filters here, so that dump processes only need to query ES
+    es_filters = [f.to_es_filter() for f in filters]
+    shard_count = get_export_query(export_instance, es_filters, are_filters_es_formatted=True).get_shard_count()
+    page_queue = multiprocessing.Queue()
+    dumpers = {
+        shard: multiprocessing.Process(
+            target=_dump_shard,
+            args=(export_instance, es_filters, shard, page_size, page_queue)
+        )
+        for shard in range(shard_count)
+    }
+
+    logger.info('Dumping {} shards in parallel'.format(shard_count))
+    page = 0
+    with exporter:
+        try:
+            for dumper in dumpers.values():
+                dumper.start()
+            while dumpers:
+                try:
+                    message = page_queue.get(timeout=10)
+                except Empty:
+                    _check_dumpers_alive(dumpers)
+                    continue
+                if isinstance(message, DumpedPage):
+                    page += 1
+                    logger.info('  Dump page {} complete: {} docs from shard {} ({:.0f} docs/sec)'.format(
+                        page, message.page_size, message.shard, message.docs_per_second
+                    ))
+                    exporter.process_page(RetryResult(page, message.path, message.page_size, 0))
+                else:
+                    dumpers.pop(message.shard).join()
+                    if not message.success:
+                        raise Exception('Dump of shard {} failed'.format(message.shard))
+                    logger.info('  Dump of shard {} complete: {} docs ({:.0f} docs/sec)'.format(
+                        message.shard, message.doc_count, message.docs_per_second
+                    ))
+        finally:
+            for dumper in dumpers.values():
+                dumper.terminate()
+
+    exporter.wait_till_completion()
+
+
+def _check_dumpers_alive(dumpers):
+    for shard, dumper in dumpers.items():
+        # processes that exit normally send a ShardDumped message first
+        if dumper.exitcode:
+            raise Exception('Dump process of shard {} exited with code {}'.format(shard, dumper.exitcode))
+
+
+def _dump_shard(export_instance, es_filters, shard, page_size, page_queue):
+    """Dump the docs of one shard of the export to pages, and send each
+    page to ``page_queue`` as soon as it is complete"""
+    # don't use the ES connections of the parent process
+    reset_clients()
+    start = time.time()
+    doc_count = 0
+
+    def _docs_per_second():
+        return doc_count / max(time.time() - start, 0.001)
+
+    paginator = OutputPaginator('{}_{}'.format(export_instance.get_id, shard))
+    try:
+        query = get_export_query(export_instance, es_filters, are_filters_es_formatted=True).shard(shard)
+        with paginator:
+            for doc in query.scroll_ids_to_disk_and_iter_docs():
+                paginator.write(doc)
+                doc_count += 1
+                if paginator.page_size == page_size:
+                    path = paginator.path
+                    paginator.next_page()
+                    page_queue.put(DumpedPage(shard, path, page_size, _docs_per_second()))
+            path, last_page_size = paginator.path, paginator.page_size
+        if last_page_size:
+            page_queue.put(DumpedPage(shard, path, last_page_size, _docs_per_second()))
+        else:
+            os.remove(path)
+    except Exception:
+        logger.exception('Error dumping shard {}'.format(shard))
+        page_queue.put(ShardDumped(shard, doc_count, _docs_per_second(), False))
+    else:
+        page_queue.put(ShardDumped(shard, doc_count, _docs_per_second(), True))
+
+
 def run_export_with_logging(export_instance, page_number, dump_path, doc_count, attempts):
     """Log any exceptions here since logging on the other side of the process queue
     won't show the traceback
@@ -345,7 +449,7 @@ class MultiprocessExporter(object):
         final_zip = self._get_zipfile_for_final_archive()
         with final_zip:
             pages = len(export_results)
-            for result in export_results:
+            for result in sorted(export_results, key=lambda result: result.page):
                 if not result.success:
                     logger.error('  Error in page %s so not added to final output', result.page)
                     if os.path.exists(result.path):
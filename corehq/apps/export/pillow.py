@@ -0,0 +1,49 @@
+from pillowtop.processors import PillowProcessor
+
+from corehq.apps.change_feed import data_sources
+from corehq.apps.export.models.incremental import (
+    get_delta_log_exports,
+    log_incremental_export_delta,
+)
+from corehq.toggles import INCREMENTAL_EXPORT_DELTA_LOG
+
+_DOC_TYPES_BY_DATA_SOURCE = {
+    data_sources.FORM_SQL: 'form',
+    data_sources.CASE_SQL: 'case',
+}
+
+
+class IncrementalExportDeltaProcessor(PillowProcessor):
+    """Logs the form and case changes of incremental exports
+
+    Changes of domains that don't have the delta log enabled are not
+    logged. The delta logs of their incremental exports are marked as not
+    started when the toggle changes, so that exports don't use an
+    incomplete log.
+
+    Reads from:
+    - Incremental exports (cached)
+
+    Writes to:
+    - Postgres (incremental export deltas)
+    """
+
+    def process_change(self, change):
+        domain = change.metadata.domain if change.metadata else None
+        if not domain:
+            return
+
+        doc_type = _DOC_TYPES_BY_DATA_SOURCE.get(change.metadata.data_source_name)
+        if doc_type is None:
+            return
+
+        if not INCREMENTAL_EXPORT_DELTA_LOG.enabled(domain):
+            return
+
+        subtype = change.metadata.document_subtype
+        for incremental_export_id, export_doc_type, export_subtype in get_delta_log_exports(domain):
+            if export_doc_type != doc_type:
+                continue
+            # hard deletions of forms don't have an xmlns
+            if subtype == export_subtype or (change.deleted and not subtype):
+                log_incremental_export_delta(incremental_export_id, change.id, change.deleted)
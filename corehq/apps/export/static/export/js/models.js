@@ -322,6 +322,10 @@ hqDefine('export/js/models', [
             return gettext('Excel (older versions)');
         } else if (format === constants.EXPORT_FORMATS.XLSX) {
             return gettext('Excel 2007+');
+        } else if (format === constants.EXPORT_FORMATS.PARQUET) {
+            return gettext('Parquet (Zip file)');
+        } else if (format === constants.EXPORT_FORMATS.ARROW) {
+            return gettext('Arrow (Zip file)');
         }
     };
 
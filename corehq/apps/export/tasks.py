@@ -10,6 +10,8 @@ from soil import DownloadBase
 from soil.progress import get_task_status
 from soil.util import expose_blob_download, process_email_request
 
+from corehq.apps.app_manager.dbaccessors import get_app
+from corehq.apps.app_manager.models import RemoteApp
 from corehq.apps.celery import periodic_task, task
 from corehq.apps.data_dictionary.util import add_properties_to_data_dictionary
 from corehq.apps.export.exceptions import RejectedStaleExport
@@ -33,7 +35,11 @@ from .dbaccessors import (
 )
 from .export import get_export_file, rebuild_export
 from .models.incremental import IncrementalExport
-from .models.new import EmailExportWhenDoneRequest
+from .models.new import (
+    CaseExportDataSchema,
+    EmailExportWhenDoneRequest,
+    FormExportDataSchema,
+)
 from .system_properties import MAIN_CASE_TABLE_PROPERTIES
 
 logger = logging.getLogger('export_migration')
@@ -223,6 +229,15 @@ def generate_schema_for_all_builds(self, export_type, domain, app_id, identifier
     )
 
 
+@task(queue='background_queue')
+def cache_app_build_export_schemas(domain, build_id):
+    app = get_app(domain, build_id)
+    if isinstance(app, RemoteApp):
+        return
+    for schema_cls in (FormExportDataSchema, CaseExportDataSchema):
+        schema_cls.cache_app_build_schemas(app)
+
+
 @periodic_task(run_every=crontab(hour="*", minute="30", day_of_week="*"),
                queue=getattr(settings, 'CELERY_PERIODIC_QUEUE', 'celery'))
 def generate_incremental_exports():
@@ -47,7 +47,7 @@ from corehq.apps.export.models.new import (
 from corehq.apps.export.tasks import add_inferred_export_properties
 from corehq.apps.export.tests.util import assertContainsExportItems
 from corehq.util.context_managers import drop_connected_signals
-from corehq.util.test_utils import softer_assert
+from corehq.util.test_utils import flag_enabled, softer_assert
 
 
 class TestFormExportDataSchema(SimpleTestCase, TestXmlMixin):
@@ -446,6 +446,31 @@ class TestMergingFormExportDataSchema(SimpleTestCase, TestXmlMixin):
         self.assertEqual(group_schema2.last_occurrences[self.app_id], 1)
         self.assertEqual(len(group_schema2.items), 1)
 
+    @patch('corehq.apps.export.models.new.get_per_type_defaults', return_value={})
+    @patch('corehq.apps.export.models.new.DATA_DICTIONARY.enabled', return_value=True)
+    def test_app_build_hash_with_data_dictionary(self, *args):
+        factory = AppFactory(domain='export-hash')
+        factory.new_basic_module('m0', 'candy')
+        app = factory.app
+
+        hashes = set()
+        for props in [['color', 'flavor', 'size'], ['size', 'color', 'flavor']]:
+            with patch('corehq.apps.export.models.new.get_data_dict_props_by_case_type',
+                       return_value={'candy': _OrderedSet(props)}):
+                hashes.add(CaseExportDataSchema._get_app_build_hash(app, 'candy'))
+        self.assertEqual(len(hashes), 1)
+
+
+class _OrderedSet(set):
+    """A set that iterates in the order it was created with"""
+
+    def __init__(self, items):
+        super().__init__(items)
+        self.items = list(items)
+
+    def __iter__(self):
+        return iter(self.items)
+
 
 class TestMergingCaseExportDataSchema(SimpleTestCase, TestXmlMixin):
 
@@ -677,6 +702,26 @@ class TestBuildingSchemaFromApplication(TestCase, TestXmlMixin):
         self.assertEqual(new_schema.last_app_versions[app._id], second_build.version)
         self.assertEqual(len(new_schema.group_schemas), 1)
 
+    @flag_enabled('CACHED_EXPORT_SCHEMAS')
+    def test_cached_app_build_schema(self):
+        FormExportDataSchema._get_app_build_schema(self.first_build, 'my_sweet_xmlns')
+
+        second_build = Application.wrap(self.get_json('basic_application'))
+        second_build._id = '456'
+        second_build.copy_of = self.current_app.get_id
+        second_build.version = 6
+        with drop_connected_signals(app_post_save):
+            second_build.save()
+        self.addCleanup(second_build.delete)
+
+        with patch.object(FormExportDataSchema, '_generate_app_build_schema') as generate:
+            schema = FormExportDataSchema._get_app_build_schema(second_build, 'my_sweet_xmlns')
+        generate.assert_not_called()
+
+        expected = FormExportDataSchema._generate_app_build_schema(second_build, 'my_sweet_xmlns')
+        self.assertEqual(schema.to_json()['group_schemas'], expected.to_json()['group_schemas'])
+        self.assertEqual(schema.group_schemas[0].last_occurrences, {self.current_app.get_id: 6})
+
     def test_build_with_inferred_schema(self):
         app = self.current_app
 
@@ -7,6 +7,9 @@ import requests_mock
 
 from couchexport.models import Format
 
+from pillowtop.feed.interface import Change, ChangeMeta
+
+from corehq.apps.change_feed import data_sources
 from corehq.apps.domain.shortcuts import create_domain
 from corehq.apps.es.cases import case_adapter
 from corehq.apps.es.tests.utils import es_test
@@ -19,11 +22,15 @@ from corehq.apps.export.models import (
     TableConfiguration,
 )
 from corehq.apps.export.models.incremental import (
+    DELTA_LOG_SETTLE_TIME,
     IncrementalExport,
     IncrementalExportStatus,
+    _can_use_delta_log,
     _generate_incremental_export,
+    get_delta_log_exports,
     _send_incremental_export,
 )
+from corehq.apps.export.pillow import IncrementalExportDeltaProcessor
 from corehq.apps.export.tests.util import DEFAULT_CASE_TYPE, new_case
 from corehq.apps.locations.models import SQLLocation
 from corehq.apps.locations.tests.util import (
@@ -34,6 +41,9 @@ from corehq.apps.users.dbaccessors import delete_all_users
 from corehq.apps.users.models import CommCareUser
 from corehq.motech.const import BASIC_AUTH
 from corehq.motech.models import ConnectionSettings
+from corehq.toggles import INCREMENTAL_EXPORT_DELTA_LOG, NAMESPACE_DOMAIN
+from corehq.toggles.shortcuts import set_toggle
+from corehq.util.test_utils import flag_enabled
 
 
 @es_test(requires=[case_adapter, user_adapter], setup_class=True)
@@ -55,6 +65,7 @@ class TestIncrementalExport(TestCase):
 
         for case in cases:
             case_adapter.index(case.to_json(), refresh=True)
+        cls.case_ids = [case.case_id for case in cases]
 
     def setUp(self):
         super().setUp()
@@ -155,6 +166,101 @@ class TestIncrementalExport(TestCase):
 
         self.assertEqual(self.incremental_export.checkpoints.count(), 3)
 
+    def test_delta_log(self):
+        checkpoint = self.test_initial()
+
+        checkpoint.status = IncrementalExportStatus.SUCCESS
+        checkpoint.save()
+        with flag_enabled('INCREMENTAL_EXPORT_DELTA_LOG'):
+            self._test_delta_log(checkpoint)
+
+    def _test_delta_log(self, checkpoint):
+
+        case = new_case(
+            domain=self.domain,
+            case_json={"foo": "peach", "bar": "plumb"},
+            server_modified_on=datetime.utcnow(),
+        )
+        case_adapter.index(case.to_json(), refresh=True)
+        self.addCleanup(self._cleanup_case(case.case_id))
+
+        get_delta_log_exports.clear(self.domain)
+        processor = IncrementalExportDeltaProcessor()
+        for doc_id, case_type, deleted in [
+            (case.case_id, DEFAULT_CASE_TYPE, False),
+            ('deleted-case', DEFAULT_CASE_TYPE, True),
+            ('other-case', 'other-type', False),
+        ]:
+            processor.process_change(Change(doc_id, None, deleted=deleted, metadata=ChangeMeta(
+                document_id=doc_id,
+                data_source_type=data_sources.SOURCE_SQL,
+                data_source_name=data_sources.CASE_SQL,
+                document_type='CommCareCase',
+                document_subtype=case_type,
+                domain=self.domain,
+                is_deletion=deleted,
+            )))
+
+        deltas = self.incremental_export.deltas.order_by('doc_id')
+        self.assertEqual(
+            sorted(deltas.values_list('doc_id', 'deleted')),
+            sorted([(case.case_id, False), ('deleted-case', True)]),
+        )
+        # move the deltas out of the settle time, and the log start to before the checkpoint
+        IncrementalExport.objects.filter(id=self.incremental_export.id).update(
+            delta_log_start=self.now - timedelta(days=1)
+        )
+        deltas.filter(doc_id=case.case_id).update(date_modified=self.now - timedelta(minutes=3))
+        deltas.filter(doc_id='deleted-case').update(date_modified=self.now - timedelta(minutes=2))
+        self.incremental_export.refresh_from_db()
+
+        checkpoint = _generate_incremental_export(self.incremental_export, last_doc_date=checkpoint.last_doc_date)
+        data = checkpoint.get_blob().read().decode('utf-8-sig')
+        expected = (
+            "doc_id,deleted,Foo column,Bar column\r\n"
+            f"{case.case_id},,peach,plumb\r\n"
+            "deleted-case,true,,\r\n"
+        )
+        self.assertEqual(data, expected)
+        self.assertEqual(checkpoint.doc_count, 2)
+
+    @flag_enabled('INCREMENTAL_EXPORT_DELTA_LOG')
+    def test_delta_log_fallback(self):
+        start = datetime.utcnow()
+        checkpoint = _generate_incremental_export(self.incremental_export)
+        data = checkpoint.get_blob().read().decode('utf-8-sig')
+        expected = (
+            "doc_id,deleted,Foo column,Bar column\r\n"
+            f"{self.case_ids[0]},,apple,banana\r\n"
+            f"{self.case_ids[1]},,orange,pear\r\n"
+        )
+        self.assertEqual(data, expected)
+        # checkpoints are dated like the deltas of the log
+        self.assertGreaterEqual(checkpoint.last_doc_date, start - DELTA_LOG_SETTLE_TIME)
+        self.incremental_export.refresh_from_db()
+        self.assertGreater(self.incremental_export.delta_log_start, start)
+
+    def test_changes_are_not_logged_without_toggle(self):
+        get_delta_log_exports.clear(self.domain)
+        processor = IncrementalExportDeltaProcessor()
+        with self.assertNumQueries(0):
+            processor.process_change(Change('case1', None, metadata=ChangeMeta(
+                document_id='case1',
+                data_source_type=data_sources.SOURCE_SQL,
+                data_source_name=data_sources.CASE_SQL,
+                document_type='CommCareCase',
+                document_subtype=DEFAULT_CASE_TYPE,
+                domain=self.domain,
+            )))
+
+    def test_delta_log_is_stopped_by_toggle_change(self):
+        for enabled in [True, False]:
+            self.incremental_export.start_delta_log()
+            set_toggle(INCREMENTAL_EXPORT_DELTA_LOG.slug, self.domain, enabled, namespace=NAMESPACE_DOMAIN)
+            self.incremental_export.refresh_from_db()
+            self.assertIsNone(self.incremental_export.delta_log_start)
+            self.assertFalse(_can_use_delta_log(self.incremental_export, self.now))
+
     def test_sending_success(self):
         self._test_sending(200, IncrementalExportStatus.SUCCESS)
 
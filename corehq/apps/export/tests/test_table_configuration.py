@@ -1,14 +1,21 @@
 from django.test import SimpleTestCase
 
-from corehq.apps.export.const import USERNAME_TRANSFORM
+from corehq.apps.export.const import (
+    DEID_ID_TRANSFORM,
+    DOC_TYPE_TRANSFORM,
+    USERNAME_TRANSFORM,
+)
 from corehq.apps.export.models import (
     DocRow,
     ExportColumn,
     ExportItem,
     ExportRow,
+    MultipleChoiceItem,
+    Option,
     PathNode,
     RowNumberColumn,
     ScalarItem,
+    SplitExportColumn,
     TableConfiguration,
 )
 
@@ -106,6 +113,36 @@ class TableConfigurationTest(SimpleTestCase):
         self.assertIsNotNone(column)
         self.assertEqual(index, 1)
 
+    def test_get_column_types(self):
+        def column(name, datatype, **kwargs):
+            return ExportColumn(
+                item=ScalarItem(path=[PathNode(name='form'), PathNode(name=name)], datatype=datatype),
+                selected=True,
+                **kwargs
+            )
+
+        table_configuration = TableConfiguration(
+            path=[],
+            columns=[
+                RowNumberColumn(selected=True),
+                column('q1', 'integer'),
+                column('q2', 'date'),
+                column('q3', 'datetime', deid_transform=DEID_ID_TRANSFORM),
+                column('q4', None),
+                SplitExportColumn(
+                    item=MultipleChoiceItem(
+                        path=[PathNode(name='form'), PathNode(name='q5')],
+                        options=[Option(value='a'), Option(value='b')],
+                    ),
+                    selected=True,
+                ),
+            ]
+        )
+        self.assertEqual(
+            table_configuration.get_column_types(split_columns=True),
+            ['string', 'integer', 'date', 'string', 'string', 'string', 'string', 'string'],
+        )
+
 
 class TableConfigurationGetSubDocumentsTest(SimpleTestCase):
 
@@ -355,3 +392,88 @@ class TableConfigurationGetRowsTest(SimpleTestCase):
         self.assertEqual(
             [row.data for row in table_configuration.get_rows(submission, 0)], []
         )
+
+
+class TableRowExtractorTest(SimpleTestCase):
+
+    def _assert_same_rows(self, table_configuration, submission, **kwargs):
+        extractor = table_configuration.get_row_extractor(**kwargs)
+        expected = table_configuration.get_rows(submission, 3, **kwargs)
+        rows = extractor.get_rows(submission, 3)
+        self.assertEqual(
+            [(row.data, row.hyperlink_column_indices, row.skip_excel_formatting) for row in rows],
+            [(row.data, row.hyperlink_column_indices, row.skip_excel_formatting) for row in expected],
+        )
+        return [row.data for row in rows]
+
+    def _column(self, *names, **kwargs):
+        column_class = kwargs.pop('column_class', ExportColumn)
+        item_class = kwargs.pop('item_class', ScalarItem)
+        item_kwargs = {'options': kwargs.pop('options')} if 'options' in kwargs else {}
+        return column_class(
+            item=item_class(
+                path=[PathNode(name=name, is_repeat=name.startswith('repeat')) for name in names],
+                transform=kwargs.pop('transform', None),
+                **item_kwargs
+            ),
+            selected=True,
+            **kwargs
+        )
+
+    def test_same_rows_as_get_rows(self):
+        table_configuration = TableConfiguration(
+            path=[PathNode(name='form'), PathNode(name='repeat1', is_repeat=True)],
+            columns=[
+                RowNumberColumn(selected=True),
+                self._column('form', 'repeat1', 'group', 'q1'),
+                self._column('form', 'repeat1', 'group', 'q2', deid_transform=DEID_ID_TRANSFORM),
+                self._column('form', 'repeat1', 'group', 'missing'),
+                self._column('form', 'repeat1', 'q1', 'not_a_dict'),
+                self._column('form', 'repeat1', 'text'),
+                self._column('form', 'repeat1', 'doc_type', transform=DOC_TYPE_TRANSFORM),
+                self._column(
+                    'form', 'repeat1', 'choice',
+                    column_class=SplitExportColumn,
+                    item_class=MultipleChoiceItem,
+                    options=[Option(value='a'), Option(value='b')],
+                ),
+                ExportColumn(item=ScalarItem(path=[PathNode(name='form'), PathNode(name='q')])),
+            ]
+        )
+        submission = {
+            'domain': 'my-domain',
+            '_id': '1234',
+            'form': {
+                'repeat1': [
+                    {
+                        'group': {'q1': 'foo', 'q2': 'bar'},
+                        'q1': 'baz',
+                        'text': {'#text': 'value', 'id': '1'},
+                        'doc_type': 'XFormInstance',
+                        'choice': 'a c',
+                    },
+                    {'group': 'not a group', 'text': {'id': '2'}},
+                ],
+            },
+        }
+        for split_columns in [True, False]:
+            rows = self._assert_same_rows(
+                table_configuration, submission, split_columns=split_columns, transform_dates=True)
+        self.assertEqual(rows[0][:3], ['3.0', 3, 0])
+        self.assertEqual(rows[0][3], 'foo')
+
+    def test_single_repeat_and_empty_group(self):
+        table_configuration = TableConfiguration(
+            path=[PathNode(name='form'), PathNode(name='group'), PathNode(name='repeat1', is_repeat=True)],
+            columns=[self._column('form', 'group', 'repeat1', 'q1')],
+        )
+        self.assertEqual(self._assert_same_rows(table_configuration, {
+            'domain': 'my-domain',
+            '_id': '1234',
+            'form': {'group': {'repeat1': {'q1': 'foo'}}},
+        }), [['foo']])
+        self.assertEqual(self._assert_same_rows(table_configuration, {
+            'domain': 'my-domain',
+            '_id': '1234',
+            'form': {'group': ''},
+        }), [])
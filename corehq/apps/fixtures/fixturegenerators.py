@@ -1,23 +1,40 @@
+import hashlib
+import json
 from collections import defaultdict
 from functools import partial
+from io import BytesIO
 from operator import attrgetter
 from xml.etree import cElementTree as ElementTree
 
+from django.core.cache import cache
+
 from casexml.apps.phone.fixtures import FixtureProvider
 from casexml.apps.phone.utils import (
     GLOBAL_USER_ID,
     get_or_cache_global_fixture,
+    write_fixture_items_to_io,
 )
 from corehq.apps.fixtures.exceptions import FixtureTypeCheckError
 from corehq.apps.fixtures.models import FIXTURE_BUCKET, LookupTable, LookupTableRow
 from corehq.apps.products.fixtures import product_fixture_generator_json
 from corehq.apps.programs.fixtures import program_fixture_generator_json
+from corehq.blobs import CODES, NotFound, get_blob_db
+from corehq.toggles import CACHED_LOOKUP_TABLE_FIXTURES
 from corehq.util.metrics import metrics_histogram
 from corehq.util.xml_utils import serialize
-from .utils import clean_fixture_field_name, get_index_schema_node
+from .utils import (
+    clean_fixture_field_name,
+    get_index_schema_node,
+    get_lookup_table_version,
+)
 
 LOOKUP_TABLE_FIXTURE = 'lookup_table_fixture'
 REPORT_FIXTURE = 'report_fixture'
+# Must not share a prefix with the FIXTURE_BUCKET key of the domain, which
+# is a file in FilesystemBlobDB
+TABLE_FIXTURE_BUCKET = 'lookup-table-fixtures'
+TABLE_FIXTURE_TIMEOUT = 30 * 24 * 60  # minutes
+USER_FIXTURES_TIMEOUT = 24 * 60 * 60  # seconds
 
 
 def item_lists_by_domain(domain, namespace_ids=False):
@@ -120,7 +137,8 @@ class ItemListsProvider(FixtureProvider):
             global_items = self.get_global_items(global_types, restore_state)
             items.extend(global_items)
         if user_types:
-            user_items, user_items_count = self.get_user_items_and_count(user_types, restore_user)
+            user_items, user_items_count = self.get_user_items_and_count(
+                user_types, restore_user, restore_state.overwrite_cache)
             items.extend(user_items)
 
         metrics_histogram(
@@ -146,25 +164,87 @@ class ItemListsProvider(FixtureProvider):
                                            restore_state.overwrite_cache)
 
     def _get_global_items(self, global_types, domain):
+        if CACHED_LOOKUP_TABLE_FIXTURES.enabled(domain):
+            return [
+                self._get_cached_table_fixture(data_type)
+                for data_type in sorted(global_types.values(), key=attrgetter('tag'))
+            ]
+
         def get_items_by_type(data_type):
             return LookupTableRow.objects.iter_rows(domain, table_id=data_type.id)
 
         return self._get_fixtures(global_types, get_items_by_type, GLOBAL_USER_ID)
 
-    def get_user_items_and_count(self, user_types, restore_user):
-        user_items_count = 0
-        items_by_type = defaultdict(list)
-        for item in restore_user.get_fixture_data_items():
-            data_type = user_types.get(item.table_id)
-            if data_type:
-                items_by_type[data_type].append(item)
-                user_items_count += 1
+    def _get_cached_table_fixture(self, data_type):
+        """Get the fixture of a global lookup table as bytes
+
+        It is rendered once for each version of the table.
+        """
+        version = get_lookup_table_version(data_type.id)
+        key = f'{TABLE_FIXTURE_BUCKET}/{data_type.domain}/{data_type.id.hex}/{version}'
+        db = get_blob_db()
+        try:
+            return db.get(key=key, type_code=CODES.fixture).read()
+        except NotFound:
+            pass
+
+        def get_items_by_type(data_type):
+            return LookupTableRow.objects.iter_rows(data_type.domain, table_id=data_type.id)
+
+        fixtures = self._get_fixtures({data_type.id: data_type}, get_items_by_type, GLOBAL_USER_ID)
+        data = write_fixture_items_to_io(fixtures).read()
+        db.put(
+            BytesIO(data),
+            domain=data_type.domain,
+            parent_id=data_type.domain,
+            type_code=CODES.fixture,
+            key=key,
+            name=data_type.tag,
+            timeout=TABLE_FIXTURE_TIMEOUT,
+        )
+        return data
+
+    def get_user_items_and_count(self, user_types, restore_user, overwrite_cache=False):
+        if CACHED_LOOKUP_TABLE_FIXTURES.enabled(restore_user.domain):
+            return self._get_cached_user_items_and_count(user_types, restore_user, overwrite_cache)
+        items_by_type, user_items_count = _group_items_by_type(
+            user_types, restore_user.get_fixture_data_items())
 
         def get_items_by_type(data_type):
             return items_by_type.get(data_type, [])
 
         return self._get_fixtures(user_types, get_items_by_type, restore_user.user_id), user_items_count
 
+    def _get_cached_user_items_and_count(self, user_types, restore_user, overwrite_cache):
+        """Get the fixtures of the rows owned by the user as bytes
+
+        Users whose rows have the same owners get the same rows, so the
+        fixtures are cached by a hash of the owners and of the versions
+        of the tables.
+        """
+        owners = restore_user.get_fixture_data_owners()
+        versions = sorted(
+            (data_type.id.hex, get_lookup_table_version(data_type.id))
+            for data_type in user_types.values()
+        )
+        owners_hash = hashlib.sha1(json.dumps([owners, versions]).encode('utf-8')).hexdigest()
+        key = f'lookup-table-user-fixtures-{restore_user.domain}-{owners_hash}'
+        cached = None if overwrite_cache else cache.get(key)
+        if cached is None:
+            items_by_type, user_items_count = _group_items_by_type(
+                user_types, LookupTableRow.objects.iter_by_owners(restore_user.domain, owners))
+
+            def get_items_by_type(data_type):
+                return items_by_type.get(data_type, [])
+
+            fixtures = self._get_fixtures(user_types, get_items_by_type, GLOBAL_USER_ID)
+            cached = (write_fixture_items_to_io(fixtures).read(), user_items_count)
+            cache.set(key, cached, USER_FIXTURES_TIMEOUT)
+
+        data, user_items_count = cached
+        data = data.replace(GLOBAL_USER_ID.encode('utf-8'), restore_user.user_id.encode('utf-8'))
+        return [data], user_items_count
+
     def _get_fixtures(self, data_types, get_items_by_type, user_id):
         fixtures = []
         for data_type in sorted(data_types.values(), key=attrgetter('tag')):
@@ -223,4 +303,15 @@ class ItemListsProvider(FixtureProvider):
         return xData
 
 
+def _group_items_by_type(data_types, items):
+    count = 0
+    items_by_type = defaultdict(list)
+    for item in items:
+        data_type = data_types.get(item.table_id)
+        if data_type:
+            items_by_type[data_type].append(item)
+            count += 1
+    return items_by_type, count
+
+
 item_lists = ItemListsProvider()
@@ -118,24 +118,25 @@ class LookupTableRowManager(models.Manager):
 
         Returned rows are sorted by table_id and sort_key.
         """
-        def make_conditions(owner_type, ids):
-            return [models.Q(owner_type=owner_type, owner_id=x) for x in ids]
+        return self.iter_by_owners(user.domain, _get_user_owners(user), **kw)
 
-        group_ids = Group.by_user_id(user.user_id, wrap=False)
-        locaction_ids = user.sql_location.path if user.sql_location else []
+    def iter_by_owners(self, domain, owners, **kw):
+        """Get rows owned by any of the given owners
+
+        :param owners: List of `(owner_type, owner_id)` pairs.
+        Returned rows are sorted by table_id and sort_key.
+        """
+        if not owners:
+            return []
         where = models.Q(
             id__in=models.Subquery(
                 LookupTableRowOwner.objects.filter(
-                    reduce(models.Q.__or__, chain(
-                        make_conditions(OwnerType.User, [user.user_id]),
-                        make_conditions(OwnerType.Group, group_ids),
-                        make_conditions(OwnerType.Location, locaction_ids),
-                    )),
-                    domain=user.domain,
+                    _owners_condition(owners),
+                    domain=domain,
                 ).values("row_id")
             ),
         )
-        return self._iter_sorted(user.domain, where, **kw)
+        return self._iter_sorted(domain, where, **kw)
 
     def _iter_sorted(self, domain, where, batch_size=1000):
         # Depends on ["domain", "table_id", "sort_key", "id"] index for
@@ -272,12 +273,49 @@ class OwnerType(models.IntegerChoices):
         return getattr(cls, value.title())
 
 
+class LookupTableRowOwnerManager(models.Manager):
+
+    def get_owners_of_user_rows(self, user):
+        """Get the owners of rows that the user gets
+
+        Of the user, their groups and their locations, these are the
+        owners that own at least one row. Users with the same owners get
+        the same rows.
+
+        :returns: Sorted list of `(owner_type, owner_id)` pairs.
+        """
+        return sorted(set(
+            self.filter(_owners_condition(_get_user_owners(user)), domain=user.domain)
+            .values_list("owner_type", "owner_id")
+            .distinct()
+        ))
+
+
+def _get_user_owners(user):
+    group_ids = Group.by_user_id(user.user_id, wrap=False)
+    locaction_ids = user.sql_location.path if user.sql_location else []
+    return list(chain(
+        [(OwnerType.User, user.user_id)],
+        ((OwnerType.Group, x) for x in group_ids),
+        ((OwnerType.Location, x) for x in locaction_ids),
+    ))
+
+
+def _owners_condition(owners):
+    return reduce(models.Q.__or__, (
+        models.Q(owner_type=owner_type, owner_id=owner_id)
+        for owner_type, owner_id in owners
+    ))
+
+
 class LookupTableRowOwner(models.Model):
     domain = CharIdField(max_length=126, default=None)
     owner_type = models.PositiveSmallIntegerField(choices=OwnerType.choices)
     owner_id = CharIdField(max_length=126, default=None)
     row = models.ForeignKey(LookupTableRow, on_delete=DB_CASCADE, db_constraint=False)
 
+    objects = LookupTableRowOwnerManager()
+
     class Meta:
         app_label = 'fixtures'
         indexes = [
@@ -251,7 +251,7 @@ class LookupTableItemResource(HqBaseResource):
         except LookupTableRow.DoesNotExist:
             raise NotFound('Lookup table item not found')
         row.delete()
-        clear_fixture_cache(row.domain)
+        clear_fixture_cache(row.domain, [row.table_id])
         return ImmediateHttpResponse(response=HttpAccepted())
 
     def obj_create(self, bundle, request=None, **kwargs):
@@ -271,7 +271,7 @@ class LookupTableItemResource(HqBaseResource):
         try:
             bundle.obj.save()
         finally:
-            clear_fixture_cache(kwargs['domain'])
+            clear_fixture_cache(kwargs['domain'], [data_type_id])
         return bundle
 
     def obj_update(self, bundle, **kwargs):
@@ -286,12 +286,13 @@ class LookupTableItemResource(HqBaseResource):
         if bundle.obj.domain != kwargs['domain']:
             raise NotFound('Lookup table item not found')
 
+        old_table_id = bundle.obj.table_id
         bundle = self.full_hydrate(bundle)
         if 'fields' in bundle.data or 'item_attributes' in bundle.data:
             try:
                 bundle.obj.save()
             finally:
-                clear_fixture_cache(bundle.obj.domain)
+                clear_fixture_cache(bundle.obj.domain, {old_table_id, bundle.obj.table_id})
 
         return bundle
 
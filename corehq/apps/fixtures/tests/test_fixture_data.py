@@ -5,6 +5,7 @@ from django.test import TestCase
 from casexml.apps.case.tests.util import check_xml_line_by_line
 from casexml.apps.phone.tests.utils import \
     call_fixture_generator as call_fixture_generator_raw
+from casexml.apps.phone.utils import get_cached_items_with_count
 
 from corehq.apps.fixtures import fixturegenerators
 from corehq.apps.fixtures.models import (
@@ -16,8 +17,10 @@ from corehq.apps.fixtures.models import (
     OwnerType,
     TypeField,
 )
+from corehq.apps.fixtures.utils import clear_fixture_cache
 from corehq.apps.users.models import CommCareUser
 from corehq.blobs import get_blob_db
+from corehq.util.test_utils import flag_enabled
 
 
 def call_fixture_generator(user):
@@ -251,6 +254,44 @@ class FixtureDataTest(TestCase):
         fixtures = call_fixture_generator(sammy)
         self.assertEqual({item.attrib['user_id'] for item in fixtures}, {sammy.user_id})
 
+    @flag_enabled('CACHED_LOOKUP_TABLE_FIXTURES')
+    def test_cached_lookup_table_fixtures(self):
+        def get_items(restore_user):
+            fixtures = []
+            for fixture in call_fixture_generator_raw(fixturegenerators.item_lists, restore_user):
+                data, num = get_cached_items_with_count(fixture)
+                elements = list(ElementTree.fromstring(b'<f>' + data + b'</f>'))
+                self.assertEqual(len(elements), num)
+                fixtures.extend(elements)
+            self.assertEqual({f.attrib['user_id'] for f in fixtures}, {restore_user.user_id})
+            return {
+                f.attrib['id']: [''.join(item.itertext()) for item in f[0]]
+                for f in fixtures if f.tag == 'fixture'
+            }
+
+        sandwich = self.make_data_type("sandwich", is_global=True)
+        soup = self.make_data_type("soup", is_global=True)
+        sandwich_item = self.make_data_item(sandwich, "7.39")
+        self.make_data_item(soup, "4.50")
+        self.addCleanup(clear_fixture_cache, self.domain)
+        frank = self.user.to_ota_restore_user(self.domain)
+        sammy_ = CommCareUser.create(self.domain, 'sammy', '***', None, None)
+        self.addCleanup(sammy_.delete, self.domain, deleted_by=None)
+        sammy = sammy_.to_ota_restore_user(self.domain)
+        expected = {'item-list:sandwich-index': ['7.39'], 'item-list:soup-index': ['4.50']}
+
+        district = ['Delhi_stateDelhi_in_HINDelhi_in_ENGDelhi_id']
+        self.assertEqual(get_items(frank), {**expected, 'item-list:district': district})
+        self.assertTrue(get_blob_db().exists(key=FIXTURE_BUCKET + '/' + self.domain))
+        self.assertEqual(get_items(sammy), {**expected, 'item-list:district': []})
+
+        sandwich_item.fields = {"cost": [Field(value="8.00")]}
+        sandwich_item.save()
+        clear_fixture_cache(self.domain, [sandwich.id])
+        expected['item-list:sandwich-index'] = ['8.00']
+        self.assertEqual(get_items(sammy), {**expected, 'item-list:district': []})
+        self.assertEqual(get_items(frank), {**expected, 'item-list:district': district})
+
     def make_data_type(self, name, is_global):
         data_type = LookupTable(
             domain=self.domain,
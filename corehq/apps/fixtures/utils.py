@@ -1,9 +1,13 @@
 import re
+from uuid import UUID, uuid4
 from xml.etree import cElementTree as ElementTree
 
+from django.core.cache import cache
+
 from corehq.blobs import get_blob_db
 
 BAD_SLUG_PATTERN = r"([/\\<>\s])"
+LOOKUP_TABLE_VERSION_TIMEOUT = 7 * 24 * 60 * 60
 
 
 def clean_fixture_field_name(field_name):
@@ -54,6 +58,32 @@ def get_index_schema_node(fixture_id, attrs_to_index):
     return node
 
 
-def clear_fixture_cache(domain):
-    from corehq.apps.fixtures.models import FIXTURE_BUCKET
+def clear_fixture_cache(domain, table_ids=None):
+    """Clear the cached global fixture of the domain, and change the
+    versions of the given lookup tables (all tables of the domain by
+    default) so that their cached fixtures are not used again.
+    """
+    from corehq.apps.fixtures.models import FIXTURE_BUCKET, LookupTable
+    if table_ids is None:
+        table_ids = LookupTable.objects.by_domain(domain).values_list("id", flat=True)
+    cache.delete_many([_lookup_table_version_key(table_id) for table_id in table_ids])
     get_blob_db().delete(key=FIXTURE_BUCKET + '/' + domain)
+
+
+def get_lookup_table_version(table_id):
+    """Get the version of a lookup table's rows and definition
+
+    Versions are random, so a version that is evicted from the cache is
+    replaced by one that no cached fixture was made with.
+    """
+    key = _lookup_table_version_key(table_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid4().hex
+        if not cache.add(key, version, LOOKUP_TABLE_VERSION_TIMEOUT):
+            version = cache.get(key, version)
+    return version
+
+
+def _lookup_table_version_key(table_id):
+    return 'lookup-table-version-{}'.format(UUID(str(table_id)).hex)
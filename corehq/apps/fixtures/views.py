@@ -103,7 +103,7 @@ def update_tables(request, domain, data_type_id=None):
 
         elif request.method == 'DELETE':
             data_type.delete()
-            clear_fixture_cache(domain)
+            clear_fixture_cache(domain, [data_type.id])
             return json_response({})
         elif not request.method == 'PUT':
             return HttpResponseBadRequest()
@@ -152,7 +152,7 @@ def update_tables(request, domain, data_type_id=None):
             else:
                 data_type = _create_types(
                     fields_patches, domain, data_tag, is_global, description)
-        clear_fixture_cache(domain)
+        clear_fixture_cache(domain, [data_type.id])
         return json_response(table_json(data_type))
 
 
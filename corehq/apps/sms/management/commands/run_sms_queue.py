@@ -1,13 +1,16 @@
+from collections import defaultdict
 from time import sleep
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
 
+from dimagi.utils.chunked import chunked
 from dimagi.utils.couch import get_redis_lock
 from dimagi.utils.logging import notify_exception
 
 from corehq.apps.domain_migration_flags.api import any_migrations_in_progress
-from corehq.apps.sms.models import QueuedSMS
-from corehq.apps.sms.tasks import send_to_sms_queue
+from corehq.apps.sms.models import OUTGOING, QueuedSMS
+from corehq.apps.sms.tasks import send_batch_to_sms_queue, send_to_sms_queue
 from corehq.sql_db.util import handle_connection_failure
 
 
@@ -39,17 +42,36 @@ class SMSEnqueuingOperation(BaseCommand):
 
     @handle_connection_failure()
     def create_tasks(self):
+        batches = defaultdict(list)
         for queued_sms in QueuedSMS.get_queued_sms():
             if queued_sms.domain and skip_domain(queued_sms.domain):
                 continue
 
-            self.enqueue(queued_sms)
+            if settings.SMS_QUEUE_BATCH_SIZE and queued_sms.direction == OUTGOING:
+                batches[(queued_sms.domain, queued_sms.backend_id)].append(queued_sms)
+            else:
+                self.enqueue(queued_sms)
+
+        for batch in batches.values():
+            self.enqueue_batch(batch)
 
     def enqueue(self, queued_sms):
         enqueue_lock = self.get_enqueue_lock(queued_sms)
         if enqueue_lock.acquire(blocking=False):
             send_to_sms_queue(queued_sms)
 
+    def enqueue_batch(self, queued_sms_list):
+        """
+        Spawns one task for each SMS_QUEUE_BATCH_SIZE messages of the
+        same domain and backend
+        """
+        queued_sms_list = [
+            queued_sms for queued_sms in queued_sms_list
+            if self.get_enqueue_lock(queued_sms).acquire(blocking=False)
+        ]
+        for chunk in chunked(queued_sms_list, settings.SMS_QUEUE_BATCH_SIZE):
+            send_batch_to_sms_queue(chunk)
+
     def handle(self, **options):
         while True:
             try:
@@ -1,5 +1,6 @@
 import hashlib
 import math
+from collections import defaultdict
 from datetime import datetime, timedelta
 
 from django.conf import settings
@@ -153,29 +154,73 @@ def handle_domain_specific_delays(msg, domain_object, utcnow):
 
     Returns True if a delay was made, False if not.
     """
-    domain_now = ServerTime(utcnow).user_time(domain_object.get_default_timezone()).done()
+    domain_now = get_domain_now(domain_object, utcnow)
 
+    if not within_restricted_sms_times(domain_object, domain_now):
+        delay_processing(msg, settings.SMS_QUEUE_DOMAIN_RESTRICTED_RETRY_INTERVAL)
+        return True
+
+    if in_sms_conversation(msg, domain_object, domain_now, utcnow):
+        delay_processing(msg, 1)
+        return True
+
+    return False
+
+
+def get_domain_now(domain_object, utcnow):
+    return ServerTime(utcnow).user_time(domain_object.get_default_timezone()).done()
+
+
+def within_restricted_sms_times(domain_object, domain_now):
+    """
+    Returns False if the domain restricts sending SMS to certain days and
+    times, and domain_now is not within them.
+    """
     if len(domain_object.restricted_sms_times) > 0:
-        if not time_within_windows(domain_now, domain_object.restricted_sms_times):
-            delay_processing(msg, settings.SMS_QUEUE_DOMAIN_RESTRICTED_RETRY_INTERVAL)
-            return True
+        return time_within_windows(domain_now, domain_object.restricted_sms_times)
+    return True
+
 
+def in_sms_conversation(msg, domain_object, domain_now, utcnow):
+    """
+    Returns True if the recipient of msg sent an inbound message recently,
+    during the domain's SMS conversation times.
+    """
     if msg.chat_user_id is None and len(domain_object.sms_conversation_times) > 0:
         if time_within_windows(domain_now, domain_object.sms_conversation_times):
             sms_conversation_length = domain_object.sms_conversation_length
             conversation_start_timestamp = utcnow - timedelta(minutes=sms_conversation_length)
-            if SMS.inbound_entry_exists(
+            return SMS.inbound_entry_exists(
                 msg.couch_recipient_doc_type,
                 msg.couch_recipient,
                 conversation_start_timestamp,
                 to_timestamp=utcnow
-            ):
-                delay_processing(msg, 1)
-                return True
-
+            )
     return False
 
 
+def is_ready_to_process(msg, utcnow):
+    # We check datetime_to_process against utcnow plus a small amount
+    # of time because timestamps can differ between machines which
+    # can cause us to miss sending the message the first time and
+    # result in an unnecessary delay.
+    return (
+        isinstance(msg.processed, bool)
+        and not msg.processed
+        and not msg.error
+        and msg.datetime_to_process < (utcnow + timedelta(seconds=10))
+    )
+
+
+def recipient_is_inactive(msg):
+    return bool(
+        msg.domain
+        and msg.couch_recipient_doc_type
+        and msg.couch_recipient
+        and not is_contact_active(msg.domain, msg.couch_recipient_doc_type, msg.couch_recipient)
+    )
+
+
 def message_is_stale(msg, utcnow):
     oldest_allowable_datetime = \
         utcnow - timedelta(hours=settings.SMS_QUEUE_STALE_MESSAGE_DURATION)
@@ -222,13 +267,16 @@ def passes_trial_check(msg):
     return True
 
 
-def handle_outgoing(msg):
+def handle_outgoing(msg, backend=None):
     """
     Should return a requeue flag, so if it returns True, the message will be
     requeued and processed again immediately, and if it returns False, it will
     not be queued again.
+
+    backend - the backend to send msg with; if None, msg.outbound_backend is used
     """
-    backend = msg.outbound_backend
+    if backend is None:
+        backend = msg.outbound_backend
     sms_rate_limit = backend.get_sms_rate_limit()
     use_rate_limit = sms_rate_limit is not None
     use_load_balancing = isinstance(backend, PhoneLoadBalancingMixin)
@@ -307,18 +355,18 @@ class OutboundDailyCounter(object):
         # doesn't exist.
         self.client = get_redis_client().client.get_client()
 
-    def increment(self):
+    def increment(self, amount=1):
         # If the key doesn't exist, redis will set it to 0 and then increment.
-        value = self.client.incr(self.key)
+        value = self.client.incr(self.key, amount)
 
         # If it's the first time we're calling incr, set the key's expiration
-        if value == 1:
+        if value == amount:
             self.client.expire(self.key, 24 * 60 * 60)
 
         return value
 
-    def decrement(self):
-        return self.client.decr(self.key)
+    def decrement(self, amount=1):
+        return self.client.decr(self.key, amount)
 
     @property
     def current_usage(self):
@@ -344,22 +392,45 @@ class OutboundDailyCounter(object):
         value = self.increment()
 
         if value > self.daily_limit:
-            # Delay processing by an hour so that in case the
-            # limit gets increased within the same day, we start
-            # processing the backlog right away.
             self.decrement()
-            delay_processing(queued_sms, 60)
-            domain = self.domain_object.name if self.domain_object else ''
-            # Log the fact that we reached this limit and send alert on first breach
-            # via Django Signals if needed
-            DailyOutboundSMSLimitReached.create_for_domain_and_date(
-                domain,
-                self.date
-            )
+            self._delay_over_limit([queued_sms])
             return False
 
         return True
 
+    def get_sendable_outbound_sms(self, queued_sms_list):
+        """
+        Counts all of queued_sms_list against the daily limit at once, and
+        returns the messages that are within it. The rest are delayed like
+        the messages that can_send_outbound_sms() rejects.
+        """
+        if not queued_sms_list:
+            return []
+
+        value = self.increment(len(queued_sms_list))
+        over_limit = max(0, min(len(queued_sms_list), value - self.daily_limit))
+        if not over_limit:
+            return queued_sms_list
+
+        self.decrement(over_limit)
+        sendable = len(queued_sms_list) - over_limit
+        self._delay_over_limit(queued_sms_list[sendable:])
+        return queued_sms_list[:sendable]
+
+    def _delay_over_limit(self, queued_sms_list):
+        # Delay processing by an hour so that in case the
+        # limit gets increased within the same day, we start
+        # processing the backlog right away.
+        for queued_sms in queued_sms_list:
+            delay_processing(queued_sms, 60)
+        domain = self.domain_object.name if self.domain_object else ''
+        # Log the fact that we reached this limit and send alert on first breach
+        # via Django Signals if needed
+        DailyOutboundSMSLimitReached.create_for_domain_and_date(
+            domain,
+            self.date
+        )
+
 
 @no_result_task(queue="sms_queue", acks_late=True)
 def process_sms(queued_sms_pk):
@@ -402,28 +473,14 @@ def process_sms(queued_sms_pk):
         # Process inbound SMS from a single contact one at a time
         recipient_block = msg.direction == INCOMING
 
-        # We check datetime_to_process against utcnow plus a small amount
-        # of time because timestamps can differ between machines which
-        # can cause us to miss sending the message the first time and
-        # result in an unnecessary delay.
-        if (
-            isinstance(msg.processed, bool) and
-            not msg.processed and
-            not msg.error and
-            msg.datetime_to_process < (utcnow + timedelta(seconds=10))
-        ):
+        if is_ready_to_process(msg, utcnow):
             if recipient_block:
                 recipient_lock = get_lock(
                     "sms-queue-recipient-phone-%s" % msg.phone_number)
                 recipient_lock.acquire(blocking=True)
 
             if msg.direction == OUTGOING:
-                if (
-                    msg.domain and
-                    msg.couch_recipient_doc_type and
-                    msg.couch_recipient and
-                    not is_contact_active(msg.domain, msg.couch_recipient_doc_type, msg.couch_recipient)
-                ):
+                if recipient_is_inactive(msg):
                     msg.set_system_error(SMS.ERROR_CONTACT_IS_INACTIVE)
                     remove_from_queue(msg)
                 else:
@@ -454,6 +511,98 @@ def send_to_sms_queue(queued_sms):
     process_sms.apply_async([queued_sms.pk])
 
 
+@no_result_task(queue="sms_queue", acks_late=True)
+def process_outgoing_sms_batch(queued_sms_pks):
+    """
+    queued_sms_pks - pks of outgoing QueuedSMS entries, usually of the
+      same domain and backend
+
+    Processes the messages like process_sms does, but loads them in one
+    query, and loads the domain, checks the domain's restricted times and
+    counts the messages against the daily limit once per domain, and
+    loads each backend once.
+    """
+    utcnow = get_utcnow()
+    message_locks = {}
+    for queued_sms_pk in queued_sms_pks:
+        message_lock = get_lock("sms-queue-processing-%s" % queued_sms_pk)
+        if message_lock.acquire(blocking=False):
+            message_locks[queued_sms_pk] = message_lock
+
+    requeue = []
+    try:
+        messages_by_domain = defaultdict(list)
+        for msg in QueuedSMS.objects.filter(pk__in=list(message_locks)).order_by('datetime_to_process', 'pk'):
+            if msg.direction != OUTGOING:
+                requeue.append(msg)
+            else:
+                messages_by_domain[msg.domain].append(msg)
+
+        for domain, messages in messages_by_domain.items():
+            requeue.extend(_process_outgoing_sms_for_domain(domain, messages, utcnow))
+    finally:
+        for message_lock in message_locks.values():
+            release_lock(message_lock, True)
+
+    for msg in requeue:
+        send_to_sms_queue(msg)
+
+
+def _process_outgoing_sms_for_domain(domain, messages, utcnow):
+    """
+    Returns the messages to requeue
+    """
+    messages_to_send = []
+    for msg in messages:
+        if message_is_stale(msg, utcnow):
+            msg.set_system_error(SMS.ERROR_MESSAGE_IS_STALE)
+            remove_from_queue(msg)
+        elif is_ready_to_process(msg, utcnow):
+            messages_to_send.append(msg)
+
+    domain_object = Domain.get_by_name(domain) if domain and messages_to_send else None
+    if domain_object:
+        domain_now = get_domain_now(domain_object, utcnow)
+        if not within_restricted_sms_times(domain_object, domain_now):
+            for msg in messages_to_send:
+                delay_processing(msg, settings.SMS_QUEUE_DOMAIN_RESTRICTED_RETRY_INTERVAL)
+            return []
+
+        in_conversation = [msg for msg in messages_to_send
+                           if in_sms_conversation(msg, domain_object, domain_now, utcnow)]
+        for msg in in_conversation:
+            delay_processing(msg, 1)
+        messages_to_send = [msg for msg in messages_to_send if msg not in in_conversation]
+
+    outbound_counter = OutboundDailyCounter(domain_object)
+    messages_to_send = outbound_counter.get_sendable_outbound_sms(messages_to_send)
+
+    backends = {}
+    requeue = []
+    for msg in messages_to_send:
+        if recipient_is_inactive(msg):
+            msg.set_system_error(SMS.ERROR_CONTACT_IS_INACTIVE)
+            remove_from_queue(msg)
+            continue
+
+        if msg.backend_id:
+            if msg.backend_id not in backends:
+                backends[msg.backend_id] = msg.outbound_backend
+            backend = backends[msg.backend_id]
+        else:
+            # the default backend depends on the phone number
+            backend = None
+
+        if handle_outgoing(msg, backend=backend):
+            outbound_counter.decrement()
+            requeue.append(msg)
+    return requeue
+
+
+def send_batch_to_sms_queue(queued_sms_list):
+    process_outgoing_sms_batch.apply_async([[queued_sms.pk for queued_sms in queued_sms_list]])
+
+
 @no_result_task(queue='background_queue', default_retry_delay=60 * 60,
                 max_retries=23, bind=True)
 def store_billable(self, msg_couch_id):
@@ -14,7 +14,9 @@ from corehq.apps.sms.api import incoming, send_sms
 from corehq.apps.sms.models import SMS, QueuedSMS
 from corehq.apps.sms.tasks import (
     MAX_TRIAL_SMS,
+    OutboundDailyCounter,
     passes_trial_check,
+    process_outgoing_sms_batch,
     process_sms, get_sms_from_queued_sms, _get_sms_fields_to_copy,
 )
 from corehq.apps.sms.tests.util import (
@@ -269,6 +271,42 @@ class QueueingTestCase(BaseSMSTest):
         self.assertEqual(process_sms_delay_mock.call_count, 0)
         self.assertBillableDoesNotExist(couch_id)
 
+    def test_outgoing_batch(self, process_sms_delay_mock, enqueue_directly_mock):
+        send_sms(self.domain, None, '+999123', 'test outgoing 1')
+        send_sms(self.domain, None, '+999123', 'test outgoing 2')
+        self.assertEqual(self.queued_sms_count, 2)
+        couch_ids = set(QueuedSMS.objects.values_list('couch_id', flat=True))
+
+        with patch_successful_send() as send_mock:
+            process_outgoing_sms_batch(list(QueuedSMS.objects.values_list('pk', flat=True)))
+
+        self.assertEqual(send_mock.call_count, 2)
+        self.assertEqual(self.queued_sms_count, 0)
+        self.assertEqual(self.reporting_sms_count, 2)
+        for reporting_sms in SMS.objects.filter(domain=self.domain):
+            self.assertEqual(reporting_sms.processed, True)
+            self.assertEqual(reporting_sms.error, False)
+            self.assertEqual(reporting_sms.backend_id, self.backend.couch_id)
+        for couch_id in couch_ids:
+            self.assertBillableExists(couch_id)
+
+    def test_outgoing_batch_over_daily_limit(self, process_sms_delay_mock, enqueue_directly_mock):
+        counter = OutboundDailyCounter(self.domain_obj)
+        counter.client.delete(counter.key)
+        self.addCleanup(counter.client.delete, counter.key)
+        send_sms(self.domain, None, '+999123', 'test outgoing 1')
+        send_sms(self.domain, None, '+999123', 'test outgoing 2')
+
+        with patch_successful_send() as send_mock, \
+                patch.object(OutboundDailyCounter, 'daily_limit', new=1):
+            process_outgoing_sms_batch(list(QueuedSMS.objects.values_list('pk', flat=True)))
+
+        self.assertEqual(send_mock.call_count, 1)
+        self.assertEqual(self.reporting_sms_count, 1)
+        queued_sms = self.get_queued_sms()
+        self.assertEqual(queued_sms.text, 'test outgoing 2')
+        self.assertEqual(counter.current_usage, 1)
+
     @patch.object(QueuedSMS, 'set_system_error')
     @patch('corehq.apps.sms.tasks.domain_is_on_trial')
     def test_passes_trial_check(self, domain_is_on_trial_patch, set_system_error_patch, delay_patch,
@@ -53,6 +53,10 @@ class StaleRebuildError(TableRebuildError):
     pass
 
 
+class ShardedBuildInProgressError(TableRebuildError):
+    pass
+
+
 class UserReportsFilterError(UserReportsError):
     pass
 
@@ -1,10 +1,12 @@
 import datetime
 import functools
+import hashlib
 import json
 
 from django.utils.translation import gettext as _
 
 from jsonobject.exceptions import BadValueError
+from memoized import memoized
 
 from corehq.apps.userreports.specs import FactoryContext
 from dimagi.utils.parsing import json_format_date, json_format_datetime
@@ -392,7 +394,9 @@ class ExpressionFactory(object):
         if _is_literal(spec):
             return cls.from_spec(_convert_constant_to_expression_spec(spec), factory_context)
         try:
-            return cls.spec_map[spec['type']](spec, factory_context)
+            # get the key before wrapping, which can modify the spec
+            memo_key = _get_memo_key(spec)
+            expression = cls.spec_map[spec['type']](spec, factory_context)
         except KeyError:
             raise BadSpecError(_('Invalid or missing expression type: {} for expression: {}. '
                                  'Valid options are: {}').format(
@@ -405,6 +409,89 @@ class ExpressionFactory(object):
                 json.dumps(spec, indent=2, default=json_handler),
                 str(e),
             ))
+        if memo_key:
+            return MemoizedExpression(expression, memo_key)
+        return expression
+
+
+_BUILTIN_EXPRESSION_TYPES = frozenset(ExpressionFactory.spec_map)
+# expressions that are cheap enough that memoizing them doesn't pay off
+_LEAF_EXPRESSION_TYPES = frozenset(['constant', 'identity', 'jsonpath', 'property_name', 'property_path'])
+# expressions whose value depends on more than the document they are evaluated on
+_CONTEXT_DEPENDENT_TYPES = frozenset(['base_iteration_number', 'iteration_number', 'named', 'utcnow'])
+
+
+class MemoizedExpression(object):
+    """
+    An expression whose value for the root document is memoized on the
+    evaluation context, so that expressions built from the same spec
+    (e.g. in different data sources of a domain) are only evaluated once
+    per document.
+
+    Memoization only happens if the evaluation context was created with
+    ``memoize=True``.
+    """
+
+    def __init__(self, expression, memo_key):
+        self.expression = expression
+        self.memo_key = memo_key
+
+    def __call__(self, item, evaluation_context=None):
+        if (evaluation_context is None
+                or evaluation_context.memo is None
+                or item is not evaluation_context.root_doc):
+            return self.expression(item, evaluation_context)
+        return evaluation_context.get_memo_value(
+            self.memo_key, lambda: self.expression(item, evaluation_context))
+
+    def __getattr__(self, name):
+        if name == 'expression':
+            raise AttributeError(name)
+        return getattr(self.expression, name)
+
+    def __str__(self):
+        return str(self.expression)
+
+
+def _get_memo_key(spec):
+    """
+    :returns: A hash of the spec if the value of expressions built from it
+        depends only on the document they are evaluated on, otherwise None.
+    """
+    if spec['type'] in _LEAF_EXPRESSION_TYPES:
+        return None
+    if not depends_only_on_document(spec):
+        return None
+    try:
+        spec_json = json.dumps(spec, sort_keys=True, default=json_handler)
+    except TypeError:
+        return None
+    return hashlib.md5(spec_json.encode('utf-8')).hexdigest()
+
+
+def depends_only_on_document(spec):
+    """Whether the value of expressions built from ``spec`` depends only on
+    the document they are evaluated on"""
+    return set(iter_spec_types(spec)) <= _get_memoizable_types()
+
+
+def iter_spec_types(spec):
+    if isinstance(spec, dict):
+        for key, value in spec.items():
+            if key == 'type' and isinstance(value, str):
+                yield value
+            else:
+                yield from iter_spec_types(value)
+    elif isinstance(spec, list):
+        for value in spec:
+            yield from iter_spec_types(value)
+
+
+@memoized
+def _get_memoizable_types():
+    from corehq.apps.userreports.filters.factory import FilterFactory
+    filter_types = set(FilterFactory.constructor_map)
+    return (_BUILTIN_EXPRESSION_TYPES | filter_types) - _CONTEXT_DEPENDENT_TYPES
 
 
 def _is_literal(value):
@@ -0,0 +1,165 @@
+"""
+Bulk prefetching of the documents used by ``related_doc`` and
+``get_subcases`` expressions.
+
+Processing a chunk of documents otherwise fetches related documents one
+at a time while evaluating expressions. Instead, the ids that those
+expressions will look up are collected for the whole chunk first, and
+the documents are fetched in bulk into a ``RelatedDocs`` object that is
+shared by the evaluation contexts of the chunk.
+"""
+import json
+from collections import defaultdict, namedtuple
+from copy import deepcopy
+
+from corehq.apps.change_feed.data_sources import get_document_store_for_doc_type
+from corehq.apps.userreports.expressions.factory import (
+    ExpressionFactory,
+    depends_only_on_document,
+    iter_spec_types,
+)
+from corehq.apps.userreports.specs import EvaluationContext
+from corehq.form_processor.models import CommCareCase
+
+RELATED_DOC = 'related_doc'
+SUBCASES = 'get_subcases'
+
+# expressions that look up other documents
+_LOOKUP_TYPES = frozenset([
+    RELATED_DOC,
+    SUBCASES,
+    'get_case_forms',
+    'get_case_sharing_groups',
+    'get_reporting_groups',
+])
+# keys of expression specs that are evaluated on something other than the
+# item the expression itself is evaluated on
+_OTHER_ITEM_KEYS = frozenset(['value_expression', 'map_expression', 'filter_expression', 'sort_expression'])
+
+RelatedDocLookup = namedtuple('RelatedDocLookup', 'type doc_type id_expression')
+
+
+class RelatedDocs(object):
+    """Related documents fetched for a chunk of documents"""
+
+    def __init__(self):
+        self.docs = {}
+        self.subcases = {}
+
+    def has_doc(self, doc_type, doc_id):
+        return (doc_type, doc_id) in self.docs
+
+    def get_doc(self, doc_type, doc_id):
+        """:returns: the document, or None if it does not exist"""
+        return self.docs[(doc_type, doc_id)]
+
+    def has_subcases(self, case_id):
+        return case_id in self.subcases
+
+    def get_subcases(self, case_id):
+        return self.subcases[case_id]
+
+
+def get_related_doc_lookups(config):
+    """
+    Find the ``related_doc`` and ``get_subcases`` expressions of a data
+    source that are evaluated on the root document, and whose id
+    expression can be evaluated without looking up other documents.
+
+    This is a best guess, since whether an expression is evaluated on the
+    root document is only known when it is evaluated. A wrong guess only
+    means that a document is fetched that is not used.
+    """
+    root_specs = [config.configured_filter, list(config.named_expressions.values())]
+    if config.base_item_expression:
+        # indicators are evaluated on the items of the base item expression
+        root_specs.append(config.base_item_expression)
+        item_specs = config.configured_indicators
+    else:
+        root_specs.append(config.configured_indicators)
+        item_specs = []
+
+    lookups = {}
+    for spec in list(_iter_lookup_specs(root_specs, True)) + list(_iter_lookup_specs(item_specs, False)):
+        if spec['type'] == RELATED_DOC:
+            doc_type = spec.get('related_doc_type')
+            id_spec = spec.get('doc_id_expression')
+        else:
+            doc_type = None
+            id_spec = spec.get('case_id_expression')
+        if (spec['type'] == RELATED_DOC and not doc_type) or id_spec is None:
+            continue
+        if set(iter_spec_types(id_spec)) & _LOOKUP_TYPES:
+            continue
+        if not depends_only_on_document(id_spec):
+            continue
+        key = json.dumps([spec['type'], doc_type, id_spec], sort_keys=True, default=str)
+        if key not in lookups:
+            lookups[key] = RelatedDocLookup(
+                spec['type'], doc_type, ExpressionFactory.from_spec(deepcopy(id_spec))
+            )
+    return list(lookups.values())
+
+
+def _iter_lookup_specs(spec, at_root):
+    if isinstance(spec, list):
+        for value in spec:
+            yield from _iter_lookup_specs(value, at_root)
+    elif isinstance(spec, dict):
+        spec_type = spec.get('type')
+        if at_root and spec_type in (RELATED_DOC, SUBCASES):
+            yield spec
+        for key, value in spec.items():
+            if spec_type == 'root_doc' and key == 'expression':
+                yield from _iter_lookup_specs(value, True)
+            else:
+                yield from _iter_lookup_specs(value, at_root and key not in _OTHER_ITEM_KEYS)
+
+
+def prefetch_related_docs(domain, configs, docs):
+    """
+    Fetch the documents that the expressions of ``configs`` will look up
+    when processing ``docs``.
+
+    :returns: a ``RelatedDocs`` object to pass to the evaluation contexts
+        of ``docs``, or None if there is nothing to prefetch.
+    """
+    lookups = [lookup for config in configs for lookup in config.get_related_doc_lookups()]
+    if not lookups:
+        return None
+
+    ids_by_doc_type = defaultdict(set)
+    subcase_ids = set()
+    for doc in docs:
+        eval_context = EvaluationContext(doc)
+        for lookup in lookups:
+            try:
+                doc_id = lookup.id_expression(doc, eval_context)
+            except Exception:
+                # the expression will be evaluated again later, which is
+                # where errors are handled
+                continue
+            if not doc_id or not isinstance(doc_id, str):
+                continue
+            if lookup.type == RELATED_DOC:
+                ids_by_doc_type[lookup.doc_type].add(doc_id)
+            else:
+                subcase_ids.add(doc_id)
+
+    related_docs = RelatedDocs()
+    for doc_type, doc_ids in ids_by_doc_type.items():
+        document_store = get_document_store_for_doc_type(
+            domain, doc_type, load_source="related_doc_expression")
+        fetched = {doc['_id']: doc for doc in document_store.iter_documents(list(doc_ids))}
+        for doc_id in doc_ids:
+            related_docs.docs[(doc_type, doc_id)] = fetched.get(doc_id)
+
+    if subcase_ids:
+        for case_id in subcase_ids:
+            related_docs.subcases[case_id] = []
+        for case in CommCareCase.objects.get_reverse_indexed_cases(domain, list(subcase_ids)):
+            case_json = case.to_json()
+            for case_id in {index.referenced_id for index in case.indices}:
+                if case_id in related_docs.subcases:
+                    related_docs.subcases[case_id].append(case_json)
+    return related_docs
@@ -596,13 +596,19 @@ class RelatedDocExpressionSpec(JsonObject):
     @staticmethod
     @ucr_context_cache(vary_on=('related_doc_type', 'doc_id',))
     def _get_document(related_doc_type, doc_id, evaluation_context):
-        document_store = get_document_store_for_doc_type(
-            evaluation_context.root_doc['domain'], related_doc_type,
-            load_source="related_doc_expression")
-        try:
-            doc = document_store.get_document(doc_id)
-        except DocumentNotFoundError:
-            return None
+        related_docs = evaluation_context.related_docs
+        if related_docs is not None and related_docs.has_doc(related_doc_type, doc_id):
+            doc = related_docs.get_doc(related_doc_type, doc_id)
+            if doc is None:
+                return None
+        else:
+            document_store = get_document_store_for_doc_type(
+                evaluation_context.root_doc['domain'], related_doc_type,
+                load_source="related_doc_expression")
+            try:
+                doc = document_store.get_document(doc_id)
+            except DocumentNotFoundError:
+                return None
         if evaluation_context.root_doc['domain'] != doc.get('domain'):
             return None
         return doc
@@ -904,6 +910,9 @@ class SubcasesExpressionSpec(JsonObject):
 
     @ucr_context_cache(vary_on=('case_id',))
     def _get_subcases(self, case_id, evaluation_context):
+        related_docs = evaluation_context.related_docs
+        if related_docs is not None and related_docs.has_subcases(case_id):
+            return list(related_docs.get_subcases(case_id))
         domain = evaluation_context.root_doc['domain']
         return [c.to_json() for c in CommCareCase.objects.get_reverse_indexed_cases(domain, [case_id])]
 
@@ -0,0 +1,85 @@
+import uuid
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from corehq.apps.userreports.app_manager.helpers import clean_table_name
+from corehq.apps.userreports.models import DataSourceConfiguration
+from corehq.apps.userreports.sql.adapter import (
+    BULK_LOAD_COPY,
+    BULK_LOAD_INSERT,
+    IndicatorSqlAdapter,
+)
+
+
+class Command(BaseCommand):
+    help = "Compare the time taken to save rows to a UCR table with INSERT and with COPY"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--engine-id', default='default')
+        parser.add_argument('--sizes', default='1000,10000,100000',
+                            help='Comma separated numbers of rows to save')
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, engine_id, sizes, repeat, **options):
+        config = _get_benchmark_config(engine_id)
+        sizes = [int(size) for size in sizes.split(',')]
+        print("rows\tmode\tnew (s)\tupdate (s)")
+        for size in sizes:
+            docs = [_get_doc(config.domain, i) for i in range(size)]
+            for bulk_load in [BULK_LOAD_INSERT, BULK_LOAD_COPY]:
+                adapter = IndicatorSqlAdapter(config, bulk_load=bulk_load)
+                rows = [row for doc in docs for row in adapter.get_all_values(doc)]
+                adapter.rebuild_table(source='benchmark_ucr_save_rows', skip_log=True)
+                try:
+                    new = min(_time_save(adapter, rows, clear=True) for i in range(repeat))
+                    update = min(_time_save(adapter, rows, clear=False) for i in range(repeat))
+                finally:
+                    adapter.drop_table(source='benchmark_ucr_save_rows', skip_log=True)
+                print(f"{size}\t{bulk_load}\t{new:.3f}\t{update:.3f}")
+
+
+def _time_save(adapter, rows, clear):
+    if clear:
+        with adapter.session_context() as session:
+            session.execute(adapter.get_table().delete())
+    start = datetime.utcnow()
+    # rows are saved in batches of this size when rebuilding
+    for i in range(0, len(rows), 10000):
+        adapter.save_rows(rows[i:i + 10000])
+    return (datetime.utcnow() - start).total_seconds()
+
+
+def _get_doc(domain, i):
+    return {
+        "_id": uuid.uuid4().hex,
+        "domain": domain,
+        "doc_type": "CommCareCase",
+        "type": "benchmark",
+        "name": f"case {i}",
+        "count": i,
+        "opened_on": datetime.utcnow().isoformat(),
+    }
+
+
+def _get_benchmark_config(engine_id):
+    def indicator(property_name, datatype):
+        return {
+            "type": "expression",
+            "expression": {"type": "property_name", "property_name": property_name},
+            "column_id": property_name,
+            "datatype": datatype,
+        }
+
+    return DataSourceConfiguration(
+        domain='ucr-benchmark',
+        display_name='UCR save rows benchmark',
+        referenced_doc_type='CommCareCase',
+        engine_id=engine_id,
+        table_id=clean_table_name('ucr-benchmark', uuid.uuid4().hex),
+        configured_indicators=[
+            indicator('name', 'string'),
+            indicator('count', 'integer'),
+            indicator('opened_on', 'datetime'),
+        ],
+    )
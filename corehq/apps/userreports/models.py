@@ -620,6 +620,14 @@ class DataSourceConfiguration(CachedCouchDocumentMixin, Document, AbstractUCRDat
             self.save()
             get_indicator_adapter(self).drop_table(initiated_by=initiated_by, source='deactivate-data-source')
 
+    @memoized
+    def get_related_doc_lookups(self):
+        """Returns the related document lookups that can be prefetched for this data source.
+        See ``corehq.apps.userreports.expressions.prefetch``
+        """
+        from corehq.apps.userreports.expressions.prefetch import get_related_doc_lookups
+        return get_related_doc_lookups(self)
+
     def get_case_type_or_xmlns_filter(self):
         """Returns a list of case types or xmlns from the filter of this data source.
 
@@ -6,6 +6,7 @@ from datetime import datetime, timedelta
 
 from django.conf import settings
 
+from corehq import toggles
 from corehq.apps.change_feed.consumer.feed import (
     KafkaChangeFeed,
     KafkaCheckpointEventHandler,
@@ -21,6 +22,7 @@ from corehq.apps.userreports.data_source_providers import (
 from corehq.apps.userreports.exceptions import (
     UserReportsWarning,
 )
+from corehq.apps.userreports.expressions.prefetch import prefetch_related_docs
 from corehq.apps.userreports.models import AsyncIndicator
 from corehq.apps.userreports.pillow_utils import rebuild_sql_tables
 from corehq.apps.userreports.specs import EvaluationContext
@@ -445,13 +447,18 @@ class ConfigurableReportPillowProcessor(BulkPillowProcessor):
         to_update = {change for change in changes_chunk if not change.deleted}
         with self._metrics_timer('extract'):
             retry_changes, docs = bulk_fetch_changes_docs(to_update, domain)
+        related_docs = None
+        if toggles.UCR_PREFETCH_RELATED_DOCS.enabled(domain):
+            with self._metrics_timer('extract_related'):
+                related_docs = self._prefetch_related_docs(domain, adapters, docs)
         change_exceptions = []
 
+        memo_hits = memo_misses = 0
         with self._metrics_timer('single_batch_transform'):
             for doc in docs:
                 change = changes_by_id[doc['_id']]
                 doc_subtype = change.metadata.document_subtype
-                eval_context = EvaluationContext(doc)
+                eval_context = EvaluationContext(doc, memoize=True, related_docs=related_docs)
                 with self._metrics_timer('single_doc_transform'):
                     for adapter in adapters:
                         with self._per_config_metrics_timer('transform', adapter.config._id):
@@ -469,6 +476,9 @@ class ConfigurableReportPillowProcessor(BulkPillowProcessor):
                                 # Delete if the subtype is unknown or
                                 # if the subtype matches our filters, but the full filter no longer applies
                                 to_delete_by_adapter[adapter].append(doc)
+                memo_hits += eval_context.memo_hits
+                memo_misses += eval_context.memo_misses
+        self._record_expression_memo_metrics(memo_hits, memo_misses)
 
         with self._metrics_timer('single_batch_delete'):
             # bulk delete by adapter
@@ -503,6 +513,21 @@ class ConfigurableReportPillowProcessor(BulkPillowProcessor):
 
         return retry_changes, change_exceptions
 
+    def _prefetch_related_docs(self, domain, adapters, docs):
+        try:
+            return prefetch_related_docs(domain, [adapter.config for adapter in adapters], docs)
+        except Exception as e:
+            # expressions will look up their documents one at a time
+            pillow_logging.exception("Error prefetching related docs for UCRs in %s: %s", domain, e)
+            return None
+
+    def _record_expression_memo_metrics(self, hits, misses):
+        # hit rate of expression values shared between data sources
+        if hits:
+            metrics_counter('commcare.ucr.expression_memo.hits', hits)
+        if hits or misses:
+            metrics_counter('commcare.ucr.expression_memo.lookups', hits + misses)
+
     def _metrics_timer(self, step, config_id=None):
         tags = {
             'action': step,
@@ -548,7 +573,7 @@ class ConfigurableReportPillowProcessor(BulkPillowProcessor):
             return
 
         with TimingContext() as timer:
-            eval_context = EvaluationContext(doc)
+            eval_context = EvaluationContext(doc, memoize=True)
             # make copy to avoid modifying list during iteration
             adapters = self.table_manager.get_adapters(domain)
             doc_subtype = change.metadata.document_subtype
@@ -565,6 +590,7 @@ class ConfigurableReportPillowProcessor(BulkPillowProcessor):
 
             if async_tables:
                 AsyncIndicator.update_from_kafka_change(change, async_tables)
+        self._record_expression_memo_metrics(eval_context.memo_hits, eval_context.memo_misses)
 
         self.domain_timing_context.update(**{
             domain: timer.duration
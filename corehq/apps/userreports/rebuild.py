@@ -7,6 +7,8 @@ from alembic.operations import Operations
 
 from dimagi.utils.couch import get_redis_client
 
+from corehq.sql_db.util import get_db_aliases_for_partitioned_query
+
 from .alembic_diffs import (
     DiffTypes,
     get_migration_context,
@@ -27,15 +29,25 @@ def get_redis_key_for_config(config):
 
 
 class DataSourceResumeHelper(object):
+    """
+    Records the (domain, case type or xmlns) iterations of a data source
+    build that have completed, so that an interrupted build can resume.
 
-    def __init__(self, config):
+    Builds that are split by form processor database keep a separate
+    record for each database (``db_alias``).
+    """
+
+    def __init__(self, config, db_alias=None):
         self.config = config
+        self.db_alias = db_alias
         self._client = get_redis_client().client.get_client()
         self._key = get_redis_key_for_config(config)
+        if db_alias:
+            self._key = f"{self._key}:{db_alias}"
 
     def get_completed_iterations(self):
         return [
-            value.decode('utf8').split(':')
+            value.decode('utf8').split(':', 1)
             for value in self._client.lrange(self._key, 0, -1)
         ]
 
@@ -51,6 +63,71 @@ class DataSourceResumeHelper(object):
         return self._client.exists(self._key)
 
 
+class DataSourceShardsHelper(object):
+    """
+    Tracks a data source build that is split into one task per form
+    processor database, each of which records its own progress with a
+    ``DataSourceResumeHelper``.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self._client = get_redis_client().client.get_client()
+        self._key = f"{get_redis_key_for_config(config)}:shards"
+
+    def start(self, db_aliases):
+        with self._client.pipeline() as pipe:
+            pipe.delete(self._key)
+            pipe.sadd(self._key, *db_aliases)
+            pipe.execute()
+
+    def get_pending_shards(self):
+        return sorted(value.decode('utf8') for value in self._client.smembers(self._key))
+
+    def complete_shard(self, db_alias):
+        """
+        :returns: True if this was the last shard to complete. This is
+            only ever True for one caller.
+        """
+        with self._client.pipeline() as pipe:
+            pipe.srem(self._key, db_alias)
+            pipe.scard(self._key)
+            removed, remaining = pipe.execute()
+        return bool(removed) and remaining == 0
+
+    def is_in_progress(self):
+        return bool(self._client.exists(self._key))
+
+    def clear(self):
+        self._client.delete(self._key)
+
+    def get_progress(self):
+        """
+        Combined progress of the shards of the build
+
+        :returns: a dict with the number of completed (domain, case type
+            or xmlns) iterations of each database and of the whole build
+        """
+        iterations = len(self.config.data_domains) * len(self.config.get_case_type_or_xmlns_filter())
+        pending = set(self.get_pending_shards())
+        shards = {}
+        for db_alias in get_db_aliases_for_partitioned_query():
+            if db_alias in pending:
+                completed = len(DataSourceResumeHelper(self.config, db_alias).get_completed_iterations())
+            else:
+                completed = iterations
+            shards[db_alias] = {
+                'completed': completed,
+                'total': iterations,
+                'finished': db_alias not in pending,
+            }
+        return {
+            'shards': shards,
+            'completed': sum(shard['completed'] for shard in shards.values()),
+            'total': iterations * len(shards),
+        }
+
+
 @attr.s
 class MigrateRebuildTables(object):
     migrate = attr.ib()
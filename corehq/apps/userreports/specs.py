@@ -65,12 +65,20 @@ class EvaluationContext(object):
     as the root document and the iteration number.
     """
 
-    def __init__(self, root_doc, iteration=0):
+    def __init__(self, root_doc, iteration=0, memoize=False, related_docs=None):
         self.root_doc = root_doc
         self.iteration = iteration
         self.inserted_timestamp = datetime.utcnow()
         self.cache = {}
         self.iteration_cache = {}
+        # values of expressions evaluated against the root doc, keyed by spec
+        # so that they are shared between data sources (see MemoizedExpression)
+        self.memo = {} if memoize else None
+        self.memo_hits = 0
+        self.memo_misses = 0
+        # documents prefetched for related_doc and get_subcases expressions
+        # (see corehq.apps.userreports.expressions.prefetch)
+        self.related_docs = related_docs
 
     def exists_in_cache(self, key):
         return key in self.cache or key in self.iteration_cache
@@ -90,6 +98,16 @@ class EvaluationContext(object):
     def set_iteration_cache_value(self, key, value):
         self.iteration_cache[key] = value
 
+    def get_memo_value(self, key, get_value):
+        try:
+            value = self.memo[key]
+        except KeyError:
+            self.memo_misses += 1
+            value = self.memo[key] = get_value()
+        else:
+            self.memo_hits += 1
+        return value
+
     def increment_iteration(self):
         self.iteration_cache = {}
         self.iteration += 1
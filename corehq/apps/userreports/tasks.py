@@ -40,13 +40,18 @@ from corehq.apps.userreports.const import (
 )
 from corehq.apps.userreports.exceptions import (
     DataSourceConfigurationNotFoundError,
+    ShardedBuildInProgressError,
 )
+from corehq.apps.userreports.expressions.prefetch import prefetch_related_docs
 from corehq.apps.userreports.models import (
     AsyncIndicator,
     get_report_config,
     id_is_static,
 )
-from corehq.apps.userreports.rebuild import DataSourceResumeHelper
+from corehq.apps.userreports.rebuild import (
+    DataSourceResumeHelper,
+    DataSourceShardsHelper,
+)
 from corehq.apps.userreports.reports.data_source import (
     ConfigurableReportDataSource,
 )
@@ -57,6 +62,7 @@ from corehq.apps.userreports.util import (
     get_ucr_datasource_config_by_id,
 )
 from corehq.elastic import ESError
+from corehq.sql_db.util import get_db_aliases_for_partitioned_query
 from corehq.util.context_managers import notify_someone
 from corehq.util.decorators import serial_task
 from corehq.util.es.elasticsearch import ConnectionTimeout
@@ -73,17 +79,25 @@ from corehq.util.view_utils import reverse
 celery_task_logger = logging.getLogger('celery.task')
 
 
-def _build_indicators(config, document_store, relevant_ids):
+def _build_indicators(config, document_store, relevant_ids, domain):
     adapter = get_indicator_adapter(config, raise_errors=True, load_source='build_indicators')
 
-    for doc in document_store.iter_documents(relevant_ids):
-        if config.asynchronous:
+    if config.asynchronous:
+        for doc in document_store.iter_documents(relevant_ids):
             AsyncIndicator.update_record(
                 doc.get('_id'), config.referenced_doc_type, config.domain, [config._id]
             )
-        else:
-            # save is a noop if the filter doesn't match
-            adapter.best_effort_save(doc)
+        return
+
+    docs = document_store.iter_documents(relevant_ids)
+    related_docs = None
+    if toggles.UCR_PREFETCH_RELATED_DOCS.enabled(domain):
+        docs = list(docs)
+        related_docs = prefetch_related_docs(domain, [config], docs)
+    for doc in docs:
+        eval_context = EvaluationContext(doc, related_docs=related_docs) if related_docs else None
+        # save is a noop if the filter doesn't match
+        adapter.best_effort_save(doc, eval_context)
 
 
 @serial_task('{indicator_config_id}', default_retry_delay=60 * 10, timeout=3 * 60 * 60, max_retries=20,
@@ -93,10 +107,14 @@ def rebuild_indicators(indicator_config_id, initiated_by=None, limit=-1, source=
     if trigger_time is not None and trigger_time < config.last_modified:
         return
 
+    _retry_if_building_by_shard(rebuild_indicators, config)
+
     success = _('Your UCR table {} has finished rebuilding in {}').format(config.table_id, config.domain)
     failure = _('There was an error rebuilding Your UCR table {} in {}.').format(config.table_id, config.domain)
-    send = limit == -1
-    with notify_someone(initiated_by, success_message=success, error_message=failure, send=send):
+    by_shard = limit == -1 and _should_build_by_shard(config)
+    # shard builds notify of success when the last shard has finished
+    with notify_someone(initiated_by, success_message=success, error_message=failure, send=limit == -1,
+                        send_success=not by_shard):
         adapter = get_indicator_adapter(config)
 
         if engine_id:
@@ -118,7 +136,10 @@ def rebuild_indicators(indicator_config_id, initiated_by=None, limit=-1, source=
 
         skip_log = bool(limit > 0)  # don't store log for temporary report builder UCRs
         adapter.rebuild_table(initiated_by=initiated_by, source=source, skip_log=skip_log, diffs=diffs)
-        _iteratively_build_table(config, limit=limit)
+        if by_shard:
+            _build_table_by_shard(config, initiated_by=initiated_by)
+        else:
+            _iteratively_build_table(config, limit=limit)
 
 
 @serial_task(
@@ -127,9 +148,13 @@ def rebuild_indicators(indicator_config_id, initiated_by=None, limit=-1, source=
 )
 def rebuild_indicators_in_place(indicator_config_id, initiated_by=None, source=None, domain=None):
     config = get_ucr_datasource_config_by_id(indicator_config_id)
+    _retry_if_building_by_shard(rebuild_indicators_in_place, config)
+
     success = _('Your UCR table {} has finished rebuilding in {}').format(config.table_id, config.domain)
     failure = _('There was an error rebuilding Your UCR table {} in {}.').format(config.table_id, config.domain)
-    with notify_someone(initiated_by, success_message=success, error_message=failure, send=True):
+    by_shard = _should_build_by_shard(config)
+    with notify_someone(initiated_by, success_message=success, error_message=failure,
+                        send_success=not by_shard):
         adapter = get_indicator_adapter(config)
         if not id_is_static(indicator_config_id):
             config.meta.build.initiated_in_place = datetime.utcnow()
@@ -138,7 +163,10 @@ def rebuild_indicators_in_place(indicator_config_id, initiated_by=None, source=N
             config.save()
 
         adapter.build_table(initiated_by=initiated_by, source=source)
-        _iteratively_build_table(config, in_place=True)
+        if by_shard:
+            _build_table_by_shard(config, in_place=True, initiated_by=initiated_by)
+        else:
+            _iteratively_build_table(config, in_place=True)
 
 
 @task(serializer='pickle', queue=UCR_CELERY_QUEUE, ignore_result=True, acks_late=True)
@@ -146,26 +174,96 @@ def resume_building_indicators(indicator_config_id, initiated_by=None):
     config = get_ucr_datasource_config_by_id(indicator_config_id)
     success = _('Your UCR table {} has finished rebuilding in {}').format(config.table_id, config.domain)
     failure = _('There was an error rebuilding Your UCR table {} in {}.').format(config.table_id, config.domain)
-    with notify_someone(initiated_by, success_message=success, error_message=failure, send=True):
-        resume_helper = DataSourceResumeHelper(config)
+    shards_helper = DataSourceShardsHelper(config)
+    by_shard = shards_helper.is_in_progress()
+    with notify_someone(initiated_by, success_message=success, error_message=failure,
+                        send_success=not by_shard):
         adapter = get_indicator_adapter(config)
         adapter.log_table_build(
             initiated_by=initiated_by,
             source='resume_building_indicators',
         )
-        _iteratively_build_table(config, resume_helper)
+        if by_shard:
+            # each shard continues from its own checkpoint
+            for db_alias in shards_helper.get_pending_shards():
+                build_indicators_for_shard.delay(indicator_config_id, db_alias, initiated_by=initiated_by)
+        else:
+            _iteratively_build_table(config, DataSourceResumeHelper(config))
+
+
+def _retry_if_building_by_shard(task, config):
+    """
+    Retry the task later if the shard tasks of a previous build are still
+    writing to the table of the data source, like a ``serial_task`` that
+    cannot acquire its lock
+    """
+    if DataSourceShardsHelper(config).is_in_progress():
+        task.retry(exc=ShardedBuildInProgressError(
+            f"The data source {config._id} is being built by shard"
+        ))
+
+
+def _should_build_by_shard(config):
+    return (
+        config.referenced_doc_type in ('XFormInstance', 'CommCareCase')
+        and len(get_db_aliases_for_partitioned_query()) > 1
+        and toggles.UCR_SHARD_PARALLEL_REBUILD.enabled(config.domain)
+    )
+
+
+def _build_table_by_shard(config, in_place=False, initiated_by=None):
+    """Queue a task to build the rows of each form processor database"""
+    db_aliases = get_db_aliases_for_partitioned_query()
+    for db_alias in db_aliases:
+        DataSourceResumeHelper(config, db_alias).clear_resume_info()
+    DataSourceShardsHelper(config).start(db_aliases)
+    for db_alias in db_aliases:
+        build_indicators_for_shard.delay(config._id, db_alias, in_place=in_place, initiated_by=initiated_by)
+
+
+@task(serializer='pickle', queue=UCR_CELERY_QUEUE, ignore_result=True, acks_late=True)
+def build_indicators_for_shard(indicator_config_id, db_alias, in_place=False, initiated_by=None):
+    config = get_ucr_datasource_config_by_id(indicator_config_id)
+    shards_helper = DataSourceShardsHelper(config)
+    if db_alias not in shards_helper.get_pending_shards():
+        # the shard has already been built, or the data source has
+        # changed since the build started
+        return
+
+    success = _('Your UCR table {} has finished rebuilding in {}').format(config.table_id, config.domain)
+    failure = _('There was an error rebuilding Your UCR table {} in {}.').format(config.table_id, config.domain)
+    with notify_someone(initiated_by, success_message=success, error_message=failure, send_success=False):
+        resume_helper = DataSourceResumeHelper(config, db_alias)
+        _build_table_iterations(config, resume_helper, db_alias=db_alias)
+        is_last_shard = shards_helper.complete_shard(db_alias)
+
+    if is_last_shard:
+        with notify_someone(initiated_by, success_message=success, error_message=failure):
+            for alias in get_db_aliases_for_partitioned_query():
+                DataSourceResumeHelper(config, alias).clear_resume_info()
+            shards_helper.clear()
+            _mark_build_finished(config, in_place)
 
 
 def _iteratively_build_table(config, resume_helper=None, in_place=False, limit=-1):
     resume_helper = resume_helper or DataSourceResumeHelper(config)
-    indicator_config_id = config._id
+    _build_table_iterations(config, resume_helper, limit=limit)
+    resume_helper.clear_resume_info()
+    _mark_build_finished(config, in_place)
+
+
+def _build_table_iterations(config, resume_helper, limit=-1, db_alias=None):
     case_type_or_xmlns_list = config.get_case_type_or_xmlns_filter()
     domains = config.data_domains
 
     loop_iterations = list(itertools.product(domains, case_type_or_xmlns_list))
     completed_iterations = resume_helper.get_completed_iterations()
     if completed_iterations:
-        loop_iterations = list(set(loop_iterations) - set(completed_iterations))
+        completed_iterations = {tuple(iteration) for iteration in completed_iterations}
+        loop_iterations = [
+            (domain, case_type_or_xmlns) for domain, case_type_or_xmlns in loop_iterations
+            if (domain, str(case_type_or_xmlns)) not in completed_iterations
+        ]
 
     for domain, case_type_or_xmlns in loop_iterations:
         relevant_ids = []
@@ -173,6 +271,7 @@ def _iteratively_build_table(config, resume_helper=None, in_place=False, limit=-
             domain, config.referenced_doc_type,
             case_type_or_xmlns=case_type_or_xmlns,
             load_source="build_indicators",
+            limit_db_aliases=[db_alias] if db_alias else None,
         )
 
         for i, relevant_id in enumerate(document_store.iter_document_ids()):
@@ -180,16 +279,17 @@ def _iteratively_build_table(config, resume_helper=None, in_place=False, limit=-
                 break
             relevant_ids.append(relevant_id)
             if len(relevant_ids) >= ID_CHUNK_SIZE:
-                _build_indicators(config, document_store, relevant_ids)
+                _build_indicators(config, document_store, relevant_ids, domain)
                 relevant_ids = []
 
         if relevant_ids:
-            _build_indicators(config, document_store, relevant_ids)
+            _build_indicators(config, document_store, relevant_ids, domain)
 
         resume_helper.add_completed_iteration(domain, case_type_or_xmlns)
 
-    resume_helper.clear_resume_info()
-    if not id_is_static(indicator_config_id):
+
+def _mark_build_finished(config, in_place):
+    if not id_is_static(config._id):
         if in_place:
             config.meta.build.finished_in_place = True
         else:
@@ -16,7 +16,7 @@ from casexml.apps.case.tests.util import delete_all_cases, delete_all_xforms
 from corehq.apps.groups.models import Group
 from corehq.apps.userreports.decorators import ucr_context_cache
 from corehq.apps.userreports.exceptions import BadSpecError
-from corehq.apps.userreports.expressions.factory import ExpressionFactory
+from corehq.apps.userreports.expressions.factory import ExpressionFactory, MemoizedExpression
 from corehq.apps.userreports.expressions.getters import transform_datetime
 from corehq.apps.userreports.expressions.specs import (
     PropertyNameGetterSpec,
@@ -1528,6 +1528,52 @@ class TestEvaluationContext(SimpleTestCase):
         self.assertEqual(counter.call_count, 3)
 
 
+class MemoizedExpressionTest(SimpleTestCase):
+    spec = {
+        'type': 'nested',
+        'argument_expression': {'type': 'property_name', 'property_name': 'outer'},
+        'value_expression': {'type': 'property_name', 'property_name': 'inner'},
+    }
+
+    def test_shared_between_expressions_with_same_spec(self):
+        expression1 = ExpressionFactory.from_spec(copy.deepcopy(self.spec))
+        expression2 = ExpressionFactory.from_spec(copy.deepcopy(self.spec))
+        doc = {'outer': {'inner': 'value'}}
+        context = EvaluationContext(doc, memoize=True)
+        self.assertEqual(expression1(doc, context), 'value')
+        self.assertEqual(expression2(doc, context), 'value')
+        self.assertEqual((context.memo_hits, context.memo_misses), (1, 1))
+
+    def test_not_memoized_by_default(self):
+        expression = ExpressionFactory.from_spec(copy.deepcopy(self.spec))
+        doc = {'outer': {'inner': 'value'}}
+        context = EvaluationContext(doc)
+        self.assertEqual(expression(doc, context), 'value')
+        self.assertEqual(expression(doc, context), 'value')
+        self.assertEqual((context.memo_hits, context.memo_misses), (0, 0))
+
+    def test_not_memoized_for_sub_items(self):
+        expression = ExpressionFactory.from_spec(copy.deepcopy(self.spec))
+        doc = {'repeat': [{'outer': {'inner': 1}}, {'outer': {'inner': 2}}]}
+        context = EvaluationContext(doc, memoize=True)
+        self.assertEqual([expression(item, context) for item in doc['repeat']], [1, 2])
+        self.assertEqual(context.memo, {})
+
+    def test_str(self):
+        expression = ExpressionFactory.from_spec(copy.deepcopy(self.spec))
+        self.assertEqual(str(expression), 'outer/inner')
+
+    @generate_cases([
+        ({'type': 'property_name', 'property_name': 'prop'},),
+        ({'type': 'nested', 'argument_expression': {'type': 'base_iteration_number'},
+          'value_expression': {'type': 'identity'}},),
+        ({'type': 'root_doc', 'expression': {'type': 'utcnow'}},),
+        ({'type': 'abt_supervisor'},),
+    ])
+    def test_not_memoizable(self, spec):
+        self.assertNotIsInstance(ExpressionFactory.from_spec(spec), MemoizedExpression)
+
+
 class SplitStringExpressionTest(SimpleTestCase):
 
     def test_split_string_index_expression(self):
@@ -0,0 +1,137 @@
+import uuid
+from unittest.mock import Mock, patch
+
+from django.test import SimpleTestCase
+
+from testil import Config
+
+from corehq.apps.userreports.expressions import prefetch
+from corehq.apps.userreports.expressions.factory import ExpressionFactory
+from corehq.apps.userreports.models import DataSourceConfiguration
+from corehq.apps.userreports.specs import EvaluationContext
+from corehq.form_processor.models import CommCareCase
+
+
+def _related_doc(property_name, value_expression=None):
+    return {
+        "type": "related_doc",
+        "related_doc_type": "CommCareCase",
+        "doc_id_expression": {"type": "property_name", "property_name": property_name},
+        "value_expression": value_expression or {"type": "property_name", "property_name": "name"},
+    }
+
+
+def _indicator(expression):
+    return {
+        "type": "expression",
+        "column_id": uuid.uuid4().hex,
+        "datatype": "string",
+        "expression": expression,
+    }
+
+
+def _config(indicators, base_item_expression=None):
+    return DataSourceConfiguration(
+        domain='test-domain',
+        display_name='test',
+        referenced_doc_type='CommCareCase',
+        table_id=uuid.uuid4().hex,
+        configured_filter={},
+        configured_indicators=indicators,
+        base_item_expression=base_item_expression or {},
+    )
+
+
+class GetRelatedDocLookupsTest(SimpleTestCase):
+
+    def _lookups(self, config):
+        return [
+            (lookup.type, lookup.doc_type, str(lookup.id_expression))
+            for lookup in config.get_related_doc_lookups()
+        ]
+
+    def test_root_lookups(self):
+        config = _config([
+            _indicator(_related_doc("parent_id")),
+            _indicator(_related_doc("parent_id", {"type": "property_name", "property_name": "other"})),
+            _indicator({
+                "type": "get_subcases",
+                "case_id_expression": {"type": "property_name", "property_name": "case_id"},
+            }),
+        ])
+        self.assertEqual(self._lookups(config), [
+            ("related_doc", "CommCareCase", "parent_id"),
+            ("get_subcases", None, "case_id"),
+        ])
+
+    def test_nested_lookups_are_skipped(self):
+        config = _config([
+            # the inner related doc is evaluated on the parent
+            _indicator(_related_doc("parent_id", _related_doc("grandparent_id"))),
+            # the id can only be found with another lookup
+            _indicator({
+                "type": "related_doc",
+                "related_doc_type": "CommCareCase",
+                "doc_id_expression": _related_doc("parent_id"),
+                "value_expression": {"type": "property_name", "property_name": "name"},
+            }),
+        ])
+        self.assertEqual(self._lookups(config), [("related_doc", "CommCareCase", "parent_id")])
+
+    def test_base_item_expression(self):
+        config = _config(
+            [
+                _indicator(_related_doc("item_parent_id")),
+                _indicator({"type": "root_doc", "expression": _related_doc("parent_id")}),
+            ],
+            base_item_expression={"type": "property_name", "property_name": "items"},
+        )
+        self.assertEqual(self._lookups(config), [("related_doc", "CommCareCase", "parent_id")])
+
+
+class PrefetchRelatedDocsTest(SimpleTestCase):
+
+    def test_prefetch(self):
+        config = _config([
+            _indicator(_related_doc("parent_id")),
+            _indicator({
+                "type": "get_subcases",
+                "case_id_expression": {"type": "property_name", "property_name": "_id"},
+            }),
+        ])
+        docs = [
+            {"_id": "c1", "domain": "test-domain", "parent_id": "p1"},
+            {"_id": "c2", "domain": "test-domain", "parent_id": "missing"},
+        ]
+        store = Mock()
+        store.iter_documents.return_value = [{"_id": "p1", "domain": "test-domain", "name": "parent"}]
+        subcase = Config(
+            to_json=lambda: {"_id": "s1"},
+            indices=[Config(referenced_id="c1"), Config(referenced_id="c1")],
+        )
+        with patch.object(prefetch, "get_document_store_for_doc_type", return_value=store), \
+                patch.object(CommCareCase.objects, "get_reverse_indexed_cases", return_value=[subcase]):
+            related_docs = prefetch.prefetch_related_docs("test-domain", [config], docs)
+
+        self.assertEqual(sorted(store.iter_documents.call_args[0][0]), ["missing", "p1"])
+        self.assertEqual(related_docs.docs, {
+            ("CommCareCase", "p1"): {"_id": "p1", "domain": "test-domain", "name": "parent"},
+            ("CommCareCase", "missing"): None,
+        })
+        self.assertEqual(related_docs.subcases, {"c1": [{"_id": "s1"}], "c2": []})
+
+        expression = ExpressionFactory.from_spec(_related_doc("parent_id"))
+        subcases_expression = ExpressionFactory.from_spec({
+            "type": "get_subcases",
+            "case_id_expression": {"type": "property_name", "property_name": "_id"},
+        })
+        with patch.object(CommCareCase.objects, "get_case") as get_case:
+            for doc, value, subcases in zip(docs, ["parent", None], [[{"_id": "s1"}], []]):
+                context = EvaluationContext(doc, related_docs=related_docs)
+                self.assertEqual(expression(doc, context), value)
+                self.assertEqual(subcases_expression(doc, context), subcases)
+        get_case.assert_not_called()
+
+    def test_nothing_to_prefetch(self):
+        config = _config([_indicator({"type": "property_name", "property_name": "name"})])
+        self.assertIsNone(prefetch.prefetch_related_docs("test-domain", [config], [{"_id": "c1"}]))
@@ -1,7 +1,19 @@
+from unittest.mock import patch
+
 from django.test import SimpleTestCase
 
-from corehq.apps.userreports.rebuild import DataSourceResumeHelper
+from corehq.apps.userreports.exceptions import ShardedBuildInProgressError
+from corehq.apps.userreports.rebuild import (
+    DataSourceResumeHelper,
+    DataSourceShardsHelper,
+)
+from corehq.apps.userreports.tasks import (
+    build_indicators_for_shard,
+    rebuild_indicators,
+    rebuild_indicators_in_place,
+)
 from corehq.apps.userreports.tests.utils import get_sample_data_source
+from corehq.apps.userreports.views import EditDataSourceView
 
 
 class DataSourceResumeBuildTest(SimpleTestCase):
@@ -41,3 +53,95 @@ class DataSourceResumeBuildTest(SimpleTestCase):
     def test_has_resume_info_true(self):
         self._resume_helper.add_completed_iteration("domain1", 'type1')
         self.assertEqual(True, self._resume_helper.has_resume_info())
+
+    def test_xmlns_with_colon(self):
+        xmlns = 'http://openrosa.org/formdesigner/abc'
+        self._resume_helper.add_completed_iteration("domain1", xmlns)
+        self.assertEqual([["domain1", xmlns]], self._resume_helper.get_completed_iterations())
+
+    def test_shard_resume_info_is_separate(self):
+        shard_helper = DataSourceResumeHelper(self._data_source, 'db1')
+        self.addCleanup(shard_helper.clear_resume_info)
+        shard_helper.add_completed_iteration("domain1", 'type1')
+        self.assertEqual([["domain1", 'type1']], shard_helper.get_completed_iterations())
+        self.assertEqual([], self._resume_helper.get_completed_iterations())
+
+
+class DataSourceShardsHelperTest(SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.data_source = get_sample_data_source()
+        self.helper = DataSourceShardsHelper(self.data_source)
+        self.addCleanup(self.helper.clear)
+
+    def test_complete_shards(self):
+        self.assertFalse(self.helper.is_in_progress())
+        self.helper.start(['db1', 'db2'])
+        self.assertTrue(self.helper.is_in_progress())
+        self.assertFalse(self.helper.complete_shard('db1'))
+        self.assertFalse(self.helper.complete_shard('db1'))
+        self.assertEqual(self.helper.get_pending_shards(), ['db2'])
+        self.assertTrue(self.helper.complete_shard('db2'))
+        self.assertFalse(self.helper.complete_shard('db2'))
+        self.assertFalse(self.helper.is_in_progress())
+
+    def test_progress(self):
+        self.helper.start(['db1', 'db2'])
+        self.helper.complete_shard('db1')
+        shard_helper = DataSourceResumeHelper(self.data_source, 'db2')
+        self.addCleanup(shard_helper.clear_resume_info)
+        shard_helper.add_completed_iteration(self.data_source.domain, 'ticket')
+
+        with patch('corehq.apps.userreports.rebuild.get_db_aliases_for_partitioned_query',
+                   return_value=['db1', 'db2']), \
+                patch.object(type(self.data_source), 'get_case_type_or_xmlns_filter',
+                             return_value=['ticket', 'task']):
+            progress = self.helper.get_progress()
+
+        self.assertEqual(progress, {
+            'shards': {
+                'db1': {'completed': 2, 'total': 2, 'finished': True},
+                'db2': {'completed': 1, 'total': 2, 'finished': False},
+            },
+            'completed': 3,
+            'total': 4,
+        })
+
+    def test_edit_data_source_view_build_progress(self):
+        view = EditDataSourceView()
+        view.kwargs = {'config_id': self.data_source._id}
+        with patch.object(EditDataSourceView, 'config', self.data_source), \
+                patch('corehq.apps.userreports.rebuild.get_db_aliases_for_partitioned_query',
+                      return_value=['db1', 'db2']), \
+                patch.object(type(self.data_source), 'get_case_type_or_xmlns_filter',
+                             return_value=['ticket']):
+            self.assertIsNone(view.get_build_progress())
+
+            self.helper.start(['db1', 'db2'])
+            self.helper.complete_shard('db1')
+            progress = view.get_build_progress()
+
+        self.assertEqual((progress['completed'], progress['total']), (1, 2))
+
+    def test_rebuild_waits_for_shard_build(self):
+        self.helper.start(['db1', 'db2'])
+        with patch('corehq.apps.userreports.tasks.get_ucr_datasource_config_by_id',
+                   return_value=self.data_source), \
+                patch('corehq.apps.userreports.tasks.get_indicator_adapter') as get_adapter:
+            with self.assertRaises(ShardedBuildInProgressError):
+                rebuild_indicators(self.data_source._id)
+            with self.assertRaises(ShardedBuildInProgressError):
+                rebuild_indicators_in_place(self.data_source._id)
+        get_adapter.assert_not_called()
+
+    def test_shard_build_error_is_sent(self):
+        self.helper.start(['db1', 'db2'])
+        with patch('corehq.apps.userreports.tasks.get_ucr_datasource_config_by_id',
+                   return_value=self.data_source), \
+                patch('corehq.apps.userreports.tasks._build_table_iterations', side_effect=ValueError), \
+                patch('corehq.util.context_managers.soft_assert') as soft_assert:
+            with self.assertRaises(ValueError):
+                build_indicators_for_shard(self.data_source._id, 'db1', initiated_by='test@example.com')
+        soft_assert.assert_called_once_with(to='test@example.com', notify_admins=False, send_to_ops=False)
+        self.assertEqual(self.helper.get_pending_shards(), ['db1', 'db2'])
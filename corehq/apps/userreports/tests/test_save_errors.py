@@ -1,4 +1,5 @@
 import uuid
+from unittest.mock import patch
 
 from django.test import TestCase
 
@@ -14,6 +15,10 @@ from corehq.apps.userreports.models import (
     DataSourceConfiguration,
     InvalidUCRData,
 )
+from corehq.apps.userreports.sql.adapter import (
+    BULK_LOAD_COPY,
+    IndicatorSqlAdapter,
+)
 from corehq.apps.userreports.util import get_indicator_adapter
 
 
@@ -120,3 +125,18 @@ class AdapterBulkSaveTest(TestCase):
 
     def test_save_rows_accepts_empty_list(self):
         self.adapter.save_rows([])
+
+    @patch('corehq.apps.userreports.sql.adapter.COPY_MIN_ROWS', 1)
+    def test_bulk_save_with_copy(self):
+        adapter = IndicatorSqlAdapter(self.config, bulk_load=BULK_LOAD_COPY)
+        names = ['plain', 'tab\tand\nnewline', 'back\\slash', None]
+        docs = [
+            {"_id": str(i), "domain": self.domain, "doc_type": "CommCareCase", "name": name}
+            for i, name in enumerate(names)
+        ]
+        adapter.bulk_save(docs)
+        docs[0]["name"] = 'updated'
+        adapter.bulk_save(docs)
+
+        rows = {row.doc_id: row.name for row in adapter.get_query_object()}
+        self.assertEqual(rows, {'0': 'updated', '1': names[1], '2': names[2], '3': None})
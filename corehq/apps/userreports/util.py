@@ -13,7 +13,7 @@ from corehq.apps.userreports.adapter import IndicatorAdapterLoadTracker
 from corehq.apps.userreports.const import REPORT_BUILDER_EVENTS_KEY, TEMP_REPORT_PREFIX
 from corehq.apps.userreports.exceptions import BadSpecError, ReportConfigurationNotFoundError, \
     DataSourceConfigurationNotFoundError
-from corehq.toggles import ENABLE_UCR_MIRRORS
+from corehq.toggles import ENABLE_UCR_MIRRORS, UCR_COPY_BULK_LOAD
 from corehq.util import reverse
 from corehq.util.couch import DocumentNotFound
 from corehq.util.metrics.load_counters import ucr_load_counter
@@ -178,13 +178,14 @@ def number_of_ucr_reports(domain):
 
 def get_indicator_adapter(config, raise_errors=False, load_source="unknown"):
     from corehq.apps.userreports.sql.adapter import IndicatorSqlAdapter, ErrorRaisingIndicatorSqlAdapter, \
-        MultiDBSqlAdapter, ErrorRaisingMultiDBAdapter
+        MultiDBSqlAdapter, ErrorRaisingMultiDBAdapter, BULK_LOAD_COPY
     requires_mirroring = config.mirrored_engine_ids
     if requires_mirroring and ENABLE_UCR_MIRRORS.enabled(config.domain):
         adapter_cls = ErrorRaisingMultiDBAdapter if raise_errors else MultiDBSqlAdapter
     else:
         adapter_cls = ErrorRaisingIndicatorSqlAdapter if raise_errors else IndicatorSqlAdapter
-    adapter = adapter_cls(config)
+    bulk_load = BULK_LOAD_COPY if UCR_COPY_BULK_LOAD.enabled(config.domain) else None
+    adapter = adapter_cls(config, bulk_load=bulk_load)
     track_load = ucr_load_counter(config.engine_id, load_source, config.domain)
     return IndicatorAdapterLoadTracker(adapter, track_load)
 
@@ -128,7 +128,10 @@ from corehq.apps.userreports.models import (
     is_data_registry_report,
     report_config_id_is_static,
 )
-from corehq.apps.userreports.rebuild import DataSourceResumeHelper
+from corehq.apps.userreports.rebuild import (
+    DataSourceResumeHelper,
+    DataSourceShardsHelper,
+)
 from corehq.apps.userreports.reports.builder.forms import (
     ConfigureListReportForm,
     ConfigureMapReportForm,
@@ -1142,8 +1145,18 @@ class BaseEditDataSourceView(BaseUserConfigReportsView):
             'read_only': self.read_only,
             'used_by_reports': self.get_reports(),
             'allowed_ucr_expressions': allowed_ucr_expression,
+            'build_progress': self.get_build_progress(),
         }
 
+    def get_build_progress(self):
+        """The progress of a build that is split by database, if one is in progress"""
+        if not self.config_id:
+            return None
+        shards_helper = DataSourceShardsHelper(self.config)
+        if not shards_helper.is_in_progress():
+            return None
+        return shards_helper.get_progress()
+
     @property
     def page_url(self):
         if self.config_id:
@@ -1299,19 +1312,29 @@ def rebuild_data_source(request, domain, config_id):
         config.is_deactivated = False
         config.save()
 
-    messages.success(
-        request,
-        _('Table "{}" is now being rebuilt. Data should start showing up soon').format(
-            config.display_name
-        )
-    )
-
+    _add_rebuild_message(request, config)
     rebuild_indicators.delay(config_id, request.user.username, domain=domain)
     return HttpResponseRedirect(reverse(
         EditDataSourceView.urlname, args=[domain, config._id]
     ))
 
 
+def _add_rebuild_message(request, config):
+    if DataSourceShardsHelper(config).is_in_progress():
+        messages.warning(
+            request,
+            _('Table "{}" will be rebuilt when the build that is in progress has finished. '
+              'If that build has stopped, resume it first.').format(config.display_name)
+        )
+    else:
+        messages.success(
+            request,
+            _('Table "{}" is now being rebuilt. Data should start showing up soon').format(
+                config.display_name
+            )
+        )
+
+
 @toggles.USER_CONFIGURABLE_REPORTS.required_decorator()
 @require_POST
 def resume_building_data_source(request, domain, config_id):
@@ -1323,7 +1346,8 @@ def resume_building_data_source(request, domain, config_id):
                 config.display_name
             )
         )
-    elif not DataSourceResumeHelper(config).has_resume_info():
+    elif not (DataSourceResumeHelper(config).has_resume_info()
+              or DataSourceShardsHelper(config).is_in_progress()):
         messages.warning(
             request,
             _('Table "{}" did not finish building but resume information is not available. '
@@ -1350,12 +1374,7 @@ def build_data_source_in_place(request, domain, config_id):
         config.is_deactivated = False
         config.save()
 
-    messages.success(
-        request,
-        _('Table "{}" is now being rebuilt. Data should start showing up soon').format(
-            config.display_name
-        )
-    )
+    _add_rebuild_message(request, config)
     rebuild_indicators_in_place.delay(config_id, request.user.username,
                                       source='edit_data_source_build_in_place',
                                       domain=config.domain)
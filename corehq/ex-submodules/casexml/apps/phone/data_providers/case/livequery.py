@@ -23,19 +23,36 @@ Example case graphs with outcomes:
 """
 import logging
 from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from datetime import datetime
 from functools import partial, wraps
 from itertools import chain, islice
 
+from django.conf import settings
+from django.db import connections
+
 from casexml.apps.case.const import CASE_INDEX_EXTENSION as EXTENSION
 from casexml.apps.phone.const import ASYNC_RETRY_AFTER
+from casexml.apps.phone.restore_caching import CaseGraphCache
 from casexml.apps.phone.tasks import ASYNC_RESTORE_SENT
+from dimagi.utils.chunked import chunked
 
 from corehq.form_processor.models import CommCareCase, CommCareCaseIndex
-from corehq.sql_db.routers import read_from_plproxy_standbys
-from corehq.toggles import LIVEQUERY_READ_FROM_STANDBYS, NAMESPACE_USER
+from corehq.sql_db.routers import (
+    allow_read_from_plproxy_standby,
+    read_from_plproxy_standbys,
+)
+from corehq.sql_db.util import split_list_by_db_partition
+from corehq.toggles import (
+    LIVEQUERY_CASE_GRAPH_CACHE,
+    LIVEQUERY_CASE_GRAPH_CACHE_CHECK,
+    LIVEQUERY_READ_FROM_STANDBYS,
+    NAMESPACE_USER,
+)
 from corehq.util.metrics import metrics_counter, metrics_histogram
 from corehq.util.metrics.load_counters import case_load_counter
-from corehq.util.timer import TimingContext
+from corehq.util.timer import NestableTimer, TimingContext
 
 from .load_testing import get_xml_for_response
 from .stock import get_stock_payload
@@ -74,7 +91,11 @@ def do_livequery(timing_context, restore_state, response, async_task=None):
                 domain, owner_ids, closed=False)
             debug("owned: %r", owned_ids)
 
-        live_ids, indices = get_live_case_ids_and_indices(domain, owned_ids, timing_context)
+        if LIVEQUERY_CASE_GRAPH_CACHE.enabled(domain):
+            live_ids, indices = get_cached_live_case_ids_and_indices(
+                domain, owner_ids, owned_ids, timing_context, restore_state.restore_user.user_id)
+        else:
+            live_ids, indices = get_live_case_ids_and_indices(domain, owned_ids, timing_context)
 
         if restore_state.last_sync_log:
             with timing_context("discard_already_synced_cases"):
@@ -106,7 +127,7 @@ def do_livequery(timing_context, restore_state, response, async_task=None):
                 timing_context,
                 restore_state,
                 response,
-                batch_cases(iaccessor, sync_ids),
+                batch_cases(iaccessor, sync_ids, timing_context, settings.RESTORE_CASE_FETCH_WORKERS),
                 init_progress(async_task, total_cases),
                 total_cases,
             )
@@ -127,6 +148,71 @@ def get_case_hierarchy(domain, cases):
 
 
 def get_live_case_ids_and_indices(domain, owned_ids, timing_context):
+    graph = CaseGraph(owned_ids)
+    walk_case_graph(domain, graph, graph.owned_ids, timing_context)
+    return graph.live_ids, graph.indices
+
+
+class CaseGraph:
+    """Case graph data structures computed by `walk_case_graph`
+
+    A graph can be persisted between restores (see `CaseGraphCache`)
+    and extended later by walking from its known cases again, which
+    only fetches indices that have not been seen yet.
+    """
+
+    def __init__(self, owned_ids):
+        self.owned_ids = set(owned_ids)  # owned, open case ids (may be extensions)
+        self.all_ids = set(owned_ids)
+        self.open_ids = set(owned_ids)
+        self.live_ids = set()
+        self.deleted_ids = set()
+        self.extensions_by_host = defaultdict(set)  # host_id -> (open) extension_ids
+        self.hosts_by_extension = defaultdict(set)  # (open) extension_id -> host_ids
+        self.parents_by_child = defaultdict(set)    # child_id -> parent_ids
+        self.indices = defaultdict(list)  # case_id -> list of CommCareCaseIndex-like, used as a cache for later
+        self.seen_ix = defaultdict(set)   # case_id -> set of '<index.case_id> <index.identifier>'
+        self.timestamp = None  # graph is not valid for changes made after this time
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["indices"] = {
+            case_id: [tuple(getattr(ix, f) for f in _INDEX_FIELDS) for ix in indices]
+            for case_id, indices in self.indices.items()
+        }
+        return state
+
+    def __setstate__(self, state):
+        state["indices"] = defaultdict(list, {
+            case_id: [CommCareCaseIndex(**dict(zip(_INDEX_FIELDS, ix))) for ix in indices]
+            for case_id, indices in state["indices"].items()
+        })
+        self.__dict__.update(state)
+
+    def __eq__(self, other):
+        return isinstance(other, CaseGraph) and (
+            self.owned_ids == other.owned_ids
+            and self.live_ids == other.live_ids
+            and {k: set(v) for k, v in self.indices.items() if v}
+            == {k: set(v) for k, v in other.indices.items() if v}
+        )
+
+
+_INDEX_FIELDS = [
+    "domain",
+    "case_id",
+    "identifier",
+    "referenced_id",
+    "referenced_type",
+    "relationship_id",
+]
+
+
+def walk_case_graph(domain, graph, next_ids, timing_context):
+    """Walk case indices starting at `next_ids` and update liveness
+
+    This function mutates the data structures of `graph`.
+    """
     def index_key(index):
         return '{} {}'.format(index.case_id, index.identifier)
 
@@ -238,9 +324,11 @@ def get_live_case_ids_and_indices(domain, owned_ids, timing_context):
     def update_open_and_deleted_ids(related):
         """Update open_ids and deleted_ids with related case_ids
 
-        TODO store referenced case (parent) deleted and closed status in
-        CommCareCaseIndex to reduce number of related indices fetched
-        and avoid this extra query per related query.
+        The closed and deleted state of referenced cases is read from
+        the index (see `CommCareCaseIndex.referenced_closed`). Cases
+        with unknown state are looked up with an extra query. The
+        referencing cases that are not known yet are open extension
+        cases, and are never looked up.
         """
         case_ids = {case_id
             for index in related
@@ -252,13 +340,27 @@ def get_live_case_ids_and_indices(domain, owned_ids, timing_context):
             index.case_id for index in related
             if index.relationship == 'extension'
         }
-        check_cases = list(set(case_ids) - open_cases)
-        rows = CommCareCase.objects.get_closed_and_deleted_ids(domain, check_cases)
+        rows = []
+        known_cases = set()
+        for index in related:
+            ref_id = index.referenced_id
+            if ref_id not in case_ids or ref_id in open_cases or ref_id in known_cases:
+                continue
+            if index.referenced_deleted:
+                rows.append((ref_id, index.referenced_closed, True))
+            elif index.referenced_closed is not None and index.referenced_deleted is not None:
+                rows.append((ref_id, index.referenced_closed, False))
+            else:
+                continue
+            known_cases.add(ref_id)
+        referenced_ids = {index.referenced_id for index in related} & case_ids
+        check_cases = list(referenced_ids - open_cases - known_cases)
+        rows.extend(CommCareCase.objects.get_closed_and_deleted_ids(domain, check_cases))
         for case_id, closed, deleted in rows:
             if deleted:
                 deleted_ids.add(case_id)
             if closed or deleted:
-                case_ids.remove(case_id)
+                case_ids.discard(case_id)
         open_ids.update(case_ids)
 
     def filter_deleted_indices(related):
@@ -274,17 +376,18 @@ def get_live_case_ids_and_indices(domain, owned_ids, timing_context):
     debug = logging.getLogger(__name__).debug
 
     # case graph data structures
-    live_ids = set()
-    deleted_ids = set()
-    extensions_by_host = defaultdict(set)  # host_id -> (open) extension_ids
-    hosts_by_extension = defaultdict(set)  # (open) extension_id -> host_ids
-    parents_by_child = defaultdict(set)    # child_id -> parent_ids
-    indices = defaultdict(list)  # case_id -> list of CommCareCaseIndex-like, used as a cache for later
-    seen_ix = defaultdict(set)   # case_id -> set of '<index.case_id> <index.identifier>'
-
-    next_ids = all_ids = set(owned_ids)
-    owned_ids = set(owned_ids)  # owned, open case ids (may be extensions)
-    open_ids = set(owned_ids)
+    live_ids = graph.live_ids
+    deleted_ids = graph.deleted_ids
+    extensions_by_host = graph.extensions_by_host
+    hosts_by_extension = graph.hosts_by_extension
+    parents_by_child = graph.parents_by_child
+    indices = graph.indices
+    seen_ix = graph.seen_ix
+
+    all_ids = graph.all_ids
+    owned_ids = graph.owned_ids
+    open_ids = graph.open_ids
+    next_ids = set(next_ids)
     get_related_indices = partial(CommCareCaseIndex.objects.get_related_indices, domain)
     while next_ids:
         exclude = set(chain.from_iterable(seen_ix[id] for id in next_ids))
@@ -318,7 +421,73 @@ def get_live_case_ids_and_indices(domain, owned_ids, timing_context):
                 enliven(case_id)
 
         debug('live: %r', live_ids)
-    return live_ids, indices
+
+
+def get_cached_live_case_ids_and_indices(domain, owner_ids, owned_ids, timing_context, user_id=None):
+    """Get live case ids and indices using a persisted case graph
+
+    The graph persisted by the previous restore for the same owners is
+    reused if none of its cases have changed since it was computed.
+    It is extended with indices of cases that were added to the graph
+    since then. A full walk is done if there is no usable graph.
+    """
+    cache = CaseGraphCache(domain, owner_ids)
+    timestamp = datetime.utcnow()
+    graph = cache.get_value()
+    if graph is not None and graph.owned_ids == set(owned_ids):
+        with timing_context("refresh_case_graph (%s cases)" % len(graph.all_ids)):
+            result = "hit" if refresh_case_graph(domain, graph, timing_context) else "miss"
+    else:
+        result = "miss"
+    if result == "miss":
+        graph = CaseGraph(owned_ids)
+        walk_case_graph(domain, graph, graph.owned_ids, timing_context)
+    metrics_counter('commcare.restore.case_graph_cache', tags={'domain': domain, 'result': result})
+
+    if result == "hit" and LIVEQUERY_CASE_GRAPH_CACHE_CHECK.enabled(user_id, NAMESPACE_USER):
+        with timing_context("check_case_graph"):
+            expected = CaseGraph(owned_ids)
+            walk_case_graph(domain, expected, expected.owned_ids, TimingContext())
+            if expected != graph:
+                metrics_counter('commcare.restore.case_graph_cache.mismatch', tags={'domain': domain})
+                logging.getLogger(__name__).error(
+                    "Cached case graph mismatch: domain=%s owners=%r", domain, owner_ids)
+                graph = expected
+
+    graph.timestamp = timestamp
+    cache.set_value(graph)
+    return graph.live_ids, graph.indices
+
+
+def refresh_case_graph(domain, graph, timing_context):
+    """Bring a persisted case graph up to date
+
+    Liveness can only be updated incrementally if the graph has grown:
+    new (open) extensions of known cases can be walked from the
+    existing graph because that does not change the liveness of any
+    case already in it. Any other change (a case in the graph was
+    modified, closed, deleted or restored) requires a full walk.
+
+    :returns: `True` if the graph was refreshed, `False` if it must be
+    discarded.
+    """
+    known_ids = list(graph.all_ids | graph.deleted_ids)
+    if not known_ids:
+        return True
+    modified_dates = CommCareCase.objects.get_last_modified_dates(domain, known_ids)
+    if len(modified_dates) != len(known_ids) or any(
+            modified_on > graph.timestamp for modified_on in modified_dates.values()):
+        return False
+    closed_or_deleted = set()
+    deleted_ids = set()
+    for case_id, closed, deleted in CommCareCase.objects.get_closed_and_deleted_ids(domain, known_ids):
+        closed_or_deleted.add(case_id)
+        if deleted:
+            deleted_ids.add(case_id)
+    if deleted_ids != graph.deleted_ids or closed_or_deleted != set(known_ids) - graph.open_ids:
+        return False
+    walk_case_graph(domain, graph, graph.all_ids, timing_context)
+    return True
 
 
 def discard_already_synced_cases(live_ids, restore_state):
@@ -351,12 +520,22 @@ class PrefetchIndexCaseAccessor:
         return CommCareCase.objects.get_cases(case_ids, self.domain, **kw)
 
 
-def batch_cases(accessor, case_ids):
+def batch_cases(accessor, case_ids, timing_context=None, max_workers=1):
+    """Fetch cases in batches
+
+    With `max_workers > 1` case ids are grouped by shard, and batches
+    are fetched by a thread pool up to `max_workers` batches ahead of
+    the consumer, which overlaps fetching with processing of previously
+    fetched batches. Batches are yielded in the order they are fetched.
+    """
     def take(n, iterable):
         # https://docs.python.org/2/library/itertools.html#recipes
         return list(islice(iterable, n))
 
     track_load = case_load_counter("livequery_restore", accessor.domain)
+    if max_workers > 1:
+        yield from _fetch_batches_concurrently(accessor, case_ids, track_load, timing_context, max_workers)
+        return
     ids = iter(case_ids)
     while True:
         next_ids = take(1000, ids)
@@ -366,6 +545,45 @@ def batch_cases(accessor, case_ids):
         yield accessor.get_cases(next_ids)
 
 
+def _fetch_batches_concurrently(accessor, case_ids, track_load, timing_context, max_workers):
+    use_standbys = allow_read_from_plproxy_standby()
+
+    def fetch(db_name, ids):
+        timer = NestableTimer("fetch_cases(%s, %s cases)" % (db_name, len(ids)), is_root=False)
+        try:
+            with read_from_plproxy_standbys() if use_standbys else nullcontext():
+                timer.start()
+                cases = accessor.get_cases(ids)
+                timer.stop()
+        finally:
+            connections.close_all()  # connections of this worker thread
+        return timer, cases
+
+    def results(futures):
+        for future in futures:
+            timer, cases = future.result()
+            if timing_context is not None:
+                timing_context.peek().append(timer)
+            yield cases
+
+    batches = (
+        (db_name, ids)
+        for db_name, shard_ids in split_list_by_db_partition(case_ids)
+        for ids in chunked(shard_ids, 1000, list)
+    )
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for db_name, ids in batches:
+            if len(pending) >= max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from results(done)
+            track_load(len(ids))
+            pending.add(executor.submit(fetch, db_name, ids))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            yield from results(done)
+
+
 def init_progress(async_task, total):
     if not async_task:
         return lambda done: None
@@ -0,0 +1,75 @@
+import multiprocessing
+import resource
+import shutil
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from casexml.apps.case.mock import CaseBlock
+from casexml.apps.phone.restore import RestoreContent
+
+CHUNK_SIZE = 64 * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the peak RSS and the time to first byte of restore payloads "
+        "of generated cases, reading the response body in place and copying "
+        "it to a second temp file first (the previous behaviour)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+        parser.add_argument('--properties', type=int, default=10,
+                            help='Number of case properties of each case')
+
+    def handle(self, sizes, properties, **options):
+        print("cases\tpath\tbuild secs\tfirst byte secs\tread secs\tpeak RSS KiB")
+        for size in sizes:
+            for path in ['in place', 'copied']:
+                # run each measurement in a new process so that the peak RSS
+                # of one does not hide the peak RSS of the next
+                with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('fork')) as executor:
+                    result = executor.submit(_measure_restore, size, properties, path == 'copied').result()
+                build, first_byte, read, peak_rss = result
+                print(f"{size}\t{path}\t{build:.3f}\t{first_byte:.3f}\t{read:.3f}\t{peak_rss}")
+
+
+def _measure_restore(size, properties, copy):
+    initial_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    with RestoreContent('benchmark', items=True) as content:
+        for i in range(size):
+            content.append(_get_case_block(properties))
+        built = time.perf_counter()
+        fileobj = _get_copied_fileobj(content) if copy else content.get_fileobj()
+        with fileobj:
+            fileobj.read(CHUNK_SIZE)
+            first_byte = time.perf_counter()
+            while fileobj.read(CHUNK_SIZE):
+                pass
+            read = time.perf_counter()
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - initial_rss
+    return built - start, first_byte - built, read - built, peak_rss
+
+
+def _get_copied_fileobj(content):
+    fileobj = tempfile.TemporaryFile('w+b')
+    with content.get_fileobj() as payload:
+        shutil.copyfileobj(payload, fileobj)
+    fileobj.seek(0)
+    return fileobj
+
+
+def _get_case_block(properties):
+    return CaseBlock(
+        case_id=uuid.uuid4().hex,
+        case_type='benchmark',
+        case_name='benchmark case',
+        owner_id='benchmark-owner',
+        create=True,
+        update={f'property_{i}': uuid.uuid4().hex for i in range(properties)},
+    ).as_xml()
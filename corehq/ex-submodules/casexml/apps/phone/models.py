@@ -133,6 +133,9 @@ class OTARestoreUser(object):
     def get_fixture_data_items(self):
         raise NotImplementedError()
 
+    def get_fixture_data_owners(self):
+        raise NotImplementedError()
+
     def get_commtrack_location_id(self):
         raise NotImplementedError()
 
@@ -172,6 +175,9 @@ class OTARestoreWebUser(OTARestoreUser):
     def get_fixture_data_items(self):
         return []
 
+    def get_fixture_data_owners(self):
+        return []
+
     def get_commtrack_location_id(self):
         return None
 
@@ -210,6 +216,11 @@ class OTARestoreCommCareUser(OTARestoreUser):
 
         return LookupTableRow.objects.iter_by_user(self._couch_user)
 
+    def get_fixture_data_owners(self):
+        from corehq.apps.fixtures.models import LookupTableRowOwner
+
+        return LookupTableRowOwner.objects.get_owners_of_user_rows(self._couch_user)
+
     def get_commtrack_location_id(self):
         from corehq.apps.commtrack.util import get_commtrack_location_id
 
@@ -1,6 +1,6 @@
+import io
 import logging
 import os
-import shutil
 import tempfile
 import uuid
 from datetime import datetime, timedelta
@@ -116,7 +116,8 @@ class RestoreContent(object):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.response_body.close()
+        if self.response_body is not None:
+            self.response_body.close()
 
     def append(self, xml_element):
         self.num_items += 1
@@ -131,29 +132,84 @@ class RestoreContent(object):
         for element in iterable:
             self.append(element)
 
-    def _write_to_file(self, fileobj):
+    def get_fileobj(self):
+        """Get a file object containing the complete response
+
+        The response body is not copied: the returned file object takes
+        ownership of it and reads it between the start and closing tags.
+        No more elements can be added after this is called.
+        """
         # Add 1 to num_items to account for message element
         items = (self.items_template % ('%s' % (self.num_items + 1)).encode('utf-8')) if self.items else b''
-        fileobj.write(self.start_tag_template % {
+        start_tag = self.start_tag_template % {
             b"items": items,
             b"username": self.username.encode("utf8"),
             b"nature": ResponseNature.OTA_RESTORE_SUCCESS.encode("utf8"),
-        })
+        }
+        body, self.response_body = self.response_body, None
+        return ConcatenatedFile([BytesIO(start_tag), body, BytesIO(self.closing_tag)])
 
-        self.response_body.seek(0)
-        shutil.copyfileobj(self.response_body, fileobj)
 
-        fileobj.write(self.closing_tag)
+class ConcatenatedFile(io.RawIOBase):
+    """Read-only, seekable file object reading a sequence of files
 
-    def get_fileobj(self):
-        fileobj = tempfile.TemporaryFile('w+b')
-        try:
-            self._write_to_file(fileobj)
+    Each file must be seekable. All files are closed when this file is
+    closed.
+    """
+
+    def __init__(self, fileobjs):
+        self.fileobjs = fileobjs
+        self.sizes = []
+        for fileobj in fileobjs:
+            self.sizes.append(fileobj.seek(0, io.SEEK_END))
             fileobj.seek(0)
-            return fileobj
-        except:
+        self._index = 0
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buf):
+        view = memoryview(buf)
+        count = 0
+        while count < len(view) and self._index < len(self.fileobjs):
+            num = self.fileobjs[self._index].readinto(view[count:])
+            if num:
+                count += num
+            else:
+                self._index += 1
+                if self._index < len(self.fileobjs):
+                    self.fileobjs[self._index].seek(0)
+        self._pos += count
+        return count
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += sum(self.sizes)
+        if offset < 0:
+            raise ValueError("negative seek position %s" % offset)
+        start = 0
+        for index, size in enumerate(self.sizes):
+            if offset < start + size or index == len(self.sizes) - 1:
+                break
+            start += size
+        self._index = index
+        self.fileobjs[index].seek(offset - start)
+        self._pos = offset
+        return offset
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        for fileobj in self.fileobjs:
             fileobj.close()
-            raise
+        super().close()
 
 
 class RestoreResponse(object):
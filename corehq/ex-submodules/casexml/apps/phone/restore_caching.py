@@ -6,7 +6,11 @@ from dimagi.utils.couch.cache.cache_core import get_redis_default_cache
 
 from corehq.util.quickcache import quickcache
 
-from .const import ASYNC_RESTORE_CACHE_KEY_PREFIX, RESTORE_CACHE_KEY_PREFIX
+from .const import (
+    ASYNC_RESTORE_CACHE_KEY_PREFIX,
+    CASE_GRAPH_CACHE_KEY_PREFIX,
+    RESTORE_CACHE_KEY_PREFIX,
+)
 from .models import loadtest_users_enabled
 
 logger = logging.getLogger(__name__)
@@ -101,3 +105,22 @@ class RestorePayloadPathCache(_RestoreCache):
 class AsyncRestoreTaskIdCache(_RestoreCache):
     timeout = 24 * 60 * 60
     prefix = ASYNC_RESTORE_CACHE_KEY_PREFIX
+
+
+class CaseGraphCache(_CacheAccessor):
+    """Livequery case graph of the previous restore for a set of owners
+
+    Unlike restore payload caches this is not invalidated by freshness
+    tokens: the cached graph is validated against the cases it contains
+    before it is used.
+    """
+    timeout = 24 * 60 * 60
+
+    def __init__(self, domain, owner_ids):
+        self.cache_key = self._make_cache_key(domain, owner_ids)
+        self.debug_info = (self.__class__.__name__, domain, len(owner_ids))
+
+    @staticmethod
+    def _make_cache_key(domain, owner_ids):
+        hashable_key = ','.join([CASE_GRAPH_CACHE_KEY_PREFIX, domain] + sorted(owner_ids))
+        return hashlib.md5(hashable_key.encode('utf-8')).hexdigest()
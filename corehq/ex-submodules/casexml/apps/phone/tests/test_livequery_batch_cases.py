@@ -0,0 +1,37 @@
+from django.test import SimpleTestCase
+
+from casexml.apps.phone.data_providers.case.livequery import batch_cases
+from corehq.util.timer import TimingContext
+
+
+class FakeAccessor:
+    domain = "test"
+
+    def __init__(self):
+        self.calls = []
+
+    def get_cases(self, case_ids):
+        self.calls.append(case_ids)
+        return list(case_ids)
+
+
+class TestBatchCases(SimpleTestCase):
+
+    def test_serial(self):
+        accessor = FakeAccessor()
+        case_ids = [str(n) for n in range(2500)]
+        batches = list(batch_cases(accessor, case_ids))
+        self.assertEqual([len(b) for b in batches], [1000, 1000, 500])
+        self.assertEqual([c for b in batches for c in b], case_ids)
+
+    def test_concurrent(self):
+        accessor = FakeAccessor()
+        case_ids = [str(n) for n in range(4500)]
+        timing = TimingContext("test")
+        with timing:
+            batches = list(batch_cases(accessor, case_ids, timing, max_workers=3))
+        self.assertEqual(sorted(len(b) for b in batches), [500, 1000, 1000, 1000, 1000])
+        self.assertEqual(sorted(c for b in batches for c in b), sorted(case_ids))
+        timers = timing.to_list(exclude_root=True)
+        self.assertEqual(len(timers), 5)
+        self.assertTrue(all(t.name.startswith("fetch_cases(") for t in timers), timers)
@@ -0,0 +1,72 @@
+import pickle
+from datetime import datetime
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from casexml.apps.phone.data_providers.case.livequery import CaseGraph
+from corehq.form_processor.models import CommCareCaseIndex
+from corehq.form_processor.tests.utils import sharded
+from corehq.util.test_utils import flag_enabled
+
+from . import test_extension_indexes as base
+
+
+@sharded
+@flag_enabled('LIVEQUERY_CASE_GRAPH_CACHE')
+@flag_enabled('LIVEQUERY_CASE_GRAPH_CACHE_CHECK')
+class CachedCaseGraphIndexTreeTest(base.IndexTreeTest):
+    """Run case relationship tests with a persisted case graph
+
+    Each test syncs once more after the cases are created, so that the
+    sync of the test uses the persisted graph, and is checked against a
+    full case graph walk. Tests fail if the persisted graph was not used,
+    or if it does not match.
+    """
+
+    def setUp(self):
+        super().setUp()
+        patcher = patch('casexml.apps.phone.data_providers.case.livequery.metrics_counter')
+        self.metrics_counter = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def build_case_structures(self, test):
+        super().build_case_structures(test)
+        # persist the case graph of the cases
+        self.device.sync(restore_id='')
+
+    def tearDown(self):
+        metrics = [
+            (call.args[0], call.kwargs.get('tags', {}).get('result'))
+            for call in self.metrics_counter.call_args_list
+        ]
+        # skipped tests don't sync
+        if metrics:
+            self.assertNotIn('commcare.restore.case_graph_cache.mismatch', [name for name, _ in metrics])
+            self.assertIn(('commcare.restore.case_graph_cache', 'hit'), metrics)
+        super().tearDown()
+
+
+class TestCaseGraph(SimpleTestCase):
+
+    def test_pickle(self):
+        graph = CaseGraph(["a", "b"])
+        graph.live_ids.update(["a", "b", "c"])
+        graph.extensions_by_host["c"].add("a")
+        graph.indices["a"].append(CommCareCaseIndex(
+            domain="test",
+            case_id="a",
+            identifier="host",
+            referenced_id="c",
+            referenced_type="host-type",
+            relationship_id=CommCareCaseIndex.EXTENSION,
+        ))
+        graph.timestamp = datetime.utcnow()
+
+        copy = pickle.loads(pickle.dumps(graph))
+
+        self.assertEqual(copy, graph)
+        self.assertEqual(copy.timestamp, graph.timestamp)
+        self.assertEqual(copy.extensions_by_host, {"c": {"a"}})
+        self.assertEqual(copy.indices["a"][0].relationship, "extension")
+        self.assertEqual(copy.indices["missing"], [])
@@ -1,3 +1,5 @@
+import os
+
 from django.test import TestCase
 from django.test.testcases import SimpleTestCase
 from corehq.apps.users.dbaccessors import delete_all_users
@@ -73,3 +75,19 @@ class TestRestoreContent(SimpleTestCase):
             response.append(body.encode('utf-8'))
             with response.get_fileobj() as fileobj:
                 self.assertEqual(expected, fileobj.read().decode('utf-8'))
+
+    def test_seek(self):
+        user = 'user1'
+        body = '<elem>data0</elem>'
+        expected = self._expected(user, body * 1000).encode('utf-8')
+        with RestoreContent(user, False) as response:
+            for x in range(1000):
+                response.append(body.encode('utf-8'))
+            with response.get_fileobj() as fileobj:
+                self.assertEqual(fileobj.seek(0, os.SEEK_END), len(expected))
+                self.assertEqual(fileobj.tell(), len(expected))
+                fileobj.seek(-30, os.SEEK_END)
+                self.assertEqual(fileobj.read(), expected[-30:])
+                fileobj.seek(0)
+                self.assertEqual(fileobj.read(100), expected[:100])
+                self.assertEqual(fileobj.read(), expected[100:])
@@ -75,12 +75,26 @@ def get_or_cache_global_fixture(domain, user_id, cache_bucket_prefix,
 
 
 def write_fixture_items_to_io(items):
+    """Write XML elements to a file-like object, prefixed with their count
+
+    Items may also be byte strings of elements that were written with
+    this function, in which case their elements are counted.
+    """
+    num_items = 0
+    elements = []
+    for element in items:
+        if isinstance(element, bytes):
+            element, num = get_cached_items_with_count(element)
+        else:
+            element, num = ElementTree.tostring(element, encoding='utf-8'), 1
+        elements.append(element)
+        num_items += num
     io = BytesIO()
     io.write(ITEMS_COMMENT_PREFIX)
-    io.write(six.text_type(len(items)).encode('utf-8'))
+    io.write(six.text_type(num_items).encode('utf-8'))
     io.write(b'-->')
-    for element in items:
-        io.write(ElementTree.tostring(element, encoding='utf-8'))
+    for element in elements:
+        io.write(element)
     io.seek(0)
     return io
 
@@ -19,6 +19,8 @@ def get_writer(format, use_formatted_cells=False):
             Format.XLS: writers.Excel2003ExportWriter,
             Format.UNZIPPED_CSV: writers.UnzippedCsvExportWriter,
             Format.PYTHON_DICT: writers.PythonDictWriter,
+            Format.PARQUET: writers.ParquetExportWriter,
+            Format.ARROW: writers.ArrowExportWriter,
         }[format]()
     except KeyError:
         raise UnsupportedExportFormat("Unsupported export format: %s!" % format)
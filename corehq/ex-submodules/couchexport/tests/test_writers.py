@@ -1,17 +1,25 @@
 from codecs import BOM_UTF8
 from contextlib import closing
+import datetime
 import io
 import os
+import zipfile
 
 from django.test import SimpleTestCase
 from lxml import html, etree
 from unittest.mock import patch, Mock
+import openpyxl
+import pyarrow as pa
+import pyarrow.parquet as pq
 
-from couchexport.export import export_from_tables
+from couchexport.export import FormattedRow, export_from_tables
 from couchexport.models import Format
 from couchexport.writers import (
     MAX_XLS_COLUMNS,
+    ArrowExportWriter,
     CsvFileWriter,
+    Excel2007ExportWriter,
+    ParquetExportWriter,
     PythonDictWriter,
     XlsLengthException,
     ZippedExportWriter,
@@ -83,6 +91,16 @@ class CsvFileWriterTests(SimpleTestCase):
         file_start = writer.get_file().read(6)
         self.assertEqual(file_start, BOM_UTF8 + b'100')
 
+    def test_csv_file_writer_write_rows(self):
+        writer = CsvFileWriter()
+        writer.open('Spam')
+        writer.write_rows([['ham', 'spam, eggs'], [b'h\xc3\xa1m', 3]])
+        writer.finish()
+        self.assertEqual(
+            writer.get_file().read(),
+            BOM_UTF8 + 'ham,"spam, eggs"\r\nhám,3\r\n'.encode('utf-8')
+        )
+
 
 class HtmlExportWriterTests(SimpleTestCase):
 
@@ -120,6 +138,82 @@ class Excel2007ExportWriterTests(SimpleTestCase):
         tables = [[b'table\xe2\x80\x93title', table]]
         export_from_tables(tables, file_, format_)
 
+    def test_write_rows(self):
+        file_ = io.BytesIO()
+        writer = Excel2007ExportWriter()
+        writer.open([('table', [['url', 'name']])], file_)
+        writer.write_rows('table', [
+            ['https://example.com', 'plain'],
+            FormattedRow(['https://example.com', 'link'], hyperlink_column_indices=[0]),
+        ])
+        writer.close()
+
+        sheet = openpyxl.load_workbook(file_).active
+        self.assertEqual(
+            [[cell.value for cell in row] for row in sheet.iter_rows()],
+            [['url', 'name'], ['https://example.com', 'plain'], ['https://example.com', 'link']],
+        )
+        self.assertIsNone(sheet['A2'].hyperlink)
+        self.assertEqual(sheet['A3'].hyperlink.target, 'https://example.com')
+
+
+class ColumnarExportWriterTests(SimpleTestCase):
+    headers = ['name', 'count', 'amount', 'day', 'time']
+    column_types = ['string', 'integer', 'decimal', 'date', 'datetime']
+    rows = [
+        ['a', '3', '1.5', '2021-03-04', '2021-03-04T10:20:30.000000Z'],
+        [None, '---', '', 'not a date', '2021-03-04'],
+    ]
+    expected_rows = [
+        {
+            'name': 'a',
+            'count': 3,
+            'amount': 1.5,
+            'day': datetime.date(2021, 3, 4),
+            'time': datetime.datetime(2021, 3, 4, 10, 20, 30),
+        },
+        {
+            'name': '',
+            'count': None,
+            'amount': None,
+            'day': None,
+            'time': datetime.datetime(2021, 3, 4),
+        },
+    ]
+
+    def _write(self, writer, column_types):
+        file_ = io.BytesIO()
+        writer.open([('table', [self.headers])], file_, archive_basepath='export',
+                    column_types=column_types)
+        writer.write_rows('table', self.rows)
+        writer.close()
+        with zipfile.ZipFile(file_) as archive:
+            self.assertEqual(archive.namelist(), ['export/table' + writer.table_file_extension])
+            return archive.read(archive.namelist()[0])
+
+    def test_parquet(self):
+        data = self._write(ParquetExportWriter(), {'table': self.column_types})
+        table = pq.read_table(pa.BufferReader(data))
+        self.assertEqual(
+            [str(field.type) for field in table.schema],
+            ['string', 'int64', 'double', 'date32[day]', 'timestamp[us]'],
+        )
+        self.assertEqual(table.to_pylist(), self.expected_rows)
+
+    def test_arrow(self):
+        data = self._write(ArrowExportWriter(), {'table': self.column_types})
+        table = pa.ipc.open_file(pa.BufferReader(data)).read_all()
+        self.assertEqual(table.to_pylist(), self.expected_rows)
+
+    def test_without_column_types(self):
+        data = self._write(ParquetExportWriter(), None)
+        table = pq.read_table(pa.BufferReader(data))
+        self.assertEqual(table.to_pylist(), [
+            {'name': 'a', 'count': '3', 'amount': '1.5', 'day': '2021-03-04',
+             'time': '2021-03-04T10:20:30.000000Z'},
+            {'name': '', 'count': '---', 'amount': '', 'day': 'not a date', 'time': '2021-03-04'},
+        ])
+
 
 class Excel2003ExportWriterTests(SimpleTestCase):
 
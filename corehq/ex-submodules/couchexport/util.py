@@ -7,6 +7,20 @@ from openpyxl.styles import numbers
 
 from corehq.apps.export.const import EMPTY_VALUE, MISSING_VALUE
 
+# column types of columnar export formats
+COLUMN_TYPE_STRING = 'string'
+COLUMN_TYPE_INTEGER = 'integer'
+COLUMN_TYPE_DECIMAL = 'decimal'
+COLUMN_TYPE_DATE = 'date'
+COLUMN_TYPE_DATETIME = 'datetime'
+COLUMN_TYPES = (
+    COLUMN_TYPE_STRING,
+    COLUMN_TYPE_INTEGER,
+    COLUMN_TYPE_DECIMAL,
+    COLUMN_TYPE_DATE,
+    COLUMN_TYPE_DATETIME,
+)
+
 _dirty_chars = re.compile(
     '[\x00-\x08\x0b-\x1f\x7f-\x84\x86-\x9f\ud800-\udfff\ufdd0-\ufddf\ufffe-\uffff]'
 )
@@ -176,6 +190,38 @@ def get_legacy_excel_safe_value(value):
     return _dirty_chars.sub('?', value)
 
 
+def get_columnar_value(value, column_type):
+    """
+    Convert an export value to the python value of a column of type
+    ``column_type`` in a columnar export. Missing or empty values, and
+    values that can't be converted, are None.
+    """
+    if isinstance(value, bytes):
+        value = value.decode('utf-8')
+    if column_type == COLUMN_TYPE_STRING:
+        return None if value is None else str(value)
+    if value is None or value == MISSING_VALUE or value == EMPTY_VALUE:
+        return None
+    try:
+        if column_type == COLUMN_TYPE_INTEGER:
+            return value if isinstance(value, int) else int(value)
+        if column_type == COLUMN_TYPE_DECIMAL:
+            return float(value)
+        if isinstance(value, str):
+            value = parse_datetime(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    if not isinstance(value, datetime.date):
+        return None
+    if column_type == COLUMN_TYPE_DATE:
+        return value.date() if isinstance(value, datetime.datetime) else value
+    if column_type == COLUMN_TYPE_DATETIME:
+        if isinstance(value, datetime.datetime):
+            return value
+        return datetime.datetime.combine(value, datetime.time())
+    raise ValueError("Unknown column type: {}".format(column_type))
+
+
 def parse_datetime(val, ignoretz=True):
     # openpyxl does not accept tz aware datetimes
     return dateutil.parser.parse(val, ignoretz=ignoretz)
@@ -18,7 +18,16 @@ from couchexport.models import Format
 from openpyxl.styles import numbers
 from openpyxl.cell import WriteOnlyCell
 
-from couchexport.util import get_excel_format_value, get_legacy_excel_safe_value
+from couchexport.util import (
+    COLUMN_TYPE_DATE,
+    COLUMN_TYPE_DATETIME,
+    COLUMN_TYPE_DECIMAL,
+    COLUMN_TYPE_INTEGER,
+    COLUMN_TYPE_STRING,
+    get_columnar_value,
+    get_excel_format_value,
+    get_legacy_excel_safe_value,
+)
 
 MAX_XLS_COLUMNS = 256
 
@@ -95,6 +104,10 @@ class ExportFileWriter(object):
     def write_row(self, row):
         raise NotImplementedError
 
+    def write_rows(self, rows):
+        for row in rows:
+            self.write_row(row)
+
     def _end_file(self):
         pass
 
@@ -116,15 +129,116 @@ class CsvFileWriter(ExportFileWriter):
         self._file.write(BOM_UTF8)
 
     def write_row(self, row):
+        self.write_rows([row])
+
+    def write_rows(self, rows):
         buffer = io.StringIO()
         csvwriter = csv.writer(buffer, csv.excel)
-        csvwriter.writerow([
-            col.decode('utf-8') if isinstance(col, bytes) else col
-            for col in row
-        ])
+        csvwriter.writerows(
+            [col.decode('utf-8') if isinstance(col, bytes) else col for col in row]
+            for row in rows
+        )
         self._file.write(buffer.getvalue().encode('utf-8'))
 
 
+class ColumnarFileWriter(ExportFileWriter):
+    """
+    Writes a table to a columnar file. The first row written is the
+    headers. Other rows are buffered and written in row groups of
+    ``row_group_size`` rows.
+
+    :param column_types: the column type of each header. Columns are
+        strings if it is not given.
+    """
+    row_group_size = 50000
+
+    def __init__(self, column_types=None):
+        super(ColumnarFileWriter, self).__init__()
+        self.column_types = column_types
+        self._schema = None
+        self._writer = None
+        self._rows = []
+
+    def _open_writer(self, schema):
+        raise NotImplementedError
+
+    def write_row(self, row):
+        self.write_rows([row])
+
+    def write_rows(self, rows):
+        if self._writer is None:
+            headers, rows = rows[0], rows[1:]
+            self._open_table(headers)
+        self._rows.extend(rows)
+        if len(self._rows) >= self.row_group_size:
+            self._write_row_group()
+
+    def _open_table(self, headers):
+        import pyarrow as pa
+
+        headers = [
+            header.decode('utf-8') if isinstance(header, bytes) else str(header)
+            for header in headers
+        ]
+        column_types = self.column_types
+        if not column_types or len(column_types) != len(headers):
+            column_types = [COLUMN_TYPE_STRING] * len(headers)
+        self._column_types = column_types
+        self._schema = pa.schema([
+            (header, _get_arrow_type(column_type))
+            for header, column_type in zip(headers, column_types)
+        ])
+        self._writer = self._open_writer(self._schema)
+
+    def _write_row_group(self):
+        import pyarrow as pa
+
+        arrays = [
+            pa.array(
+                [get_columnar_value(row[i], column_type) for row in self._rows],
+                type=self._schema.field(i).type,
+            )
+            for i, column_type in enumerate(self._column_types)
+        ]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+        self._rows = []
+
+    def _end_file(self):
+        if self._writer is None:
+            return
+        if self._rows:
+            self._write_row_group()
+        self._writer.close()
+
+
+def _get_arrow_type(column_type):
+    import pyarrow as pa
+
+    return {
+        COLUMN_TYPE_STRING: pa.string(),
+        COLUMN_TYPE_INTEGER: pa.int64(),
+        COLUMN_TYPE_DECIMAL: pa.float64(),
+        COLUMN_TYPE_DATE: pa.date32(),
+        COLUMN_TYPE_DATETIME: pa.timestamp('us'),
+    }[column_type]
+
+
+class ParquetFileWriter(ColumnarFileWriter):
+
+    def _open_writer(self, schema):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(self._file, schema)
+
+
+class ArrowFileWriter(ColumnarFileWriter):
+
+    def _open_writer(self, schema):
+        import pyarrow as pa
+
+        return pa.ipc.new_file(self._file, schema)
+
+
 class PartialHtmlFileWriter(ExportFileWriter):
 
     def _write_from_template(self, context):
@@ -161,14 +275,18 @@ class ExportWriter(object):
     max_table_name_size = 500
     target_app = 'Excel'  # Where does this writer export to? Export button to say "Export to Excel"
 
-    def open(self, header_table, file, max_column_size=2000, table_titles=None, archive_basepath=''):
+    def open(self, header_table, file, max_column_size=2000, table_titles=None, archive_basepath='',
+             column_types=None):
         """
         Create any initial files, headings, etc necessary.
         :param header_table: tuple of one of the following formats
             tuple(sheet_name, [['col1header', 'col2header', ....]])
             tuple(sheet_name, [FormattedRow])
+        :param column_types: dict of table index to the column type of
+            each header. Only used by columnar formats.
         """
         table_titles = table_titles or {}
+        self.column_types = column_types or {}
 
         self._isopen = True
         self.max_column_size = max_column_size
@@ -241,6 +359,14 @@ class ExportWriter(object):
         """
         return self._write_row(table_index, row)
 
+    def write_rows(self, table_index, rows):
+        """
+        Write many rows to a table. Unlike ``write`` this does not
+        update the ids of rows.
+        """
+        assert self._isopen
+        return self._write_rows(table_index, rows)
+
     def close(self):
         """
         Close any open file references, do any cleanup.
@@ -258,6 +384,11 @@ class ExportWriter(object):
     def _write_row(self, sheet_index, row):
         raise NotImplementedError
 
+    def _write_rows(self, sheet_index, rows):
+        # subclasses can override this to write rows more efficiently
+        for row in rows:
+            self._write_row(sheet_index, row)
+
     def _close(self):
         raise NotImplementedError
 
@@ -286,6 +417,9 @@ class OnDiskExportWriter(ExportWriter):
         self.table_names[table_index] = table_title
 
     def _write_row(self, sheet_index, row):
+        self._write_rows(sheet_index, [row])
+
+    def _write_rows(self, sheet_index, rows):
 
         def _transform(val):
             if val is None:
@@ -294,8 +428,7 @@ class OnDiskExportWriter(ExportWriter):
                 val = val.encode("utf8")
             return val
 
-        row = list(map(_transform, row))
-        self.tables[sheet_index].write_row(row)
+        self.tables[sheet_index].write_rows([list(map(_transform, row)) for row in rows])
 
     def _close(self):
         """
@@ -344,6 +477,32 @@ class CsvExportWriter(ZippedExportWriter):
     format = Format.CSV
 
 
+class ColumnarExportWriter(ZippedExportWriter):
+    """
+    Writer that creates a zip file containing a columnar file for each
+    table, with the column types passed to ``open``.
+    """
+    _write_row_force_to_bytes = False
+
+    def _init_table(self, table_index, table_title):
+        writer = self.writer_class(self.column_types.get(table_index))
+        self.tables[table_index] = writer
+        writer.open(table_title)
+        self.table_names[table_index] = table_title
+
+
+class ParquetExportWriter(ColumnarExportWriter):
+    writer_class = ParquetFileWriter
+    table_file_extension = ".parquet"
+    format = Format.PARQUET
+
+
+class ArrowExportWriter(ColumnarExportWriter):
+    writer_class = ArrowFileWriter
+    table_file_extension = ".arrow"
+    format = Format.ARROW
+
+
 class UnzippedCsvExportWriter(OnDiskExportWriter):
     """
     Serve the first table as a csv
@@ -380,33 +539,41 @@ class Excel2007ExportWriter(ExportWriter):
         self.table_indices[table_index] = 0
 
     def _write_row(self, sheet_index, row):
+        self._write_rows(sheet_index, [row])
+
+    def _write_rows(self, sheet_index, rows):
         from couchexport.export import FormattedRow
         sheet = self.tables[sheet_index]
-
-        cells = []
-        for col_ind, val in enumerate(row):
-            skip_formatting_on_row = (isinstance(row, FormattedRow)
-                                      and col_ind in row.skip_excel_formatting)
-
-            if (self.use_formatted_cells
-                    and not skip_formatting_on_row
-                    and not self.format_as_text):
-                excel_format, val_fmt = get_excel_format_value(val)
-                cell = WriteOnlyCell(sheet, val_fmt)
-                cell.number_format = excel_format
-            else:
-                cell = WriteOnlyCell(sheet, get_legacy_excel_safe_value(val))
-                if self.format_as_text:
-                    cell.number_format = numbers.FORMAT_TEXT
-
-            cells.append(cell)
-
-        if isinstance(row, FormattedRow):
-            for hyperlink_column_index in row.hyperlink_column_indices:
+        use_formatted_cells = self.use_formatted_cells and not self.format_as_text
+        format_as_text = self.format_as_text
+
+        for row in rows:
+            is_formatted_row = isinstance(row, FormattedRow)
+            hyperlink_column_indices = row.hyperlink_column_indices if is_formatted_row else ()
+            if not (use_formatted_cells or format_as_text or hyperlink_column_indices):
+                # the write-only sheet creates the cells for plain values
+                sheet.append([get_legacy_excel_safe_value(val) for val in row])
+                continue
+
+            skip_excel_formatting = row.skip_excel_formatting if is_formatted_row else ()
+            cells = []
+            for col_ind, val in enumerate(row):
+                if use_formatted_cells and col_ind not in skip_excel_formatting:
+                    excel_format, val_fmt = get_excel_format_value(val)
+                    cell = WriteOnlyCell(sheet, val_fmt)
+                    cell.number_format = excel_format
+                else:
+                    cell = WriteOnlyCell(sheet, get_legacy_excel_safe_value(val))
+                    if format_as_text:
+                        cell.number_format = numbers.FORMAT_TEXT
+
+                cells.append(cell)
+
+            for hyperlink_column_index in hyperlink_column_indices:
                 cells[hyperlink_column_index].hyperlink = cells[hyperlink_column_index].value
                 cells[hyperlink_column_index].style = 'Hyperlink'
 
-        sheet.append(cells)
+            sheet.append(cells)
 
     def _close(self):
         """
@@ -462,6 +629,9 @@ class InMemoryExportWriter(ExportWriter):
         # have to deal with primary ids
         table.append(list(row))
 
+    def _write_rows(self, sheet_index, rows):
+        self.tables[sheet_index].extend(list(row) for row in rows)
+
     def _close(self):
         pass
 
@@ -1,23 +1,25 @@
 import time
 from abc import ABCMeta, abstractproperty, abstractmethod
 from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from django.conf import settings
+from django.db import connections
 from memoized import memoized
 
 import sys
 
 from sentry_sdk import configure_scope
 
-from corehq.util.metrics import metrics_counter, metrics_gauge
+from corehq.util.metrics import metrics_counter, metrics_gauge, metrics_histogram
 from corehq.util.metrics.const import MPM_MAX
 from corehq.util.timer import TimingContext
 from dimagi.utils.logging import notify_exception
 from kafka.common import TopicPartition
 from pillowtop.const import CHECKPOINT_MIN_WAIT
 from pillowtop.dao.exceptions import DocumentMissingError
-from pillowtop.utils import force_seq_int
+from pillowtop.utils import bulk_fetch_changes_docs, force_seq_int
 from pillowtop.exceptions import PillowtopCheckpointReset
 from pillowtop.logger import pillow_logging
 
@@ -45,6 +47,66 @@ class PillowRuntimeContext(object):
         self.changes_seen = 0
 
 
+class ChunkSizer(object):
+    """
+    Decides when a queued chunk of changes should be processed.
+
+    A chunk is processed once it has ``chunk_size`` changes, or once its
+    first change has waited for ``max_wait_seconds``.
+    """
+
+    def __init__(self, chunk_size, max_wait_seconds=30):
+        self.chunk_size = chunk_size
+        self.max_wait_seconds = max_wait_seconds
+
+    def should_process(self, changes_chunk, chunk_started):
+        if not changes_chunk:
+            return False
+        if len(changes_chunk) >= self.chunk_size:
+            return True
+        return (datetime.utcnow() - chunk_started).total_seconds() >= self.max_wait_seconds
+
+    def update(self, num_changes, duration, get_lag):
+        """Called after processing a chunk of ``num_changes`` in ``duration`` seconds
+
+        :param get_lag: function returning the number of changes not yet read
+            from the change feed, or ``None`` if that is not known.
+        """
+        pass
+
+
+class AdaptiveChunkSizer(ChunkSizer):
+    """
+    Adapts chunk size to keep change latency within ``latency_target`` seconds.
+
+    Half of the target is allowed for waiting to fill a chunk and half for
+    processing it. While the pillow is behind, chunks grow (up to the size
+    that can be processed within the target) since larger chunks amortise
+    the per-chunk overhead of the processors. Once caught up, they shrink
+    back towards the configured size.
+    """
+
+    def __init__(self, chunk_size, latency_target, min_chunk_size=None, max_chunk_size=None):
+        super().__init__(chunk_size, max_wait_seconds=latency_target / 2)
+        self.base_chunk_size = chunk_size
+        self.min_chunk_size = min_chunk_size or max(1, chunk_size // 10)
+        self.max_chunk_size = max_chunk_size or chunk_size * 10
+        self.target_seconds = latency_target / 2
+
+    def update(self, num_changes, duration, get_lag):
+        if duration > 0:
+            # the largest chunk that can be processed within the target
+            size_limit = self.target_seconds * num_changes / duration
+        else:
+            size_limit = self.max_chunk_size
+        lag = get_lag()
+        if lag is not None and lag >= self.chunk_size:
+            size = min(self.chunk_size * 2, size_limit)
+        else:
+            size = min((self.chunk_size + self.base_chunk_size) // 2, size_limit)
+        self.chunk_size = max(self.min_chunk_size, min(self.max_chunk_size, int(size)))
+
+
 class PillowBase(metaclass=ABCMeta):
     """
     This defines the external pillowtop API. Everything else should be considered a specialization
@@ -55,6 +117,12 @@ class PillowBase(metaclass=ABCMeta):
     retry_errors = True
     # this will be the batch size for processors that support batch processing
     processor_chunk_size = 0
+    # set to true to run all processors concurrently on each chunk
+    # (only applies when processor_chunk_size is set)
+    parallel_processors = False
+    # target seconds between a change being read and processed. If set, the
+    # chunk size is adapted to meet it, otherwise chunks are a fixed size
+    processor_chunk_latency_target = None
 
     @abstractproperty
     def pillow_id(self):
@@ -148,17 +216,22 @@ class PillowBase(metaclass=ABCMeta):
             at the end of the batch, otherwise is updated for every change.
         """
         context = PillowRuntimeContext(changes_seen=0)
-        min_wait_seconds = 30
+        chunk_sizer = self._get_chunk_sizer()
 
         def process_offset_chunk(chunk, context):
             if not chunk:
                 return
-            self._batch_process_with_error_handling(chunk)
+            timer = TimingContext()
+            with timer:
+                self._batch_process_with_error_handling(chunk)
+            # update checkpoint for just the latest change
             self._update_checkpoint(chunk[-1], context)
+            chunk_sizer.update(len(chunk), timer.duration, self._get_change_feed_lag)
+            self._record_chunk_size_in_datadog(chunk_sizer.chunk_size)
 
         # keep track of chunk for batch processors
         changes_chunk = []
-        last_process_time = datetime.utcnow()
+        chunk_started = None
 
         try:
             for change in self.get_change_feed().iter_changes(since=since or None, forever=forever):
@@ -167,14 +240,11 @@ class PillowBase(metaclass=ABCMeta):
                     if self.batch_processors:
                         # Queue and process in chunks for both batch
                         #   and serial processors
+                        if not changes_chunk:
+                            chunk_started = datetime.utcnow()
                         changes_chunk.append(change)
-                        chunk_full = len(changes_chunk) == self.processor_chunk_size
-                        time_elapsed = (datetime.utcnow() - last_process_time).seconds > min_wait_seconds
-                        if chunk_full or time_elapsed:
-                            last_process_time = datetime.utcnow()
-                            self._batch_process_with_error_handling(changes_chunk)
-                            # update checkpoint for just the latest change
-                            self._update_checkpoint(changes_chunk[-1], context)
+                        if chunk_sizer.should_process(changes_chunk, chunk_started):
+                            process_offset_chunk(changes_chunk, context)
                             # reset for next chunk
                             changes_chunk = []
                     else:
@@ -183,6 +253,10 @@ class PillowBase(metaclass=ABCMeta):
                         self._record_change_in_datadog(change, processing_time)
                         self._update_checkpoint(change, context)
                 else:
+                    # change feed is idle, don't hold on to a partial chunk for too long
+                    if chunk_sizer.should_process(changes_chunk, chunk_started):
+                        process_offset_chunk(changes_chunk, context)
+                        changes_chunk = []
                     self._update_checkpoint(None, None)
             process_offset_chunk(changes_chunk, context)
         except PillowtopCheckpointReset:
@@ -192,6 +266,31 @@ class PillowBase(metaclass=ABCMeta):
             if context.changes_seen and change:
                 self._update_checkpoint(change, context)
 
+    def _get_chunk_sizer(self):
+        if self.processor_chunk_latency_target:
+            return AdaptiveChunkSizer(self.processor_chunk_size, self.processor_chunk_latency_target)
+        return ChunkSizer(self.processor_chunk_size)
+
+    def _get_change_feed_lag(self):
+        """
+        :returns: the number of changes in the feed that have not been read yet,
+            or None if the change feed does not have integer offsets
+        """
+        change_feed = self.get_change_feed()
+        try:
+            latest_offsets = change_feed.get_latest_offsets()
+            processed_offsets = change_feed.get_processed_offsets()
+        except Exception:
+            pillow_logging.exception("[%s] Error getting change feed offsets", self.get_name())
+            return None
+        if not isinstance(latest_offsets, dict) or not isinstance(processed_offsets, dict):
+            return None
+        return sum(
+            max(0, latest_offsets[topic] - offset - 1)
+            for topic, offset in processed_offsets.items()
+            if topic in latest_offsets
+        )
+
     def _batch_process_with_error_handling(self, changes_chunk):
         """
         Process given chunk in batch mode first on batch-processors
@@ -203,46 +302,108 @@ class PillowBase(metaclass=ABCMeta):
 
             If there is an exception in chunked processing, falls back
             to serial processing.
-        """
-        processing_time = 0
 
-        def reprocess_serially(chunk, processor):
-            for change in chunk:
-                self.process_with_error_handling(change, processor)
+            If ``parallel_processors`` is set, docs are fetched in bulk up
+            front and each processor then processes the chunk in its own
+            thread. This returns only once all processors are done, so the
+            checkpoint is not advanced past changes that are still in flight.
+        """
+        if self.parallel_processors and changes_chunk:
+            changes_chunk = self._deduplicate_changes(changes_chunk)
+            processing_time = self._process_chunk_in_parallel(changes_chunk)
+            self._record_datadog_metrics(changes_chunk, processing_time)
+            return
 
+        processing_time = 0
         for processor in self.batch_processors:
             if not changes_chunk:
                 return set(), 0
 
             changes_chunk = self._deduplicate_changes(changes_chunk)
-            timer = TimingContext()
-            with timer:
-                try:
-                    retry_changes, change_exceptions = processor.process_changes_chunk(changes_chunk)
-                except Exception as ex:
-                    notify_exception(
-                        None,
-                        "{pillow_name} Error in processing changes chunk: {ex}".format(
-                            pillow_name=self.get_name(),
-                            ex=ex
-                        ),
-                        details={
-                            'change_ids': [c.id for c in changes_chunk]
-                        })
-                    self._record_batch_exception_in_datadog(processor)
-                    # fall back to processing one by one
-                    reprocess_serially(changes_chunk, processor)
-                else:
-                    # fall back to processing one by one for failed changes
-                    for change, exception in change_exceptions:
-                        handle_pillow_error(self, change, exception)
-                    reprocess_serially(retry_changes, processor)
-                processing_time += timer.duration
+            processing_time += self._process_chunk_on_batch_processor(processor, changes_chunk)
         # process on serial_processors
         for change in changes_chunk:
             processing_time += self.process_with_error_handling(change)
         self._record_datadog_metrics(changes_chunk, processing_time)
 
+    def _process_chunk_on_batch_processor(self, processor, changes_chunk):
+        def reprocess_serially(chunk, processor):
+            for change in chunk:
+                self.process_with_error_handling(change, processor)
+
+        timer = TimingContext()
+        with timer:
+            try:
+                retry_changes, change_exceptions = processor.process_changes_chunk(changes_chunk)
+            except Exception as ex:
+                notify_exception(
+                    None,
+                    "{pillow_name} Error in processing changes chunk: {ex}".format(
+                        pillow_name=self.get_name(),
+                        ex=ex
+                    ),
+                    details={
+                        'change_ids': [c.id for c in changes_chunk]
+                    })
+                self._record_batch_exception_in_datadog(processor)
+                # fall back to processing one by one
+                reprocess_serially(changes_chunk, processor)
+            else:
+                # fall back to processing one by one for failed changes
+                for change, exception in change_exceptions:
+                    handle_pillow_error(self, change, exception)
+                reprocess_serially(retry_changes, processor)
+        return timer.duration
+
+    def _process_chunk_on_serial_processor(self, processor, changes_chunk):
+        return sum(
+            self.process_with_error_handling(change, processor)
+            for change in changes_chunk
+        )
+
+    def _process_chunk_in_parallel(self, changes_chunk):
+        """Process the chunk on all processors concurrently
+
+        :returns: the wall clock time taken by the slowest processor
+        """
+        def process(processor, process_chunk):
+            try:
+                duration = process_chunk(processor, changes_chunk)
+            finally:
+                connections.close_all()  # connections of this worker thread
+            self._record_processor_time_in_datadog(processor, duration)
+
+        tasks = [
+            (processor, self._process_chunk_on_batch_processor)
+            for processor in self.batch_processors
+        ] + [
+            (processor, self._process_chunk_on_serial_processor)
+            for processor in self.serial_processors
+        ]
+        timer = TimingContext()
+        with timer:
+            self._prefetch_documents(changes_chunk)
+            with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+                futures = [executor.submit(process, *task) for task in tasks]
+                for future in futures:
+                    # re-raise errors from processor threads
+                    future.result()
+        return timer.duration
+
+    def _prefetch_documents(self, changes_chunk):
+        # fetch docs once for all processors, which share them via change.get_document
+        changes = [
+            change for change in changes_chunk
+            if change.metadata is not None and change.should_fetch_document()
+        ]
+        if not changes:
+            return
+        try:
+            bulk_fetch_changes_docs(changes)
+        except Exception as ex:
+            # processors will fetch their own docs
+            pillow_logging.exception("[%s] Error prefetching documents: %s", self.get_name(), ex)
+
     def process_with_error_handling(self, change, processor=None):
         # process given change on all serial processors or given processor.
         # Tracks success/fail in datadog but not the timer metric, caller updates that
@@ -349,6 +510,21 @@ class PillowBase(metaclass=ABCMeta):
             processing_time=processing_time, add_case_type_tag=True
         )
 
+    def _record_chunk_size_in_datadog(self, chunk_size):
+        metrics_gauge('commcare.change_feed.chunk_size', chunk_size, tags={
+            'pillow_name': self.get_name(),
+        }, multiprocess_mode=MPM_MAX)
+
+    def _record_processor_time_in_datadog(self, processor, duration):
+        metrics_histogram(
+            'commcare.change_feed.processor.duration.seconds', duration,
+            bucket_tag='duration', buckets=(0.1, 0.5, 1, 5, 10, 30, 60), bucket_unit='s',
+            tags={
+                'pillow_name': self.get_name(),
+                'processor': processor.__class__.__name__,
+            }
+        )
+
     def _record_batch_exception_in_datadog(self, processor):
         metrics_counter(
             "commcare.change_feed.batch_processor_exceptions",
@@ -429,11 +605,14 @@ class ConstructedPillow(PillowBase):
 
     def __init__(self, name, checkpoint, change_feed, processor, process_num=0,
                  change_processed_event_handler=None, processor_chunk_size=0,
-                 is_dedicated_migration_process=False):
+                 is_dedicated_migration_process=False, parallel_processors=False,
+                 processor_chunk_latency_target=None):
         self._name = name
         self._checkpoint = checkpoint
         self._change_feed = change_feed
         self.processor_chunk_size = processor_chunk_size
+        self.parallel_processors = parallel_processors
+        self.processor_chunk_latency_target = processor_chunk_latency_target
         if isinstance(processor, list):
             self.processors = processor
         else:
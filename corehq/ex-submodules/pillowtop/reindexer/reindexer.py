@@ -14,11 +14,15 @@ from pillowtop.pillow.interface import ConstructedPillow
 from pillowtop.utils import ErrorCollector, build_bulk_payload
 
 from corehq.apps.change_feed.document_types import is_deletion
+from corehq.apps.es.client import get_client, reset_clients
 from corehq.util.argparse_types import date_type
 from corehq.util.doc_processor.interface import (
     BaseDocProcessor,
     BulkDocProcessor,
 )
+from corehq.util.doc_processor.parallel import (
+    ParallelDocumentProcessorController,
+)
 
 MAX_TRIES = 3
 RETRY_TIME_DELAY_FACTOR = 15
@@ -90,6 +94,17 @@ class ReindexerFactory(metaclass=ABCMeta):
             help='Number of docs to process at a time'
         )
 
+    @staticmethod
+    def parallel_reindexer_args(parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            action='store',
+            dest='workers',
+            default=1,
+            help='Number of processes to reindex with. Each SQL database is processed by a single process.'
+        )
+
     @staticmethod
     def limit_db_args(parser):
         parser.add_argument(
@@ -201,6 +216,11 @@ class BulkPillowReindexProcessor(BaseDocProcessor):
             return not self.doc_filter(doc)
         return True
 
+    def reset_connections(self):
+        # don't share the Elasticsearch connections of the parent process
+        reset_clients()
+        self.es = get_client()
+
     def process_bulk_docs(self, docs, progress_logger):
         if not docs:
             return True
@@ -243,8 +263,9 @@ class ResumableBulkElasticPillowReindexer(Reindexer):
 
     def __init__(self, doc_provider, elasticsearch, index_info,
                  doc_filter=None, doc_transform=None, chunk_size=1000, pillow=None,
-                 reset=False, in_place=False):
+                 reset=False, in_place=False, workers=1):
         self.reset = reset
+        self.workers = workers
         self.in_place = in_place
         self.doc_provider = doc_provider
         self.es = elasticsearch
@@ -262,12 +283,22 @@ class ResumableBulkElasticPillowReindexer(Reindexer):
         if not self.es.indices.exists(self.index_info.index):
             self.reset = True  # if the index doesn't exist always reset the processing
 
-        processor = BulkDocProcessor(
-            self.doc_provider,
-            self.doc_processor,
-            reset=self.reset,
-            chunk_size=self.chunk_size,
-        )
+        if self.workers > 1:
+            processor = ParallelDocumentProcessorController(
+                self.doc_provider,
+                self.doc_processor,
+                self.workers,
+                reset=self.reset,
+                chunk_size=self.chunk_size,
+                controller_class=BulkDocProcessor,
+            )
+        else:
+            processor = BulkDocProcessor(
+                self.doc_provider,
+                self.doc_processor,
+                reset=self.reset,
+                chunk_size=self.chunk_size,
+            )
 
         if not self.in_place and (self.reset or not processor.has_started()):
             prepare_index_for_reindex(self.es, self.index_info)
@@ -20,8 +20,9 @@ from corehq.util.es.interface import ElasticsearchInterface
 from corehq.util.test_utils import trap_extra_setup, create_and_save_a_case
 from pillowtop.es_utils import initialize_index_and_mapping
 from pillowtop.feed.interface import Change, ChangeMeta
-from pillowtop.pillow.interface import PillowBase
+from pillowtop.pillow.interface import ConstructedPillow, PillowBase
 from pillowtop.processors.elastic import BulkElasticProcessor
+from pillowtop.processors.interface import BulkPillowProcessor, PillowProcessor
 from pillowtop.tests.utils import TEST_INDEX_INFO
 from pillowtop.utils import bulk_fetch_changes_docs, get_errors_with_ids
 
@@ -51,6 +52,47 @@ class BulkTest(SimpleTestCase):
         self.assertEqual([(1, 'e1'), (2, 'e2')], errors)
 
 
+class ParallelProcessorsTest(SimpleTestCase):
+
+    class SerialProcessor(PillowProcessor):
+        def __init__(self):
+            self.docs = []
+
+        def process_change(self, change):
+            self.docs.append(change.get_document())
+
+    class BatchProcessor(SerialProcessor, BulkPillowProcessor):
+        def process_changes_chunk(self, changes_chunk):
+            self.docs.extend(change.get_document() for change in changes_chunk)
+            return [], []
+
+    def test_process_changes_in_parallel(self):
+        processors = [self.BatchProcessor(), self.BatchProcessor(), self.SerialProcessor()]
+        document_store = Mock()
+        document_store.iter_documents.side_effect = lambda ids: [{'_id': id_} for id_ in ids]
+        pillow = ConstructedPillow(
+            name='test-parallel', checkpoint=Mock(), change_feed=Mock(), processor=processors,
+            processor_chunk_size=10, parallel_processors=True,
+        )
+        changes = [
+            Change(
+                id=id_,
+                sequence_id=seq,
+                document_store=document_store,
+                metadata=ChangeMeta(
+                    document_id=id_, domain='domain', data_source_type='sql', data_source_name='case-sql'
+                )
+            )
+            for seq, id_ in enumerate(['a', 'b', 'a', 'c'])
+        ]
+
+        pillow._batch_process_with_error_handling(changes)
+
+        document_store.iter_documents.assert_called_once_with(['b', 'a', 'c'])
+        for processor in processors:
+            self.assertEqual(processor.docs, [{'_id': 'b'}, {'_id': 'a'}, {'_id': 'c'}])
+
+
 @sharded
 @es_test
 class TestBulkDocOperations(TestCase):
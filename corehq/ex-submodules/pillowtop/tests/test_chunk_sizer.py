@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+from django.test import SimpleTestCase
+
+from pillowtop.pillow.interface import AdaptiveChunkSizer, ChunkSizer
+
+
+class ChunkSizerTest(SimpleTestCase):
+
+    def test_should_process(self):
+        sizer = ChunkSizer(3, max_wait_seconds=30)
+        now = datetime.utcnow()
+        self.assertFalse(sizer.should_process([], now))
+        self.assertFalse(sizer.should_process([1, 2], now))
+        self.assertTrue(sizer.should_process([1, 2, 3], now))
+        self.assertTrue(sizer.should_process([1], now - timedelta(seconds=31)))
+
+    def test_fixed_size(self):
+        sizer = ChunkSizer(100)
+        sizer.update(100, 60, lambda: 10000)
+        self.assertEqual(sizer.chunk_size, 100)
+
+
+class AdaptiveChunkSizerTest(SimpleTestCase):
+
+    def test_waits_for_half_of_latency_target(self):
+        sizer = AdaptiveChunkSizer(100, latency_target=10)
+        self.assertTrue(sizer.should_process([1], datetime.utcnow() - timedelta(seconds=5)))
+
+    def test_grows_while_lagging(self):
+        sizer = AdaptiveChunkSizer(100, latency_target=10)
+        sizer.update(100, 1, lambda: 10000)
+        self.assertEqual(sizer.chunk_size, 200)
+        sizer.update(200, 2, lambda: 10000)
+        self.assertEqual(sizer.chunk_size, 400)
+        # 400 changes take 4s, so only 500 can be processed within 5s
+        sizer.update(400, 4, lambda: 10000)
+        self.assertEqual(sizer.chunk_size, 500)
+
+    def test_grows_up_to_max_size(self):
+        sizer = AdaptiveChunkSizer(100, latency_target=10, max_chunk_size=150)
+        sizer.update(100, 0, lambda: 10000)
+        self.assertEqual(sizer.chunk_size, 150)
+
+    def test_shrinks_when_processing_is_slow(self):
+        sizer = AdaptiveChunkSizer(100, latency_target=10)
+        sizer.update(100, 20, lambda: 10000)
+        self.assertEqual(sizer.chunk_size, 25)
+        sizer.update(25, 50, lambda: 10000)
+        self.assertEqual(sizer.chunk_size, 10)  # min size
+
+    def test_returns_to_base_size_when_caught_up(self):
+        sizer = AdaptiveChunkSizer(100, latency_target=10)
+        sizer.chunk_size = 500
+        sizer.update(500, 1, lambda: 0)
+        self.assertEqual(sizer.chunk_size, 300)
+        sizer.update(300, 1, lambda: None)
+        self.assertEqual(sizer.chunk_size, 200)
@@ -1,6 +1,7 @@
 import datetime
 import logging
 import uuid
+from collections import defaultdict
 from itertools import chain
 
 import redis
@@ -18,12 +19,13 @@ from corehq.form_processor.exceptions import CaseNotFound, KafkaPublishingError
 from corehq.form_processor.interfaces.processor import CaseUpdateMetadata
 from corehq.form_processor.models import (
     XFormInstance, CaseTransaction,
-    CommCareCase, FormEditRebuild, Attachment, XFormOperation)
+    CommCareCase, CommCareCaseIndex, FormEditRebuild, Attachment, XFormOperation)
 from corehq.form_processor.utils import convert_xform_to_json, extract_meta_instance_id, extract_meta_user_id
 from corehq.util.metrics.load_counters import case_load_counter
 from corehq import toggles
 from couchforms.const import ATTACHMENT_NAME
 from dimagi.utils.couch import acquire_lock, release_lock
+from dimagi.utils.logging import notify_exception
 
 
 class FormProcessorSQL(object):
@@ -103,6 +105,7 @@ class FormProcessorSQL(object):
             cases or [],
             stock_result.models_to_save if stock_result else [],
         ))
+        index_state_updates = _get_case_index_state_updates(cases or [])
         try:
             with ExitStack() as stack:
                 for db_name in db_names:
@@ -127,6 +130,7 @@ class FormProcessorSQL(object):
                 if sort_submissions:
                     for case in cases:
                         if SqlCaseUpdateStrategy(case).reconcile_transactions_if_necessary():
+                            index_state_updates.extend(_get_case_index_state_updates([case]))
                             case.save(with_tracked_models=True)
         except DatabaseError:
             for model in all_models:
@@ -135,6 +139,8 @@ class FormProcessorSQL(object):
                     setattr(tracked, tracked._meta.pk.attname, None)
             raise
 
+        _update_case_index_state(index_state_updates)
+
         try:
             cls.publish_changes_to_kafka(processed_forms, cases, stock_result)
         except Exception as e:
@@ -288,7 +294,9 @@ class FormProcessorSQL(object):
 
             case.server_modified_on = rebuild_transaction.server_date
             if save:
+                index_state_updates = _get_case_index_state_updates([case])
                 case.save(with_tracked_models=True)
+                _update_case_index_state(index_state_updates)
                 publish_case_saved(case)
             return case
         finally:
@@ -334,3 +342,52 @@ class FormProcessorSQL(object):
             return None, None
 
         return case, None
+
+
+def _get_case_index_state_updates(cases):
+    """Get referenced case state updates to be made after saving cases
+
+    See `CommCareCaseIndex.referenced_closed`.
+
+    :returns: List of `(case, state_changed, referenced_ids)` tuples.
+    `state_changed` is true if the case may have been closed, deleted
+    or reopened. `referenced_ids` are the cases referenced by new or
+    updated indices of the case with unknown referenced case state.
+    """
+    updates = []
+    for case in cases:
+        state_changed = any(
+            tx.is_case_close or tx.is_case_rebuild
+            for tx in case.get_tracked_models_to_create(CaseTransaction)
+        )
+        referenced_ids = {
+            index.referenced_id
+            for index in case.get_live_tracked_models(CommCareCaseIndex)
+            if index.referenced_id and index.referenced_closed is None
+        }
+        if state_changed or referenced_ids:
+            updates.append((case, state_changed, referenced_ids))
+    return updates
+
+
+def _update_case_index_state(updates):
+    """Update referenced case state on case indices
+
+    Must be called after the cases have been committed. Errors are
+    reported rather than raised, so that they do not prevent the saved
+    cases from being published.
+    """
+    try:
+        case_ids_by_state = defaultdict(list)
+        for case, state_changed, referenced_ids in updates:
+            if state_changed:
+                case_ids_by_state[(case.domain, case.closed, case.deleted)].append(case.case_id)
+            if referenced_ids:
+                CommCareCaseIndex.objects.fill_referenced_case_state(case.domain, referenced_ids, [case.db])
+        for (domain, closed, deleted), case_ids in case_ids_by_state.items():
+            CommCareCaseIndex.objects.set_referenced_case_state(
+                domain, case_ids, referenced_closed=closed, referenced_deleted=deleted)
+    except Exception:
+        notify_exception(None, "Error updating referenced case state on case indices", details={
+            'case_ids': [case.case_id for case, _, _ in updates],
+        })
@@ -190,6 +190,10 @@ class SqlCaseUpdateStrategy(UpdateStrategy):
             if self.case.has_index(index_update.identifier):
                 # update
                 index = self.case.get_index(index_update.identifier)
+                if index.referenced_id != index_update.referenced_id:
+                    # state of the new referenced case is set after save
+                    index.referenced_closed = None
+                    index.referenced_deleted = None
                 index.referenced_type = index_update.referenced_type
                 index.referenced_id = index_update.referenced_id
                 index.relationship = index_update.relationship
@@ -25,9 +25,10 @@ class UnexpectedBackend(Exception):
 
 class FormDocumentStore(DocumentStore):
 
-    def __init__(self, domain, xmlns=None):
+    def __init__(self, domain, xmlns=None, limit_db_aliases=None):
         self.domain = domain
         self.xmlns = xmlns
+        self.limit_db_aliases = limit_db_aliases
 
     def get_document(self, doc_id):
         try:
@@ -44,7 +45,8 @@ class FormDocumentStore(DocumentStore):
             return form.to_json()
 
     def iter_document_ids(self):
-        return iter(XFormInstance.objects.iter_form_ids_by_xmlns(self.domain, self.xmlns))
+        return iter(XFormInstance.objects.iter_form_ids_by_xmlns(
+            self.domain, self.xmlns, limit_db_aliases=self.limit_db_aliases))
 
     def iter_documents(self, ids):
         for wrapped_form in XFormInstance.objects.iter_forms(ids, self.domain):
@@ -56,9 +58,10 @@ class FormDocumentStore(DocumentStore):
 
 class CaseDocumentStore(DocumentStore):
 
-    def __init__(self, domain, case_type=None):
+    def __init__(self, domain, case_type=None, limit_db_aliases=None):
         self.domain = domain
         self.case_type = case_type
+        self.limit_db_aliases = limit_db_aliases
 
     def get_document(self, doc_id):
         try:
@@ -67,7 +70,8 @@ class CaseDocumentStore(DocumentStore):
             raise DocumentNotFoundError(e)
 
     def iter_document_ids(self):
-        accessor = CaseReindexAccessor(self.domain, case_type=self.case_type)
+        accessor = CaseReindexAccessor(
+            self.domain, case_type=self.case_type, limit_db_aliases=self.limit_db_aliases)
         return iter_all_ids(accessor)
 
     def iter_documents(self, ids):
@@ -0,0 +1,48 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from corehq.form_processor.models import CommCareCaseIndex
+from corehq.sql_db.util import get_db_aliases_for_partitioned_query
+
+
+class Command(BaseCommand):
+    help = "Populate referenced case closed/deleted state on case indices where it is unknown."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--domain', help='Only populate indices in this domain')
+        parser.add_argument('-d', '--db_name', help='Django DB alias to run on')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, domain, db_name, chunk_size, **options):
+        db_names = [db_name] if db_name else get_db_aliases_for_partitioned_query()
+        for db_name in db_names:
+            _populate_indices_in_db(db_name, domain, chunk_size)
+
+
+def _populate_indices_in_db(db_name, domain, chunk_size):
+    query = (CommCareCaseIndex.objects.using(db_name)
+             .filter(referenced_closed__isnull=True)
+             .exclude(referenced_id=''))
+    if domain:
+        query = query.filter(domain=domain)
+    processed = 0
+    last_id = 0
+    while True:
+        rows = list(
+            query.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', 'domain', 'referenced_id')[:chunk_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        referenced_ids_by_domain = defaultdict(set)
+        for _, index_domain, referenced_id in rows:
+            referenced_ids_by_domain[index_domain].add(referenced_id)
+        for index_domain, referenced_ids in referenced_ids_by_domain.items():
+            CommCareCaseIndex.objects.fill_referenced_case_state(index_domain, referenced_ids, [db_name])
+        processed += len(rows)
+        print('[progress] [%s] %s indices' % (db_name, processed))
+
+    print('[progress] [%s] Complete' % db_name)
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.18 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form_processor', '0093_rename_models'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commcarecaseindex',
+            name='referenced_closed',
+            field=models.BooleanField(null=True),
+        ),
+        migrations.AddField(
+            model_name='commcarecaseindex',
+            name='referenced_deleted',
+            field=models.BooleanField(null=True),
+        ),
+    ]
@@ -3,7 +3,7 @@ import json
 import mimetypes
 import os
 import uuid
-from collections import OrderedDict, namedtuple
+from collections import OrderedDict, defaultdict, namedtuple
 from datetime import datetime
 
 from django.db import DatabaseError, models, transaction
@@ -26,6 +26,7 @@ from corehq.blobs.exceptions import BadName, NotFound
 from corehq.blobs.util import get_content_md5
 from corehq.sql_db.models import PartitionedModel, RequireDBManager
 from corehq.sql_db.util import (
+    get_db_alias_for_partitioned_doc,
     get_db_aliases_for_partitioned_query,
     split_list_by_db_partition,
 )
@@ -260,6 +261,7 @@ class CommCareCaseManager(RequireDBManager):
             )
             deleted_count = sum(row[0] for row in cursor)
 
+        CommCareCaseIndex.objects.set_referenced_case_state(domain, case_ids, referenced_deleted=True)
         self.publish_deleted_cases(domain, case_ids)
 
         return deleted_count
@@ -273,6 +275,8 @@ class CommCareCaseManager(RequireDBManager):
                 [domain, case_ids]
             )
             undeleted_count = sum(row[0] for row in cursor)
+        CommCareCaseIndex.objects.set_referenced_case_state(domain, case_ids, referenced_deleted=False)
+        CommCareCaseIndex.objects.reset_referenced_case_state(domain, case_ids)
         for case in self.iter_cases(case_ids, domain):
             publish_case_saved(case)
         return undeleted_count
@@ -287,6 +291,9 @@ class CommCareCaseManager(RequireDBManager):
             cursor.execute('SELECT hard_delete_cases(%s, %s)', [domain, case_ids])
             deleted_count = sum(row[0] for row in cursor)
 
+        CommCareCaseIndex.objects.set_referenced_case_state(
+            domain, case_ids, referenced_closed=None, referenced_deleted=None)
+
         self.publish_deleted_cases(domain, case_ids)
 
         return deleted_count
@@ -786,7 +793,13 @@ class CommCareCase(PartitionedModel, models.Model, RedisLockableMixIn,
                     update_fields = None
                     if index.is_saved():
                         # prevent changing identifier
-                        update_fields = ['referenced_id', 'referenced_type', 'relationship_id']
+                        update_fields = [
+                            'referenced_id',
+                            'referenced_type',
+                            'relationship_id',
+                            'referenced_closed',
+                            'referenced_deleted',
+                        ]
                     index.save(update_fields=update_fields)
 
                 CommCareCaseIndex.objects.using(self.db).filter(id__in=index_ids_to_delete).delete()
@@ -1014,6 +1027,69 @@ class CommCareCaseIndexManager(RequireDBManager):
             ) for index in indexes
         ]
 
+    def set_referenced_case_state(self, domain, case_ids, **state):
+        """Set the denormalized state of referenced cases on indices
+
+        Indices are partitioned by the referencing (child/extension)
+        case. The indices that reference the cases are found with one
+        query, and only the partitions that hold them are updated.
+        Indices of deleted cases are not updated: their state is reset
+        when they are undeleted (see `reset_referenced_case_state`).
+
+        :param state: Values for `referenced_closed` and/or
+        `referenced_deleted`. `None` means unknown.
+        """
+        assert state and set(state) <= {"referenced_closed", "referenced_deleted"}, state
+        indices = self.get_all_reverse_indices_info(domain, list(case_ids))
+        indices_by_db = defaultdict(list)
+        for index in indices:
+            indices_by_db[get_db_alias_for_partitioned_doc(index.case_id)].append(index)
+        for db_name, db_indices in indices_by_db.items():
+            for chunk in chunked(db_indices, 1000, list):
+                self.using(db_name).filter(
+                    domain=domain,
+                    case_id__in={index.case_id for index in chunk},
+                    referenced_id__in={index.referenced_id for index in chunk},
+                ).update(**state)
+
+    def reset_referenced_case_state(self, domain, case_ids):
+        """Read the state of the cases referenced by the indices of cases
+
+        For cases whose indices may have missed updates of the state of
+        the cases they reference, like cases that were deleted.
+        """
+        for db_name, ids in split_list_by_db_partition(case_ids):
+            indices = self.using(db_name).filter(domain=domain, case_id__in=ids)
+            referenced_ids = set(indices.values_list('referenced_id', flat=True))
+            indices.update(referenced_closed=None, referenced_deleted=None)
+            if referenced_ids:
+                self.fill_referenced_case_state(domain, referenced_ids, [db_name])
+
+    def fill_referenced_case_state(self, domain, referenced_ids, db_names=None):
+        """Set referenced case state on indices where it is unknown
+
+        The state of referenced cases is read before indices are
+        updated. Only indices with unknown state are updated so a
+        concurrent update from `set_referenced_case_state` (made after
+        the referenced case was saved) is never overwritten.
+        """
+        referenced_ids = list(referenced_ids)
+        existing_ids = set(CommCareCase.objects.get_case_ids_that_exist(domain, referenced_ids))
+        closed_or_deleted = {
+            row.case_id: (row.closed, row.deleted)
+            for row in CommCareCase.objects.get_closed_and_deleted_ids(domain, list(existing_ids))
+        }
+        ids_by_state = defaultdict(list)
+        for case_id in existing_ids:
+            ids_by_state[closed_or_deleted.get(case_id, (False, False))].append(case_id)
+        for db_name in db_names or get_db_aliases_for_partitioned_query():
+            for (closed, deleted), case_ids in ids_by_state.items():
+                self.using(db_name).filter(
+                    domain=domain,
+                    referenced_id__in=case_ids,
+                    referenced_closed__isnull=True,
+                ).update(referenced_closed=closed, referenced_deleted=deleted)
+
     def get_extension_case_ids(self, domain, case_ids, include_closed=True, exclude_for_case_type=None):
         """
         Given a base list of case ids, get all ids of all extension cases that reference them
@@ -1078,6 +1154,12 @@ class CommCareCaseIndex(PartitionedModel, models.Model, SaveStateMixin):
     referenced_type = models.CharField(max_length=255, default=None)
     relationship_id = models.PositiveSmallIntegerField(choices=RELATIONSHIP_CHOICES)
 
+    # Denormalized closed/deleted state of the referenced case, used by
+    # livequery restore to avoid a lookup query per case graph hop.
+    # NULL if unknown (not yet populated or the case does not exist).
+    referenced_closed = models.BooleanField(null=True)
+    referenced_deleted = models.BooleanField(null=True)
+
     def __init__(self, *args, **kwargs):
         # HACK: We need to remove doc_type, as ElasticSearch queries write the entire
         #  couch document to ElasticSearch, and these indices are typically constructed by
@@ -193,12 +193,13 @@ class XFormInstanceManager(RequireDBManager):
             )
         return result
 
-    def iter_form_ids_by_xmlns(self, domain, xmlns=None):
+    def iter_form_ids_by_xmlns(self, domain, xmlns=None, limit_db_aliases=None):
         q_expr = Q(domain=domain) & Q(state=self.model.NORMAL)
         if xmlns:
             q_expr &= Q(xmlns=xmlns)
         for form_id in paginate_query_across_partitioned_databases(
-                self.model, q_expr, values=['form_id'], load_source='formids_by_xmlns'):
+                self.model, q_expr, values=['form_id'], load_source='formids_by_xmlns',
+                limit_db_aliases=limit_db_aliases):
             yield form_id[0]
 
     def get_form_ids_for_user(self, domain, user_id):
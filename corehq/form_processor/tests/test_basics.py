@@ -3,6 +3,7 @@ import uuid
 from io import BytesIO
 
 from django.core.files.uploadedfile import UploadedFile
+from django.db import DatabaseError
 from django.test import TestCase
 from unittest.mock import patch
 
@@ -27,7 +28,7 @@ from corehq.pillows.mappings.case_search_mapping import (
 from corehq.util.elastic import ensure_index_deleted
 from corehq.elastic import get_es_new
 from corehq.form_processor.interfaces.processor import FormProcessorInterface, XFormQuestionValueIterator
-from corehq.form_processor.models import CommCareCase, XFormInstance
+from corehq.form_processor.models import CommCareCase, CommCareCaseIndex, XFormInstance
 from corehq.form_processor.tests.utils import FormProcessorTestUtils, sharded
 from corehq.form_processor.utils import get_simple_form_xml
 from corehq.util.dates import coerce_to_datetime
@@ -252,6 +253,29 @@ class FundamentalCaseTests(FundamentalBaseTests):
         self.assertEqual(index.referenced_type, 'mother')
         self.assertEqual(index.relationship, 'child')
 
+    def test_case_index_state_error_does_not_prevent_publishing(self):
+        mother_case_id = uuid.uuid4().hex
+        _submit_case_block(
+            True, mother_case_id, user_id='user1', owner_id='owner1', case_type='mother',
+            case_name='mother', date_modified=datetime.utcnow()
+        )
+
+        child_case_id = uuid.uuid4().hex
+        processor = 'corehq.form_processor.backends.sql.processor'
+        with patch.object(CommCareCaseIndex.objects, 'fill_referenced_case_state', side_effect=DatabaseError), \
+                patch(f'{processor}.notify_exception') as notify_exception, \
+                patch(f'{processor}.publish_case_saved') as publish_case_saved:
+            _submit_case_block(
+                True, child_case_id, user_id='user1', owner_id='owner1', case_type='child',
+                case_name='child', date_modified=datetime.utcnow(), index={
+                    'mom': ('mother', mother_case_id)
+                }
+            )
+
+        notify_exception.assert_called_once()
+        published_case_ids = [call.args[0].case_id for call in publish_case_saved.call_args_list]
+        self.assertEqual(published_case_ids, [child_case_id])
+
     def test_update_index(self):
         mother_case_id = uuid.uuid4().hex
         _submit_case_block(
@@ -1,5 +1,6 @@
 import uuid
 from datetime import datetime
+from unittest.mock import patch
 
 import attr
 
@@ -613,6 +614,55 @@ class TestCommCareCaseIndexManager(BaseCaseManagerTest):
             [case.case_id],
         )
 
+    def test_fill_referenced_case_state(self):
+        parent = _create_case(closed=True)
+        _, index = _create_case_with_index(parent.case_id)
+        missing_id = uuid.uuid4().hex
+        _, orphan_index = _create_case_with_index(missing_id)
+
+        CommCareCaseIndex.objects.fill_referenced_case_state(DOMAIN, [parent.case_id, missing_id])
+
+        index = CommCareCaseIndex.objects.get_indices(DOMAIN, index.case_id)[0]
+        self.assertEqual((index.referenced_closed, index.referenced_deleted), (True, False))
+        orphan_index = CommCareCaseIndex.objects.get_indices(DOMAIN, orphan_index.case_id)[0]
+        self.assertEqual((orphan_index.referenced_closed, orphan_index.referenced_deleted), (None, None))
+
+    def test_set_referenced_case_state(self):
+        parent = _create_case()
+        _, index = _create_case_with_index(parent.case_id)
+        CommCareCaseIndex.objects.fill_referenced_case_state(DOMAIN, [parent.case_id])
+
+        CommCareCase.objects.soft_delete_cases(DOMAIN, [parent.case_id])
+        index = CommCareCaseIndex.objects.get_indices(DOMAIN, index.case_id)[0]
+        self.assertEqual((index.referenced_closed, index.referenced_deleted), (False, True))
+
+        CommCareCase.objects.soft_undelete_cases(DOMAIN, [parent.case_id])
+        index = CommCareCaseIndex.objects.get_indices(DOMAIN, index.case_id)[0]
+        self.assertEqual((index.referenced_closed, index.referenced_deleted), (False, False))
+
+    def test_set_referenced_case_state_without_reverse_indices(self):
+        case = _create_case()
+        with patch.object(CommCareCaseIndex.objects, 'using') as using:
+            CommCareCaseIndex.objects.set_referenced_case_state(DOMAIN, [case.case_id], referenced_closed=True)
+        using.assert_not_called()
+
+    def test_undeleted_case_reads_referenced_case_state(self):
+        parent = _create_case()
+        child, index = _create_case_with_index(parent.case_id)
+        CommCareCaseIndex.objects.fill_referenced_case_state(DOMAIN, [parent.case_id])
+
+        CommCareCase.objects.soft_delete_cases(DOMAIN, [child.case_id])
+        # the indices of deleted cases are not updated
+        CommCareCase.objects.soft_delete_cases(DOMAIN, [parent.case_id])
+        CommCareCase.objects.soft_undelete_cases(DOMAIN, [child.case_id])
+
+        index = CommCareCaseIndex.objects.get_indices(DOMAIN, child.case_id)[0]
+        self.assertEqual((index.referenced_closed, index.referenced_deleted), (False, True))
+
+        CommCareCase.objects.hard_delete_cases(DOMAIN, [parent.case_id])
+        index = CommCareCaseIndex.objects.get_indices(DOMAIN, index.case_id)[0]
+        self.assertEqual((index.referenced_closed, index.referenced_deleted), (None, None))
+
 
 class TestCaseTransactionManager(BaseCaseManagerTest):
 
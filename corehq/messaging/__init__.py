@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class MessagingAppConfig(AppConfig):
     name = 'corehq.messaging'
+
+    def ready(self):
+        from . import signals  # noqa: disable=unused-import,F401
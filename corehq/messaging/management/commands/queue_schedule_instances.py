@@ -3,6 +3,7 @@ from corehq.messaging.scheduling.scheduling_partitioned.dbaccessors import (
     get_active_schedule_instance_ids,
     get_active_case_schedule_instance_ids,
 )
+from corehq.messaging.scheduling.scheduling_partitioned.due_index import get_due_instances
 from corehq.messaging.scheduling.scheduling_partitioned.models import (
     AlertScheduleInstance,
     TimedScheduleInstance,
@@ -11,14 +12,23 @@ from corehq.messaging.scheduling.scheduling_partitioned.models import (
 )
 from corehq.messaging.scheduling.tasks import (
     handle_alert_schedule_instance,
+    handle_alert_schedule_instances,
     handle_timed_schedule_instance,
+    handle_timed_schedule_instances,
     handle_case_alert_schedule_instance,
     handle_case_timed_schedule_instance,
 )
-from corehq.sql_db.util import handle_connection_failure, get_default_and_partitioned_db_aliases
-from datetime import datetime
+from corehq.sql_db.util import (
+    get_db_aliases_for_partitioned_query,
+    get_default_and_partitioned_db_aliases,
+    handle_connection_failure,
+)
+from collections import defaultdict
+from datetime import datetime, timedelta
+from dimagi.utils.chunked import chunked
 from dimagi.utils.couch import get_redis_lock
 from dimagi.utils.logging import notify_exception
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from time import sleep
 
@@ -37,6 +47,8 @@ class Command(BaseCommand):
     """
     help = "Spawns tasks to process schedule instances"
 
+    next_full_scan = None
+
     def get_task(self, cls):
         task = {
             AlertScheduleInstance: handle_alert_schedule_instance,
@@ -50,6 +62,17 @@ class Command(BaseCommand):
 
         raise ValueError("Unexpected class: %s" % cls)
 
+    def get_batch_task(self, cls):
+        task = {
+            AlertScheduleInstance: handle_alert_schedule_instances,
+            TimedScheduleInstance: handle_timed_schedule_instances,
+        }.get(cls)
+
+        if task:
+            return task
+
+        raise ValueError("Unexpected class: %s" % cls)
+
     def get_enqueue_lock(self, cls, schedule_instance_id, next_event_due):
         key = "create-task-for-%s-%s-%s" % (
             cls.__name__,
@@ -63,8 +86,20 @@ class Command(BaseCommand):
             track_unreleased=False,
         )
 
-    @handle_connection_failure(get_db_aliases=get_default_and_partitioned_db_aliases)
     def create_tasks(self):
+        if settings.USE_SCHEDULE_INSTANCE_DUE_INDEX:
+            utcnow = datetime.utcnow()
+            if self.next_full_scan is None or self.next_full_scan <= utcnow:
+                self.next_full_scan = utcnow + timedelta(
+                    minutes=settings.SCHEDULE_INSTANCE_DUE_INDEX_FULL_SCAN_INTERVAL)
+            else:
+                self.create_tasks_from_due_index()
+                return
+
+        self.create_tasks_from_databases()
+
+    @handle_connection_failure(get_db_aliases=get_default_and_partitioned_db_aliases)
+    def create_tasks_from_databases(self):
         for cls in (AlertScheduleInstance, TimedScheduleInstance):
             for domain, schedule_instance_id, next_event_due in get_active_schedule_instance_ids(
                     cls, datetime.utcnow()):
@@ -88,6 +123,40 @@ class Command(BaseCommand):
                 if enqueue_lock.acquire(blocking=False):
                     self.get_task(cls).delay(case_id, schedule_instance_id.hex, domain)
 
+    def create_tasks_from_due_index(self):
+        """
+        Reads the due instances from the due index. Instances of the same
+        broadcast schedule are handled in batches, and case schedule instances
+        one at a time, like in create_tasks_from_databases().
+        """
+        utcnow = datetime.utcnow()
+        for cls in (AlertScheduleInstance, TimedScheduleInstance):
+            batches = defaultdict(list)
+            for due_instance in self.get_due_instances(cls, utcnow):
+                batches[(due_instance.domain, due_instance.group_id)].append(
+                    due_instance.schedule_instance_id.hex)
+
+            for (domain, schedule_id), schedule_instance_ids in batches.items():
+                for batch in chunked(schedule_instance_ids, settings.SCHEDULE_INSTANCE_BATCH_SIZE):
+                    self.get_batch_task(cls).delay(schedule_id, list(batch), domain)
+
+        for cls in (CaseAlertScheduleInstance, CaseTimedScheduleInstance):
+            for due_instance in self.get_due_instances(cls, utcnow):
+                self.get_task(cls).delay(
+                    due_instance.group_id, due_instance.schedule_instance_id.hex, due_instance.domain)
+
+    def get_due_instances(self, cls, utcnow):
+        for db_alias in get_db_aliases_for_partitioned_query():
+            for due_instance in get_due_instances(cls, db_alias, utcnow):
+                if skip_domain(due_instance.domain):
+                    continue
+
+                # See comment above about why we use a non-blocking lock here.
+                enqueue_lock = self.get_enqueue_lock(
+                    cls, due_instance.schedule_instance_id, due_instance.next_event_due)
+                if enqueue_lock.acquire(blocking=False):
+                    yield due_instance
+
     def handle(self, **options):
         while True:
             try:
@@ -1,7 +1,14 @@
+from collections import defaultdict
+from itertools import chain
 from uuid import UUID
 
 from django.db.models import Q
 
+from dimagi.utils.chunked import chunked
+
+from corehq.messaging.scheduling.scheduling_partitioned.due_index import (
+    add_to_due_index,
+)
 from corehq.sql_db.util import (
     get_db_aliases_for_partitioned_query,
     paginate_query_across_partitioned_databases,
@@ -41,6 +48,7 @@ def save_alert_schedule_instance(instance):
     _validate_class(instance, AlertScheduleInstance)
     _validate_uuid(instance.schedule_instance_id)
     instance.save()
+    add_to_due_index([instance])
 
 
 def save_timed_schedule_instance(instance):
@@ -49,6 +57,7 @@ def save_timed_schedule_instance(instance):
     _validate_class(instance, TimedScheduleInstance)
     _validate_uuid(instance.schedule_instance_id)
     instance.save()
+    add_to_due_index([instance])
 
 
 def delete_alert_schedule_instance(instance):
@@ -67,6 +76,57 @@ def delete_timed_schedule_instance(instance):
     instance.delete()
 
 
+def bulk_save_schedule_instances(cls, new_instances, changed_instances, batch_size=1000):
+    """
+    Creates new_instances and updates changed_instances with one query per
+    batch on each partitioned database
+    """
+    from corehq.messaging.scheduling.scheduling_partitioned.models import (
+        AlertScheduleInstance,
+        TimedScheduleInstance,
+    )
+
+    if cls not in (AlertScheduleInstance, TimedScheduleInstance):
+        raise TypeError("Expected AlertScheduleInstance or TimedScheduleInstance")
+
+    for db_alias, instances in _group_instances_by_db(cls, new_instances).items():
+        cls.objects.using(db_alias).bulk_create(instances, batch_size=batch_size)
+
+    fields = [field.name for field in cls._meta.fields if not field.primary_key]
+    for db_alias, instances in _group_instances_by_db(cls, changed_instances).items():
+        cls.objects.using(db_alias).bulk_update(instances, fields, batch_size=batch_size)
+
+    add_to_due_index(chain(new_instances, changed_instances))
+
+
+def bulk_delete_schedule_instances(cls, instances, batch_size=1000):
+    """
+    Deletes instances with one query per batch on each partitioned database
+    """
+    from corehq.messaging.scheduling.scheduling_partitioned.models import (
+        AlertScheduleInstance,
+        TimedScheduleInstance,
+    )
+
+    if cls not in (AlertScheduleInstance, TimedScheduleInstance):
+        raise TypeError("Expected AlertScheduleInstance or TimedScheduleInstance")
+
+    for db_alias, db_instances in _group_instances_by_db(cls, instances).items():
+        for batch in chunked(db_instances, batch_size):
+            cls.objects.using(db_alias).filter(
+                schedule_instance_id__in=[instance.schedule_instance_id for instance in batch]
+            ).delete()
+
+
+def _group_instances_by_db(cls, instances):
+    result = defaultdict(list)
+    for instance in instances:
+        _validate_class(instance, cls)
+        _validate_uuid(instance.schedule_instance_id)
+        result[instance.db].append(instance)
+    return result
+
+
 def get_count_of_active_schedule_instances_due(domain, due_before):
     from corehq.messaging.scheduling.scheduling_partitioned.models import (
         AlertScheduleInstance,
@@ -296,6 +356,7 @@ def save_case_schedule_instance(instance):
     _validate_class(instance, (CaseAlertScheduleInstance, CaseTimedScheduleInstance))
     _validate_uuid(instance.schedule_instance_id)
     instance.save()
+    add_to_due_index([instance])
 
 
 def delete_case_schedule_instance(instance):
@@ -0,0 +1,134 @@
+"""
+Due instance index
+------------------
+
+An index in Redis of the active schedule instances by the time that their
+next event is due, so that ``queue_schedule_instances`` can find the
+instances that are due without querying every partitioned database.
+
+Instances are added to the index when they are saved, in a bucket for
+each minute on each partitioned database. Instances whose next event is
+already due are added to the current bucket. Buckets are removed when
+they are read after they are over, so each of their instances is queued
+by one poller.
+
+Instances are not removed from the index when they are rescheduled,
+deactivated or deleted, because the tasks that handle them check that
+they are due anyway. Instances that are saved without updating the index
+are found by the full query of the partitioned databases that
+``queue_schedule_instances`` still runs every
+``settings.SCHEDULE_INSTANCE_DUE_INDEX_FULL_SCAN_INTERVAL`` minutes.
+"""
+import json
+import uuid
+from collections import namedtuple
+from datetime import datetime
+
+from django.conf import settings
+
+from dimagi.utils.couch.cache.cache_core import get_redis_client
+
+BUCKET_SECONDS = 60
+
+# Buckets that are not read within this time after they are over expire
+BUCKET_EXPIRY_SECONDS = 24 * 60 * 60
+
+EPOCH = datetime(1970, 1, 1)
+
+# group_id is the case id of case schedule instances, or the hex schedule id
+# of other schedule instances
+DueInstance = namedtuple('DueInstance', 'domain group_id schedule_instance_id next_event_due')
+
+
+def get_bucket(timestamp):
+    return int((timestamp - EPOCH).total_seconds()) // BUCKET_SECONDS
+
+
+def add_to_due_index(instances):
+    """
+    Adds the active instances to the index, if it is enabled
+    """
+    if not settings.USE_SCHEDULE_INSTANCE_DUE_INDEX:
+        return
+
+    current_bucket = get_bucket(datetime.utcnow())
+    pipeline = _get_client().pipeline(transaction=False)
+    for instance in instances:
+        if not instance.active:
+            continue
+
+        bucket = max(get_bucket(instance.next_event_due), current_bucket)
+        key = _get_bucket_key(type(instance), instance.db, bucket)
+        pipeline.sadd(key, json.dumps([
+            instance.domain,
+            _get_group_id(instance),
+            instance.schedule_instance_id.hex,
+            instance.next_event_due.isoformat(),
+        ]))
+        pipeline.expireat(key, (bucket + 1) * BUCKET_SECONDS + BUCKET_EXPIRY_SECONDS)
+    pipeline.execute()
+
+
+def get_due_instances(cls, db_alias, due_before):
+    """
+    Returns the DueInstances of cls on db_alias that are due before due_before
+
+    The buckets that are over are removed as they are read, except for the
+    previous bucket, to allow for differences between the clocks of the
+    machines that save and read instances. So the instances of the current
+    and previous buckets can be returned more than once.
+    """
+    client = _get_client()
+    current_bucket = get_bucket(due_before)
+    cursor_key = _get_cursor_key(cls, db_alias)
+    cursor = client.get(cursor_key)
+    first_bucket = int(cursor) if cursor is not None else current_bucket - 1
+    first_bucket = max(first_bucket, current_bucket - BUCKET_EXPIRY_SECONDS // BUCKET_SECONDS)
+
+    members = set()
+    for bucket in range(first_bucket, current_bucket - 1):
+        key = _get_bucket_key(cls, db_alias, bucket)
+        pipeline = client.pipeline(transaction=True)
+        pipeline.smembers(key)
+        pipeline.delete(key)
+        bucket_members, _ = pipeline.execute()
+        members.update(bucket_members)
+    client.set(cursor_key, max(first_bucket, current_bucket - 1))
+
+    for bucket in (current_bucket - 1, current_bucket):
+        members.update(client.smembers(_get_bucket_key(cls, db_alias, bucket)))
+
+    result = []
+    for member in members:
+        domain, group_id, schedule_instance_id, next_event_due = json.loads(member)
+        next_event_due = datetime.fromisoformat(next_event_due)
+        if next_event_due <= due_before:
+            result.append(DueInstance(domain, group_id, uuid.UUID(schedule_instance_id), next_event_due))
+    return result
+
+
+def _get_group_id(instance):
+    from corehq.messaging.scheduling.scheduling_partitioned.models import (
+        AbstractAlertScheduleInstance,
+        CaseScheduleInstanceMixin,
+    )
+
+    if isinstance(instance, CaseScheduleInstanceMixin):
+        return instance.case_id
+    elif isinstance(instance, AbstractAlertScheduleInstance):
+        return instance.alert_schedule_id.hex
+    else:
+        return instance.timed_schedule_id.hex
+
+
+def _get_bucket_key(cls, db_alias, bucket):
+    return 'schedule-instances-due-%s-%s-%s' % (cls.__name__, db_alias, bucket)
+
+
+def _get_cursor_key(cls, db_alias):
+    return 'schedule-instances-due-%s-%s-cursor' % (cls.__name__, db_alias)
+
+
+def _get_client():
+    # We need access to the raw redis client for sets and pipelines
+    return get_redis_client().client.get_client()
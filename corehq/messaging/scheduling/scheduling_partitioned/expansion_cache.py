@@ -0,0 +1,134 @@
+"""
+Recipient expansion cache
+-------------------------
+
+Caches the ids of the users that user group and location recipients of
+schedule instances expand to, so that the schedule instances of a
+broadcast or a rule that share a recipient only look up its users once.
+
+Each expansion is cached by the domain, the recipient, the revision of
+the group, the options of the schedule that change the expansion, and a
+version of the domain. The version of a domain is changed when one of
+its locations is saved or deleted, or when one of its users is saved
+with a change to the fields that expansions depend on, which
+invalidates all of the expansions of the domain. A hash of those fields
+is cached for each user, so that other changes, like logins, leave the
+expansions alone. Groups do not need to change the version, because a
+group gets a new revision each time it is saved.
+"""
+import uuid
+
+from django.core.cache import cache
+
+from dimagi.utils.couch.database import iter_docs
+
+from corehq.apps.groups.models import Group
+from corehq.apps.users.models import CouchUser
+from corehq.util.json import hash_json
+from corehq.util.metrics import metrics_counter
+
+RECIPIENT_EXPANSION_CACHE_TIMEOUT = 60 * 60
+
+DOMAIN_VERSION_TIMEOUT = 7 * 24 * 60 * 60
+
+
+def get_expansion_cache_key(domain, recipient, include_descendants=False, location_type_filter=None,
+                            user_data_filter=None):
+    """
+    :param recipient: A Group or an SQLLocation
+    :param include_descendants: Whether the users of the descendants of a
+    location are included
+    """
+    if isinstance(recipient, Group):
+        recipient_key = ['Group', recipient.get_id, recipient._rev]
+    else:
+        recipient_key = ['Location', recipient.location_id]
+
+    return 'recipient-expansion-{}'.format(hash_json([
+        domain,
+        _get_domain_version(domain),
+        recipient_key,
+        include_descendants,
+        sorted(location_type_filter or []),
+        user_data_filter or {},
+    ]))
+
+
+def get_cached_user_ids(key, recipient):
+    user_ids = cache.get(key)
+    metrics_counter('commcare.messaging.recipient_expansion_cache', tags={
+        'recipient_type': 'Group' if isinstance(recipient, Group) else 'Location',
+        'result': 'miss' if user_ids is None else 'hit',
+    })
+    return user_ids
+
+
+def set_cached_user_ids(key, user_ids):
+    cache.set(key, user_ids, RECIPIENT_EXPANSION_CACHE_TIMEOUT)
+
+
+def iter_cached_users(user_ids):
+    # users that were deactivated or retired since the expansion was
+    # cached are skipped, like they are by an expansion
+    for doc in iter_docs(CouchUser.get_db(), user_ids):
+        user = CouchUser.wrap_correctly(doc)
+        if user.is_active and not user.is_deleted():
+            yield user
+
+
+def clear_expansion_cache(domain):
+    cache.set(_get_domain_version_key(domain), uuid.uuid4().hex, DOMAIN_VERSION_TIMEOUT)
+
+
+def clear_expansion_cache_for_user(sender, couch_user, **kwargs):
+    key = _get_user_fields_key(couch_user.get_id)
+    fields_hash = hash_json(_get_user_expansion_fields(couch_user))
+    previous = cache.get(key)
+    if previous and previous[0] == fields_hash:
+        return
+
+    cache.set(key, [fields_hash, couch_user.domains], DOMAIN_VERSION_TIMEOUT)
+    # the domains the user was removed from are invalidated too
+    previous_domains = previous[1] if previous else []
+    for domain in set(couch_user.domains) | set(previous_domains):
+        clear_expansion_cache(domain)
+
+
+def clear_expansion_cache_for_location(sender, instance, **kwargs):
+    clear_expansion_cache(instance.domain)
+
+
+def _get_user_expansion_fields(couch_user):
+    """
+    The fields of a user that change the groups and locations it is
+    expanded from, or whether it passes a user data filter
+    """
+    doc = couch_user.to_json()
+    memberships = doc.get('domain_memberships') or [doc.get('domain_membership') or {}]
+    return {
+        'doc_type': doc.get('doc_type'),
+        # retiring a user only changes base_doc
+        'is_deleted': couch_user.is_deleted(),
+        'is_active': doc.get('is_active'),
+        'location_id': doc.get('location_id'),
+        'assigned_location_ids': doc.get('assigned_location_ids'),
+        'memberships': [
+            [membership.get('domain'), membership.get('location_id'), membership.get('assigned_location_ids')]
+            for membership in memberships
+        ],
+        'user_data': couch_user.metadata,
+    }
+
+
+def _get_user_fields_key(user_id):
+    return 'recipient-expansion-user-{}'.format(user_id)
+
+
+def _get_domain_version(domain):
+    key = _get_domain_version_key(domain)
+    cache.add(key, uuid.uuid4().hex, DOMAIN_VERSION_TIMEOUT)
+    return cache.get(key)
+
+
+def _get_domain_version_key(domain):
+    return 'recipient-expansion-version-{}'.format(domain)
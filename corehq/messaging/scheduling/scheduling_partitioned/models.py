@@ -17,7 +17,14 @@ from corehq.form_processor.utils import is_commcarecase
 from corehq.messaging.scheduling import util
 from corehq.messaging.scheduling.exceptions import UnknownRecipientType
 from corehq.messaging.scheduling.models import AlertSchedule, TimedSchedule, IVRSurveyContent, SMSCallbackContent
+from corehq.messaging.scheduling.scheduling_partitioned.expansion_cache import (
+    get_cached_user_ids,
+    get_expansion_cache_key,
+    iter_cached_users,
+    set_cached_user_ids,
+)
 from corehq.sql_db.models import PartitionedModel
+from corehq.toggles import CACHED_RECIPIENT_EXPANSION
 from corehq.util.timezones.conversions import ServerTime, UserTime
 from corehq.util.timezones.utils import get_timezone_for_domain, coerce_timezone_value
 from couchdbkit.exceptions import ResourceNotFound
@@ -196,6 +203,18 @@ class ScheduleInstance(PartitionedModel):
                     user_ids.add(user.get_id)
                     yield user
 
+    @property
+    def includes_descendant_locations(self):
+        # Only include descendant locations when the recipient_type
+        # is RECIPIENT_TYPE_LOCATION. This is because we only do this
+        # for locations the user selected in the UI, and not for
+        # locations that happen to get here because they are a case
+        # owner, for example.
+        return (
+            self.recipient_type == self.RECIPIENT_TYPE_LOCATION
+            and self.memoized_schedule.include_descendant_locations
+        )
+
     def _expand_recipient(self, recipient):
         if recipient is None:
             return
@@ -210,15 +229,7 @@ class ScheduleInstance(PartitionedModel):
                 yield user
         elif isinstance(recipient, SQLLocation):
             location = recipient
-            if (
-                self.recipient_type == self.RECIPIENT_TYPE_LOCATION
-                and self.memoized_schedule.include_descendant_locations
-            ):
-                # Only include descendant locations when the recipient_type
-                # is RECIPIENT_TYPE_LOCATION. This is because we only do this
-                # for locations the user selected in the UI, and not for
-                # locations that happen to get here because they are a case
-                # owner, for example.
+            if self.includes_descendant_locations:
                 qs = location.get_descendants(include_self=True).filter(is_archived=False)
 
                 # We also only apply the location_type_filter when the recipient_type
@@ -269,11 +280,47 @@ class ScheduleInstance(PartitionedModel):
         if not isinstance(recipient_list, list):
             recipient_list = [recipient_list]
 
+        use_cache = CACHED_RECIPIENT_EXPANSION.enabled(self.domain)
         for member in recipient_list:
+            if use_cache and isinstance(member, (Group, SQLLocation)):
+                yield from self._expand_recipient_with_cache(member)
+                continue
+
             for contact in self._expand_recipient(member):
                 if self.passes_user_data_filter(contact):
                     yield contact
 
+    def _expand_recipient_with_cache(self, recipient):
+        """
+        Expands a user group or location, and caches the ids of the users
+        that pass the user data filter
+        """
+        if isinstance(recipient, SQLLocation) and self.includes_descendant_locations:
+            include_descendants = True
+            location_type_filter = self.memoized_schedule.location_type_filter
+        else:
+            include_descendants = False
+            location_type_filter = None
+
+        key = get_expansion_cache_key(
+            self.domain,
+            recipient,
+            include_descendants=include_descendants,
+            location_type_filter=location_type_filter,
+            user_data_filter=self.memoized_schedule.user_data_filter,
+        )
+        user_ids = get_cached_user_ids(key, recipient)
+        if user_ids is not None:
+            yield from iter_cached_users(user_ids)
+            return
+
+        users = [
+            user for user in self._expand_recipient(recipient)
+            if self.passes_user_data_filter(user)
+        ]
+        set_cached_user_ids(key, [user.get_id for user in users])
+        yield from users
+
     def get_content_send_lock(self, recipient):
         if is_commcarecase(recipient):
             doc_type = 'CommCareCase'
@@ -373,14 +420,22 @@ class ScheduleInstance(PartitionedModel):
     def schedule(self, value):
         raise NotImplementedError()
 
+    _memoized_schedule = None
+
     @property
-    @memoized
     def memoized_schedule(self):
         """
         This is named with a memoized_ prefix to be clear that it should only be used
-        when the schedule is not changing.
+        when the schedule is not changing. It can be set to share one schedule
+        between the instances that are handled together.
         """
-        return self.schedule
+        if self._memoized_schedule is None:
+            self._memoized_schedule = self.schedule
+        return self._memoized_schedule
+
+    @memoized_schedule.setter
+    def memoized_schedule(self, value):
+        self._memoized_schedule = value
 
     def additional_deactivation_condition_reached(self):
         """
@@ -391,26 +446,31 @@ class ScheduleInstance(PartitionedModel):
         """
         return False
 
-    def should_be_active(self):
-        return self.memoized_schedule.active and not self.additional_deactivation_condition_reached()
+    def should_be_active(self, schedule=None):
+        schedule = schedule or self.memoized_schedule
+        return schedule.active and not self.additional_deactivation_condition_reached()
 
-    def check_active_flag_against_schedule(self):
+    def check_active_flag_against_schedule(self, schedule=None):
         """
         Returns True if the active flag was changed and the schedule instance should be saved.
         Returns False if nothing changed.
+
+        :param schedule: The schedule to use to avoid a lookup; if None,
+        self.memoized_schedule is used
         """
-        should_be_active = self.should_be_active()
+        schedule = schedule or self.memoized_schedule
+        should_be_active = self.should_be_active(schedule)
 
         if self.active and not should_be_active:
             self.active = False
             return True
 
         if not self.active and should_be_active:
-            if self.memoized_schedule.total_iterations_complete(self):
+            if schedule.total_iterations_complete(self):
                 return False
 
             self.active = True
-            self.memoized_schedule.move_to_next_event_not_in_the_past(self)
+            schedule.move_to_next_event_not_in_the_past(self)
             return True
 
         return False
@@ -485,6 +545,29 @@ class AbstractTimedScheduleInstance(ScheduleInstance):
 
         self.timed_schedule_id = value.schedule_id
 
+    @staticmethod
+    def copy_for_recipient(instance, recipient_type, recipient_id):
+        """
+        Unlike alert schedule instances, timed schedule instances can only
+        be copied for a recipient in the same time zone as the recipient of
+        instance, and only when the schedule's events are not at random
+        times, because both factor into the calculation of the next event
+        due timestamp.
+        """
+        if not isinstance(instance, AbstractTimedScheduleInstance):
+            raise TypeError("Expected a timed schedule instance")
+
+        new_instance = type(instance)()
+
+        for field in instance._meta.fields:
+            if field.name not in ['schedule_instance_id', 'recipient_type', 'recipient_id']:
+                setattr(new_instance, field.name, getattr(instance, field.name))
+
+        new_instance.recipient_type = recipient_type
+        new_instance.recipient_id = recipient_id
+
+        return new_instance
+
     def recalculate_schedule(self, schedule=None, new_start_date=None):
         """
         Resets the start_date and recalulates the next_event_due timestamp for
@@ -0,0 +1,72 @@
+import uuid
+from datetime import datetime, timedelta
+
+from django.test import SimpleTestCase, override_settings
+
+from corehq.messaging.scheduling.scheduling_partitioned.due_index import (
+    _get_client,
+    add_to_due_index,
+    get_due_instances,
+)
+from corehq.messaging.scheduling.scheduling_partitioned.models import (
+    AlertScheduleInstance,
+)
+
+
+@override_settings(USE_SCHEDULE_INSTANCE_DUE_INDEX=True)
+class DueIndexTest(SimpleTestCase):
+
+    def setUp(self):
+        self.utcnow = datetime.utcnow()
+        self.schedule_id = uuid.uuid4()
+        self.addCleanup(self._delete_keys)
+
+    def _delete_keys(self):
+        client = _get_client()
+        for key in client.scan_iter('schedule-instances-due-AlertScheduleInstance-*'):
+            client.delete(key)
+
+    def _make_instance(self, next_event_due, active=True):
+        return AlertScheduleInstance(
+            schedule_instance_id=uuid.uuid4(),
+            domain='due-index-test',
+            recipient_type='CommCareUser',
+            recipient_id=uuid.uuid4().hex,
+            current_event_num=0,
+            schedule_iteration_num=1,
+            next_event_due=next_event_due,
+            active=active,
+            alert_schedule_id=self.schedule_id,
+        )
+
+    def _get_due_instance_ids(self, db_alias, due_before):
+        return {
+            due_instance.schedule_instance_id
+            for due_instance in get_due_instances(AlertScheduleInstance, db_alias, due_before)
+        }
+
+    def test_get_due_instances(self):
+        due = self._make_instance(self.utcnow - timedelta(minutes=1))
+        later = self._make_instance(self.utcnow + timedelta(hours=1))
+        inactive = self._make_instance(self.utcnow - timedelta(minutes=1), active=False)
+        add_to_due_index([due, later, inactive])
+
+        [due_instance] = get_due_instances(AlertScheduleInstance, due.db, self.utcnow)
+        self.assertEqual(due_instance.domain, 'due-index-test')
+        self.assertEqual(due_instance.group_id, self.schedule_id.hex)
+        self.assertEqual(due_instance.schedule_instance_id, due.schedule_instance_id)
+        self.assertEqual(due_instance.next_event_due, due.next_event_due)
+
+        self.assertEqual(
+            self._get_due_instance_ids(later.db, self.utcnow + timedelta(hours=1)),
+            {due.schedule_instance_id, later.schedule_instance_id},
+        )
+
+    def test_buckets_are_removed_after_they_are_read(self):
+        instance = self._make_instance(self.utcnow)
+        add_to_due_index([instance])
+        self.assertEqual(self._get_due_instance_ids(instance.db, self.utcnow), {instance.schedule_instance_id})
+
+        later = self.utcnow + timedelta(minutes=3)
+        self.assertEqual(self._get_due_instance_ids(instance.db, later), {instance.schedule_instance_id})
+        self.assertEqual(self._get_due_instance_ids(instance.db, later), set())
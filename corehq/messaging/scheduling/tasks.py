@@ -1,3 +1,5 @@
+import logging
+import time
 import uuid
 from datetime import datetime, timedelta
 
@@ -14,6 +16,8 @@ from corehq.messaging.scheduling.models import (
 )
 from corehq.messaging.scheduling.scheduling_partitioned.dbaccessors import (
     delete_alert_schedule_instance,
+    bulk_delete_schedule_instances,
+    bulk_save_schedule_instances,
     delete_alert_schedule_instances_for_schedule,
     delete_case_schedule_instance,
     delete_schedule_instances_by_case_id,
@@ -37,12 +41,19 @@ from corehq.messaging.scheduling.scheduling_partitioned.models import (
     CaseTimedScheduleInstance,
     TimedScheduleInstance,
 )
+from corehq.toggles import BULK_SCHEDULE_INSTANCE_REFRESH
 from corehq.util.celery_utils import no_result_task
 from corehq.util.dates import iso_string_to_date
+from corehq.util.metrics import metrics_counter
+
+logger = logging.getLogger(__name__)
 
 
 class ScheduleInstanceRefresher(object):
 
+    # The class of the instances, for refreshers that support refresh_in_bulk()
+    instance_class = None
+
     def __init__(self, schedule, new_recipients, existing_instances):
         self.schedule = schedule
         self.new_recipients = set(self._convert_to_tuple_of_tuples(new_recipients))
@@ -94,6 +105,19 @@ class ScheduleInstanceRefresher(object):
         """
         raise NotImplementedError()
 
+    def create_new_instances(self, recipients):
+        """
+        Creates the new instances for a list of (recipient_type, recipient_id)
+        tuples. Subclasses can override this to calculate the schedule once for
+        many recipients. The instances are not saved.
+
+        :return: A list of the new instances
+        """
+        return [
+            self.create_new_instance_for_recipient(recipient_type, recipient_id)
+            for recipient_type, recipient_id in recipients
+        ]
+
     def handle_existing_instance(self, instance):
         """
         Handles any processing needed for an instance that already exists for
@@ -157,9 +181,72 @@ class ScheduleInstanceRefresher(object):
             if needs_saving:
                 self.save_instance(instance)
 
+    def refresh_in_bulk(self):
+        """
+        Refreshes the instances like refresh() does, but creates, updates and
+        deletes them with one query per batch on each partitioned database.
+        """
+        start = time.perf_counter()
+        existing_recipients = set(self.existing_instances)
+
+        new_instances = self.create_new_instances(list(self.new_recipients - existing_recipients))
+        for instance in new_instances:
+            instance.check_active_flag_against_schedule(self.schedule)
+
+        changed_instances = []
+        for recipient_type_and_id in self.new_recipients & existing_recipients:
+            instance = self.existing_instances[recipient_type_and_id]
+            needs_saving = self.handle_existing_instance(instance)
+            if instance.check_active_flag_against_schedule(self.schedule):
+                needs_saving = True
+
+            if needs_saving:
+                changed_instances.append(instance)
+
+        deleted_instances = [
+            self.existing_instances[recipient_type_and_id]
+            for recipient_type_and_id in existing_recipients - self.new_recipients
+        ]
+
+        bulk_delete_schedule_instances(self.instance_class, deleted_instances)
+        bulk_save_schedule_instances(self.instance_class, new_instances, changed_instances)
+
+        duration = time.perf_counter() - start
+        counts = {
+            'created': len(new_instances),
+            'updated': len(changed_instances),
+            'deleted': len(deleted_instances),
+        }
+        for operation, count in counts.items():
+            metrics_counter('commcare.messaging.schedule_instance_refresh.rows', count, tags={
+                'operation': operation,
+                'instance_type': self.instance_class.__name__,
+            })
+        total = sum(counts.values())
+        logger.info(
+            "Refreshed %s instances of schedule %s in %.2fs (%.0f rows/sec): %s",
+            self.instance_class.__name__,
+            self.schedule.schedule_id.hex,
+            duration,
+            total / duration if duration else 0,
+            ", ".join(f"{count} {operation}" for operation, count in counts.items()),
+        )
+
 
 class AlertScheduleInstanceRefresher(ScheduleInstanceRefresher):
 
+    instance_class = AlertScheduleInstance
+
+    def create_new_instances(self, recipients):
+        instances = []
+        for recipient_type, recipient_id in recipients:
+            instance = self.create_new_instance_for_recipient(recipient_type, recipient_id)
+            # The next event due timestamp of alert schedule instances doesn't
+            # depend on the recipient, so copy the rest from the first one
+            self.model_instance = self.model_instance or instance
+            instances.append(instance)
+        return instances
+
     def create_new_instance_for_recipient(self, recipient_type, recipient_id):
         if self.model_instance:
             return AlertScheduleInstance.copy_for_recipient(self.model_instance, recipient_type, recipient_id)
@@ -177,6 +264,8 @@ class AlertScheduleInstanceRefresher(ScheduleInstanceRefresher):
 
 class TimedScheduleInstanceRefresher(ScheduleInstanceRefresher):
 
+    instance_class = TimedScheduleInstance
+
     def __init__(self, schedule, new_recipients, existing_instances, start_date=None):
         super(TimedScheduleInstanceRefresher, self).__init__(schedule, new_recipients, existing_instances)
         self.start_date = start_date
@@ -192,6 +281,33 @@ class TimedScheduleInstanceRefresher(ScheduleInstanceRefresher):
             schedule_revision=self.schedule_revision,
         )
 
+    def create_new_instances(self, recipients):
+        if self.schedule.event_type != TimedSchedule.EVENT_SPECIFIC_TIME:
+            return super().create_new_instances(recipients)
+
+        # The next event due timestamp depends only on the recipient's time
+        # zone, so calculate it once for each time zone
+        instances = []
+        instances_by_timezone = {}
+        for recipient_type, recipient_id in recipients:
+            timezone = str(TimedScheduleInstance(
+                domain=self.schedule.domain,
+                recipient_type=recipient_type,
+                recipient_id=recipient_id,
+            ).get_timezone(self.schedule))
+
+            if timezone in instances_by_timezone:
+                instance = TimedScheduleInstance.copy_for_recipient(
+                    instances_by_timezone[timezone],
+                    recipient_type,
+                    recipient_id,
+                )
+            else:
+                instance = self.create_new_instance_for_recipient(recipient_type, recipient_id)
+                instances_by_timezone[timezone] = instance
+            instances.append(instance)
+        return instances
+
     def handle_existing_instance(self, instance):
         if (
             (self.start_date and self.start_date != instance.start_date) or
@@ -301,11 +417,15 @@ def refresh_alert_schedule_instances(schedule_id, recipients):
     schedule_uuid = uuid.UUID(schedule_id)
     with CriticalSection(['refresh-alert-schedule-instances-for-%s' % schedule_uuid.hex], timeout=5 * 60):
         schedule = AlertSchedule.objects.get(schedule_id=schedule_uuid)
-        AlertScheduleInstanceRefresher(
+        refresher = AlertScheduleInstanceRefresher(
             schedule,
             recipients,
             get_alert_schedule_instances_for_schedule(schedule)
-        ).refresh()
+        )
+        if BULK_SCHEDULE_INSTANCE_REFRESH.enabled(schedule.domain):
+            refresher.refresh_in_bulk()
+        else:
+            refresher.refresh()
 
 
 @task(queue=settings.CELERY_REMINDER_RULE_QUEUE, ignore_result=True)
@@ -320,12 +440,16 @@ def refresh_timed_schedule_instances(schedule_id, recipients, start_date_iso_str
     start_date = iso_string_to_date(start_date_iso_string) if start_date_iso_string else None
     with CriticalSection(['refresh-timed-schedule-instances-for-%s' % schedule_uuid.hex], timeout=5 * 60):
         schedule = TimedSchedule.objects.get(schedule_id=schedule_uuid)
-        TimedScheduleInstanceRefresher(
+        refresher = TimedScheduleInstanceRefresher(
             schedule,
             recipients,
             get_timed_schedule_instances_for_schedule(schedule),
             start_date=start_date
-        ).refresh()
+        )
+        if BULK_SCHEDULE_INSTANCE_REFRESH.enabled(schedule.domain):
+            refresher.refresh_in_bulk()
+        else:
+            refresher.refresh()
 
 
 @no_result_task(queue=settings.CELERY_REMINDER_RULE_QUEUE, acks_late=True,
@@ -499,6 +623,69 @@ def handle_timed_schedule_instance(schedule_instance_id, domain):
             update_broadcast_last_sent_timestamp(ScheduledBroadcast, instance.timed_schedule_id)
 
 
+@no_result_task(queue='reminder_queue')
+def handle_alert_schedule_instances(schedule_id, schedule_instance_ids, domain):
+    """
+    Handles several instances of the same AlertSchedule, sharing the schedule
+    between them
+    """
+    schedule = AlertSchedule.objects.get(schedule_id=uuid.UUID(schedule_id))
+    _handle_broadcast_schedule_instances(
+        schedule,
+        schedule_instance_ids,
+        'handle-alert-schedule-instance-%s',
+        get_alert_schedule_instance,
+        AlertScheduleInstance.DoesNotExist,
+        save_alert_schedule_instance,
+        ImmediateBroadcast,
+        'alert_schedule_id',
+    )
+
+
+@no_result_task(queue='reminder_queue')
+def handle_timed_schedule_instances(schedule_id, schedule_instance_ids, domain):
+    """
+    Handles several instances of the same TimedSchedule, sharing the schedule
+    between them
+    """
+    schedule = TimedSchedule.objects.get(schedule_id=uuid.UUID(schedule_id))
+    _handle_broadcast_schedule_instances(
+        schedule,
+        schedule_instance_ids,
+        'handle-timed-schedule-instance-%s',
+        get_timed_schedule_instance,
+        TimedScheduleInstance.DoesNotExist,
+        save_timed_schedule_instance,
+        ScheduledBroadcast,
+        'timed_schedule_id',
+    )
+
+
+def _handle_broadcast_schedule_instances(schedule, schedule_instance_ids, lock_key_format, get_function,
+                                         does_not_exist_class, save_function, broadcast_class,
+                                         schedule_id_field):
+    handled = False
+    for schedule_instance_id in schedule_instance_ids:
+        schedule_instance_uuid = uuid.UUID(schedule_instance_id)
+        with CriticalSection([lock_key_format % schedule_instance_uuid.hex]):
+            try:
+                instance = get_function(schedule_instance_uuid)
+            except does_not_exist_class:
+                continue
+
+            if getattr(instance, schedule_id_field) == schedule.schedule_id:
+                instance.memoized_schedule = schedule
+            try:
+                if _handle_schedule_instance(instance, save_function):
+                    handled = True
+            except Exception:
+                # Handle the other instances; this one is retried later
+                logger.exception("Error handling schedule instance %s", schedule_instance_uuid.hex)
+
+    if handled:
+        update_broadcast_last_sent_timestamp(broadcast_class, schedule.schedule_id)
+
+
 @no_result_task(queue='reminder_queue')
 def handle_case_alert_schedule_instance(case_id, schedule_instance_id, domain):
     schedule_instance_uuid = uuid.UUID(schedule_instance_id)
@@ -2,6 +2,7 @@ import contextlib
 import uuid
 from datetime import time
 
+from django.core.cache import cache
 from django.test import TestCase, override_settings
 
 from unittest.mock import patch
@@ -40,6 +41,7 @@ from corehq.messaging.scheduling.scheduling_partitioned.models import (
 from corehq.messaging.scheduling.tests.util import delete_timed_schedules
 from corehq.util.test_utils import (
     create_test_case,
+    flag_enabled,
     set_parent_case,
     unregistered_django_model,
 )
@@ -555,6 +557,129 @@ class SchedulingRecipientTest(TestCase):
             [self.mobile_user4.get_id, self.mobile_user5.get_id, self.mobile_user6.get_id]
         )
 
+    @flag_enabled('CACHED_RECIPIENT_EXPANSION')
+    def test_cached_group_recipients_with_user_data_filter(self):
+        self.addCleanup(cache.clear)
+        schedule = TimedSchedule.create_simple_daily_schedule(
+            self.domain,
+            TimedEvent(time=time(9, 0)),
+            SMSContent(message={'en': 'Hello'})
+        )
+        schedule.user_data_filter = {'role': ['nurse']}
+        schedule.save()
+
+        instance = CaseTimedScheduleInstance(
+            domain=self.domain,
+            timed_schedule_id=schedule.schedule_id,
+            recipient_type='Group',
+            recipient_id=self.group2.get_id
+        )
+        expected = [self.mobile_user4.get_id, self.mobile_user5.get_id, self.mobile_user6.get_id]
+        self.assertItemsEqual(self.user_ids(instance.expand_recipients()), expected)
+
+        with patch.object(CaseTimedScheduleInstance, '_expand_recipient') as expand_recipient:
+            self.assertItemsEqual(self.user_ids(instance.expand_recipients()), expected)
+        expand_recipient.assert_not_called()
+
+    @flag_enabled('CACHED_RECIPIENT_EXPANSION')
+    def test_cached_location_recipients_are_invalidated_by_location_save(self):
+        self.addCleanup(cache.clear)
+        schedule = TimedSchedule.create_simple_daily_schedule(
+            self.domain,
+            TimedEvent(time=time(9, 0)),
+            SMSContent(message={'en': 'Hello'})
+        )
+        schedule.include_descendant_locations = True
+        schedule.save()
+
+        instance = CaseTimedScheduleInstance(
+            domain=self.domain,
+            timed_schedule_id=schedule.schedule_id,
+            recipient_type='Location',
+            recipient_id=self.state_location.location_id
+        )
+        expected = [self.mobile_user.get_id, self.mobile_user2.get_id]
+        self.assertItemsEqual(self.user_ids(instance.expand_recipients()), expected)
+
+        self.city_location.save()
+        with patch.object(
+            CaseTimedScheduleInstance, '_expand_recipient', wraps=instance._expand_recipient
+        ) as expand_recipient:
+            self.assertItemsEqual(self.user_ids(instance.expand_recipients()), expected)
+        expand_recipient.assert_called_once()
+
+    @flag_enabled('CACHED_RECIPIENT_EXPANSION')
+    def test_cached_group_recipients_are_invalidated_by_user_data_change(self):
+        self.addCleanup(cache.clear)
+        schedule = TimedSchedule.create_simple_daily_schedule(
+            self.domain,
+            TimedEvent(time=time(9, 0)),
+            SMSContent(message={'en': 'Hello'})
+        )
+        schedule.user_data_filter = {'role': ['nurse']}
+        schedule.save()
+
+        instance = CaseTimedScheduleInstance(
+            domain=self.domain,
+            timed_schedule_id=schedule.schedule_id,
+            recipient_type='Group',
+            recipient_id=self.group2.get_id
+        )
+        self.mobile_user4.save()
+        expected = [self.mobile_user4.get_id, self.mobile_user5.get_id, self.mobile_user6.get_id]
+        self.assertItemsEqual(self.user_ids(instance.expand_recipients()), expected)
+
+        # a change that does not affect expansion keeps the cache
+        self.mobile_user4.first_name = 'Mobile'
+        self.mobile_user4.save()
+        with patch.object(CaseTimedScheduleInstance, '_expand_recipient') as expand_recipient:
+            self.assertItemsEqual(self.user_ids(instance.expand_recipients()), expected)
+        expand_recipient.assert_not_called()
+
+        self.addCleanup(self._set_role, self.mobile_user4, 'nurse')
+        self._set_role(self.mobile_user4, 'pharmacist')
+        self.assertItemsEqual(
+            self.user_ids(instance.expand_recipients()),
+            [self.mobile_user5.get_id, self.mobile_user6.get_id]
+        )
+
+    @flag_enabled('CACHED_RECIPIENT_EXPANSION')
+    def test_cached_group_recipients_are_invalidated_by_retiring_user(self):
+        self.addCleanup(cache.clear)
+        user = CommCareUser.create(self.domain, 'mobile-retired', 'abc', None, None)
+        self.addCleanup(user.delete, self.domain, deleted_by=None)
+        group = Group(domain=self.domain, users=[self.mobile_user.get_id, user.get_id])
+        group.save()
+        self.addCleanup(group.delete)
+        schedule = TimedSchedule.create_simple_daily_schedule(
+            self.domain,
+            TimedEvent(time=time(9, 0)),
+            SMSContent(message={'en': 'Hello'})
+        )
+
+        instance = CaseTimedScheduleInstance(
+            domain=self.domain,
+            timed_schedule_id=schedule.schedule_id,
+            recipient_type='Group',
+            recipient_id=group.get_id
+        )
+        self.assertItemsEqual(
+            self.user_ids(instance.expand_recipients()),
+            [self.mobile_user.get_id, user.get_id]
+        )
+
+        user.retire(self.domain, deleted_by=None)
+        with patch.object(
+            CaseTimedScheduleInstance, '_expand_recipient', wraps=instance._expand_recipient
+        ) as expand_recipient:
+            self.assertItemsEqual(self.user_ids(instance.expand_recipients()), [self.mobile_user.get_id])
+        expand_recipient.assert_called_once()
+
+    @staticmethod
+    def _set_role(user, role):
+        user.update_metadata({'role': role})
+        user.save()
+
     def test_web_user_recipient_with_user_data_filter(self):
         schedule = TimedSchedule.create_simple_daily_schedule(
             self.domain,
@@ -1,3 +1,4 @@
+import uuid
 from datetime import date, datetime, time
 
 from django.test import TestCase
@@ -34,9 +35,11 @@ from corehq.messaging.scheduling.scheduling_partitioned.models import (
     TimedScheduleInstance,
 )
 from corehq.messaging.scheduling.tasks import (
+    handle_alert_schedule_instances,
     refresh_alert_schedule_instances,
     refresh_timed_schedule_instances,
 )
+from corehq.util.test_utils import flag_enabled
 
 
 class BaseScheduleTest(TestCase):
@@ -234,6 +237,35 @@ class TimedScheduleActiveFlagTest(BaseScheduleTest):
                 date(2017, 3, 16), self.user1)
             self.assertEqual(send_patch.call_count, 0)
 
+    @flag_enabled('BULK_SCHEDULE_INSTANCE_REFRESH')
+    def test_bulk_refresh(self, utcnow_patch, send_patch):
+        utcnow_patch.return_value = datetime(2017, 3, 16, 6, 0)
+        refresh_timed_schedule_instances(
+            self.schedule.schedule_id.hex,
+            (('CommCareUser', self.user1.get_id), ('CommCareUser', self.user2.get_id)),
+        )
+        self.assertNumInstancesForSchedule(2)
+        instances = {
+            instance.recipient_id: instance
+            for instance in get_timed_schedule_instances_for_schedule(self.schedule)
+        }
+        for user in (self.user1, self.user2):
+            self.assertTimedScheduleInstance(instances[user.get_id], 0, 1, datetime(2017, 3, 16, 16, 0), True,
+                date(2017, 3, 16), user)
+
+        # Deactivate and remove a recipient
+        self.schedule.active = False
+        self.schedule.save()
+        refresh_timed_schedule_instances(
+            self.schedule.schedule_id.hex,
+            (('CommCareUser', self.user2.get_id),),
+        )
+        self.assertNumInstancesForSchedule(1)
+        [instance] = get_timed_schedule_instances_for_schedule(self.schedule)
+        self.assertTimedScheduleInstance(instance, 0, 1, datetime(2017, 3, 16, 16, 0), False, date(2017, 3, 16),
+            self.user2)
+        self.assertEqual(send_patch.call_count, 0)
+
 
 class StopDateCasePropertyTest(TestCase):
 
@@ -1495,6 +1527,48 @@ class AlertTest(TestCase):
         self.assertAlertScheduleInstance(instance, 0, 2, datetime(2017, 3, 16, 6, 42, 21), False, self.user2)
         self.assertEqual(send_patch.call_count, 1)
 
+    @flag_enabled('BULK_SCHEDULE_INSTANCE_REFRESH')
+    def test_bulk_refresh(self, utcnow_patch, send_patch):
+        utcnow_patch.return_value = datetime(2017, 3, 16, 6, 42, 21)
+        refresh_alert_schedule_instances(
+            self.schedule.schedule_id.hex,
+            (('CommCareUser', self.user1.get_id), ('CommCareUser', self.user2.get_id)),
+        )
+        self.assertNumInstancesForSchedule(2)
+        instances = {
+            instance.recipient_id: instance
+            for instance in get_alert_schedule_instances_for_schedule(self.schedule)
+        }
+        for user in (self.user1, self.user2):
+            self.assertAlertScheduleInstance(instances[user.get_id], 0, 1, datetime(2017, 3, 16, 6, 42, 21),
+                True, user)
+
+        utcnow_patch.return_value = datetime(2017, 3, 16, 7, 0)
+        refresh_alert_schedule_instances(self.schedule.schedule_id.hex, (('CommCareUser', self.user2.get_id),))
+        self.assertNumInstancesForSchedule(1)
+        [instance] = get_alert_schedule_instances_for_schedule(self.schedule)
+        self.assertAlertScheduleInstance(instance, 0, 1, datetime(2017, 3, 16, 6, 42, 21), True, self.user2)
+        self.assertEqual(send_patch.call_count, 0)
+
+    def test_handle_alert_schedule_instances(self, utcnow_patch, send_patch):
+        utcnow_patch.return_value = datetime(2017, 3, 16, 6, 42, 21)
+        refresh_alert_schedule_instances(
+            self.schedule.schedule_id.hex,
+            (('CommCareUser', self.user1.get_id), ('CommCareUser', self.user2.get_id)),
+        )
+        instance_ids = [
+            instance.schedule_instance_id.hex
+            for instance in get_alert_schedule_instances_for_schedule(self.schedule)
+        ]
+
+        utcnow_patch.return_value = datetime(2017, 3, 16, 6, 42, 22)
+        handle_alert_schedule_instances(self.schedule.schedule_id.hex, instance_ids + [uuid.uuid4().hex],
+            self.domain)
+        self.assertEqual(send_patch.call_count, 2)
+        for instance in get_alert_schedule_instances_for_schedule(self.schedule):
+            self.assertEqual(instance.schedule_iteration_num, 2)
+            self.assertFalse(instance.active)
+
     def test_stale_alert(self, utcnow_patch, send_patch):
         self.assertNumInstancesForSchedule(0)
 
@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+
+from corehq.apps.locations.models import SQLLocation
+from corehq.apps.users.signals import couch_user_post_save
+from corehq.messaging.scheduling.scheduling_partitioned.expansion_cache import (
+    clear_expansion_cache_for_location,
+    clear_expansion_cache_for_user,
+)
+
+couch_user_post_save.connect(
+    clear_expansion_cache_for_user,
+    dispatch_uid="clear_recipient_expansion_cache_for_user",
+)
+post_save.connect(
+    clear_expansion_cache_for_location,
+    sender=SQLLocation,
+    dispatch_uid="clear_recipient_expansion_cache_for_saved_location",
+)
+post_delete.connect(
+    clear_expansion_cache_for_location,
+    sender=SQLLocation,
+    dispatch_uid="clear_recipient_expansion_cache_for_deleted_location",
+)
@@ -6,6 +6,7 @@ from django.conf import settings
 
 from corehq.apps.change_feed.topics import CASE_TOPICS
 from corehq.apps.change_feed.consumer.feed import KafkaChangeFeed, KafkaCheckpointEventHandler
+from corehq.apps.export.pillow import IncrementalExportDeltaProcessor
 from corehq.apps.userreports.data_source_providers import DynamicDataSourceProvider, StaticDataSourceProvider
 from corehq.apps.userreports.pillow import get_ucr_processor, get_data_registry_ucr_processor
 from corehq.elastic import get_es_new
@@ -76,7 +77,8 @@ def get_case_pillow(
         include_ucrs=None, exclude_ucrs=None,
         num_processes=1, process_num=0, ucr_configs=None, skip_ucr=False,
         processor_chunk_size=DEFAULT_PROCESSOR_CHUNK_SIZE, topics=None,
-        dedicated_migration_process=False, **kwargs):
+        dedicated_migration_process=False, parallel_processors=False,
+        processor_chunk_latency_target=None, **kwargs):
     """Return a pillow that processes cases. The processors include, UCR and elastic processors
 
     Processors:
@@ -84,6 +86,7 @@ def get_case_pillow(
       - :py:class:`pillowtop.processors.elastic.BulkElasticProcessor`
       - :py:func:`corehq.pillows.case_search.get_case_search_processor`
       - :py:class:`corehq.messaging.pillow.CaseMessagingSyncProcessor`
+      - :py:class:`corehq.apps.export.pillow.IncrementalExportDeltaProcessor`
     """
     if topics:
         assert set(topics).issubset(CASE_TOPICS), "This is a pillow to process cases only"
@@ -123,7 +126,7 @@ def get_case_pillow(
         checkpoint=checkpoint, checkpoint_frequency=1000, change_feed=change_feed,
         checkpoint_callback=ucr_processor
     )
-    processors = [case_to_es_processor, CaseMessagingSyncProcessor()]
+    processors = [case_to_es_processor, CaseMessagingSyncProcessor(), IncrementalExportDeltaProcessor()]
     if settings.RUN_CASE_SEARCH_PILLOW:
         processors.append(case_search_processor)
     if not skip_ucr:
@@ -137,7 +140,9 @@ def get_case_pillow(
         processor=processors,
         processor_chunk_size=processor_chunk_size,
         process_num=process_num,
-        is_dedicated_migration_process=dedicated_migration_process and run_migrations
+        is_dedicated_migration_process=dedicated_migration_process and run_migrations,
+        parallel_processors=parallel_processors,
+        processor_chunk_latency_target=processor_chunk_latency_target
     )
 
 
@@ -145,6 +150,7 @@ class SqlCaseReindexerFactory(ReindexerFactory):
     slug = 'sql-case'
     arg_contributors = [
         ReindexerFactory.resumable_reindexer_args,
+        ReindexerFactory.parallel_reindexer_args,
         ReindexerFactory.elastic_reindexer_args,
         ReindexerFactory.limit_db_args,
         ReindexerFactory.domain_arg,
@@ -12,6 +12,7 @@ from casexml.apps.case.xml.parser import CaseGenerationException, case_update_fr
 from corehq.apps.change_feed.topics import FORM_TOPICS
 from corehq.apps.change_feed.consumer.feed import KafkaChangeFeed, KafkaCheckpointEventHandler
 from corehq.apps.data_interfaces.pillow import CaseDeduplicationProcessor
+from corehq.apps.export.pillow import IncrementalExportDeltaProcessor
 from corehq.apps.receiverwrapper.util import get_app_version_info
 from corehq.apps.userreports.data_source_providers import DynamicDataSourceProvider, StaticDataSourceProvider
 from corehq.apps.userreports.pillow import get_ucr_processor
@@ -183,7 +184,8 @@ def get_xform_pillow(pillow_id='xform-pillow', ucr_division=None,
                      include_ucrs=None, exclude_ucrs=None,
                      num_processes=1, process_num=0, ucr_configs=None, skip_ucr=False,
                      processor_chunk_size=DEFAULT_PROCESSOR_CHUNK_SIZE,
-                     topics=None, dedicated_migration_process=False, **kwargs):
+                     topics=None, dedicated_migration_process=False, parallel_processors=False,
+                     processor_chunk_latency_target=None, **kwargs):
     """Generic XForm change processor
 
     Processors:
@@ -192,6 +194,7 @@ def get_xform_pillow(pillow_id='xform-pillow', ucr_division=None,
       - :py:class:`corehq.pillows.user.UnknownUsersProcessor` (disabled when RUN_UNKNOWN_USER_PILLOW=False)
       - :py:class:`pillowtop.form.FormSubmissionMetadataTrackerProcessor` (disabled when RUN_FORM_META_PILLOW=False)
       - :py:class:`corehq.apps.data_interfaces.pillow.CaseDeduplicationPillow``
+      - :py:class:`corehq.apps.export.pillow.IncrementalExportDeltaProcessor`
     """
     # avoid circular dependency
     from corehq.pillows.mappings.user_mapping import USER_INDEX
@@ -238,6 +241,7 @@ def get_xform_pillow(pillow_id='xform-pillow', ucr_division=None,
         processors.append(form_meta_processor)
     if settings.RUN_DEDUPLICATION_PILLOW:
         processors.append(CaseDeduplicationProcessor())
+    processors.append(IncrementalExportDeltaProcessor())
     if not skip_ucr:
         processors.append(ucr_processor)
 
@@ -249,7 +253,9 @@ def get_xform_pillow(pillow_id='xform-pillow', ucr_division=None,
         processor=processors,
         processor_chunk_size=processor_chunk_size,
         process_num=process_num,
-        is_dedicated_migration_process=dedicated_migration_process and (process_num == 0)
+        is_dedicated_migration_process=dedicated_migration_process and (process_num == 0),
+        parallel_processors=parallel_processors,
+        processor_chunk_latency_target=processor_chunk_latency_target
     )
 
 
@@ -257,6 +263,7 @@ class SqlFormReindexerFactory(ReindexerFactory):
     slug = 'sql-form'
     arg_contributors = [
         ReindexerFactory.resumable_reindexer_args,
+        ReindexerFactory.parallel_reindexer_args,
         ReindexerFactory.elastic_reindexer_args,
         ReindexerFactory.limit_db_args,
         ReindexerFactory.domain_arg,
@@ -43,7 +43,7 @@ REPLICATION_SQL_9_6 = """
 
 
 def paginate_query_across_partitioned_databases(model_class, q_expression, annotate=None, query_size=5000,
-                                                values=None, load_source=None):
+                                                values=None, load_source=None, limit_db_aliases=None):
     """
     Runs a query across all partitioned databases in small chunks and produces a generator
     with the results.
@@ -59,9 +59,13 @@ def paginate_query_across_partitioned_databases(model_class, q_expression, annot
     :param values: (optional) If specified, should be a list of values to retrieve rather
     than retrieving entire objects.
 
+    :param limit_db_aliases: (optional) If specified, only query these databases
+
     :return: A generator with the results
     """
     db_names = get_db_aliases_for_partitioned_query()
+    if limit_db_aliases:
+        db_names = [db_name for db_name in db_names if db_name in limit_db_aliases]
     for db_name in db_names:
         for row in paginate_query(db_name, model_class, q_expression, annotate, query_size, values, load_source):
             yield row
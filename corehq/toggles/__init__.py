@@ -1377,6 +1377,19 @@ CASE_DEDUPE = StaticToggle(
     help_link='https://confluence.dimagi.com/display/saas/Surfacing+Case+Duplicates+in+CommCare',
 )
 
+CASE_DEDUPE_BULK_BACKFILL = StaticToggle(
+    'case_dedupe_bulk_backfill',
+    'Backfill case deduplication rules in bulk',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description="""
+    When a deduplication rule is backfilled, read the cases of its case type
+    once and find their duplicates in memory, grouping cases by the values of
+    the rule's case properties, instead of querying Elasticsearch for the
+    duplicates of each case. Duplicates are saved in bulk.
+    """
+)
+
 LEGACY_SYNC_SUPPORT = StaticToggle(
     'legacy_sync_support',
     "Support mobile sync bugs in older projects (2.9 and below).",
@@ -1562,6 +1575,94 @@ INCREMENTAL_EXPORTS = StaticToggle(
     help_link="https://confluence.dimagi.com/display/saas/Incremental+Data+Exports"
 )
 
+
+def _stop_incremental_export_delta_logs(domain, enabled):
+    from corehq.apps.export.models.incremental import stop_incremental_export_delta_logs
+    stop_incremental_export_delta_logs(domain)
+
+
+INCREMENTAL_EXPORT_DELTA_LOG = StaticToggle(
+    'incremental_export_delta_log',
+    'Generate incremental exports from a log of changed documents',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description="""
+    Log the form and case changes of incremental exports from the change
+    feed, and generate incremental exports from the changed documents in
+    the log instead of querying Elasticsearch for all documents modified
+    since the last export. Exported files start with a doc_id and a deleted
+    column, and have a row for each deleted or archived document.
+    """,
+    save_fn=_stop_incremental_export_delta_logs,
+)
+
+CACHED_EXPORT_SCHEMAS = StaticToggle(
+    'cached_export_schemas',
+    'Cache the export schemas of app builds',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description="""
+    Cache the part of form and case export schemas that comes from each app
+    build, keyed by a hash of the forms and case properties it is generated
+    from, so that builds that did not change are not processed again when
+    export schemas are generated. The schemas of new builds are generated
+    in the background when they are made.
+    """
+)
+
+CACHED_SUITE_MODULES = StaticToggle(
+    'cached_suite_modules',
+    'Cache the suite entries and menus of each module',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description="""
+    Cache the entries and menus that each module contributes to suite.xml,
+    keyed by a hash of the module, the modules it refers to or that refer to
+    it, and the app settings, so that builds and previews only generate them
+    again for modules that changed.
+    """
+)
+
+CACHED_LOOKUP_TABLE_FIXTURES = StaticToggle(
+    'cached_lookup_table_fixtures',
+    'Cache the restore fixtures of each lookup table',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description="""
+    Cache the rendered fixture of each global lookup table until the table
+    is changed, so that a change to one table does not render the other
+    tables again. Cache the fixtures of user-owned rows for each set of
+    owners, so that users with the same locations and groups share them.
+    """
+)
+
+BULK_SCHEDULE_INSTANCE_REFRESH = StaticToggle(
+    'bulk_schedule_instance_refresh',
+    'Refresh the schedule instances of broadcasts in bulk',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description="""
+    When the recipients of a broadcast are refreshed, compute the schedule of
+    new recipients once per time zone rather than once per recipient, and
+    create, update and delete schedule instances with one query per batch on
+    each partitioned database rather than one query per instance.
+    """
+)
+
+CACHED_RECIPIENT_EXPANSION = StaticToggle(
+    'cached_recipient_expansion',
+    'Cache the users that scheduled messaging recipients expand to',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description="""
+    Cache the ids of the users that user group and location recipients of
+    broadcasts and conditional alerts expand to, so that schedule instances
+    that share a recipient do not look up its users each time they send
+    content. The cache of a project is invalidated when one of its users or
+    locations is saved.
+    """
+)
+
 SKIP_REMOVE_INDICES = StaticToggle(
     'skip_remove_indices',
     'Make _remove_indices_from_deleted_cases_task into a no-op.',
@@ -1925,6 +2026,76 @@ LIVEQUERY_READ_FROM_STANDBYS = DynamicallyPredictablyRandomToggle(
     """
 )
 
+LIVEQUERY_CASE_GRAPH_CACHE = StaticToggle(
+    'livequery_case_graph_cache',
+    'Reuse the livequery case graph computed by the previous restore',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description="""
+    Persist the case graph walked by livequery restores and only walk
+    indices that are new since the previous restore for the same owners.
+    Intended for projects where users own a very large number of cases.
+    """
+)
+
+LIVEQUERY_CASE_GRAPH_CACHE_CHECK = DynamicallyPredictablyRandomToggle(
+    'livequery_case_graph_cache_check',
+    'Verify cached livequery case graphs against a full case graph walk',
+    TAG_INTERNAL,
+    [NAMESPACE_USER],
+    description="""
+    Sample restores that use a cached case graph and compare the result
+    with a full walk. Mismatches are logged and the full walk is used.
+    """
+)
+
+UCR_PREFETCH_RELATED_DOCS = StaticToggle(
+    'ucr_prefetch_related_docs',
+    'Bulk fetch documents used by related_doc and get_subcases UCR expressions',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description="""
+    When processing a chunk of documents for UCRs, fetch the documents
+    referenced by related_doc and get_subcases expressions for the whole
+    chunk up front instead of one at a time.
+    """
+)
+
+UCR_SHARD_PARALLEL_REBUILD = StaticToggle(
+    'ucr_shard_parallel_rebuild',
+    'Rebuild form and case UCR data sources with one task per form processor database',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description="""
+    Split rebuilding a form or case data source into one celery task for
+    each form processor database so that the databases are read
+    concurrently. Each task can be resumed separately.
+    """
+)
+
+UCR_COPY_BULK_LOAD = StaticToggle(
+    'ucr_copy_bulk_load',
+    'Save large batches of UCR rows with COPY',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description="""
+    Write batches of data source rows by streaming them into a temporary
+    table with COPY and merging them into the data source table with a
+    single statement, instead of a multi-row INSERT.
+    """
+)
+
+COLUMNAR_EXPORT_FORMATS = StaticToggle(
+    'columnar_export_formats',
+    'Allow Parquet and Arrow formats for exports',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description="""
+    Add Parquet and Arrow IPC to the file formats of form and case
+    exports. Each table is written to a typed columnar file in a zip file.
+    """
+)
+
 ACCOUNTING_TESTING_TOOLS = StaticToggle(
     'accounting_testing_tools',
     'Enable Accounting Testing Tools',
@@ -25,13 +25,15 @@ def drop_connected_signals(signal):
 
 
 @contextmanager
-def notify_someone(email, success_message, error_message='Sorry, your HQ task failed!', send=True):
+def notify_someone(email, success_message, error_message='Sorry, your HQ task failed!', send=True,
+                   send_success=True):
     def send_message_if_needed(message, exception=None):
         if email and send:
             soft_assert(to=email, notify_admins=False, send_to_ops=False)(False, message, exception)
     try:
         yield
-        send_message_if_needed(success_message)
+        if send_success:
+            send_message_if_needed(success_message)
     except BaseException as e:
         send_message_if_needed(error_message, e)
         raise
@@ -173,6 +173,19 @@ class CouchDocumentProvider(DocumentProvider):
             domain=self.domain
         )
 
+    def get_partitions(self):
+        """One partition for each doc type"""
+        if len(self.doc_types) < 2:
+            return [self]
+        return [
+            CouchDocumentProvider(
+                '{}_{}'.format(self.iteration_key, doc_type),
+                [(doc_type, self.doc_type_map[doc_type])],
+                domain=self.domain,
+            )
+            for doc_type in self.doc_types
+        ]
+
     def get_total_document_count(self):
         from corehq.dbaccessors.couchapps.all_docs import get_doc_count_by_type, get_doc_count_by_domain_type
         if self.domain:
@@ -203,6 +216,17 @@ class CouchViewDocumentProvider(DocumentProvider):
     def get_total_document_count(self):
         return -1
 
+    def get_partitions(self):
+        """One partition for each view key"""
+        if len(self.view_keys) < 2:
+            return [self]
+        return [
+            CouchViewDocumentProvider(
+                self.couchdb, '{}_{}'.format(self.iteration_key, i), self.view_name, [view_key]
+            )
+            for i, view_key in enumerate(self.view_keys)
+        ]
+
 
 def doc_type_tuples_to_dict(doc_types):
     return dict(
@@ -50,6 +50,13 @@ class BaseDocProcessor(metaclass=ABCMeta):
     def processing_complete(self, skipped):
         pass
 
+    def reset_connections(self):
+        """Called in each worker process of ``ParallelDocumentProcessorController``
+        before it processes documents, so that the processor can open its
+        own connections rather than share those of the parent process.
+        """
+        pass
+
     def should_process(self, doc):
         """
         :param doc: the document to filter
@@ -75,6 +82,14 @@ class DocumentProvider(metaclass=ABCMeta):
         """
         raise NotImplementedError
 
+    def get_partitions(self):
+        """Split the documents into parts that can be processed in parallel
+
+        :return: a list of ``DocumentProvider`` objects that together provide
+        the documents of this provider. Each must have its own iteration key.
+        """
+        return [self]
+
 
 class DocumentProcessorController(object):
     """Process Docs
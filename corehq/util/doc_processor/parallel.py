@@ -0,0 +1,190 @@
+import logging
+import multiprocessing
+from collections import namedtuple
+from datetime import datetime, timedelta
+from queue import Empty
+
+from django.db import connections
+
+from .interface import DocumentProcessorController
+from .progress import ProcessorProgressLogger
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_INTERVAL = timedelta(seconds=30)
+
+PartitionStarting = namedtuple('PartitionStarting', 'index total previously_visited')
+PartitionProgress = namedtuple('PartitionProgress', 'index processed visited total')
+PartitionDone = namedtuple('PartitionDone', 'index processed skipped success')
+
+
+class ParallelProcessingFailed(Exception):
+    pass
+
+
+class ParallelDocumentProcessorController(object):
+    """Process docs with several worker processes
+
+    The documents of the provider are split into partitions with
+    ``DocumentProvider.get_partitions()``, and each partition is processed
+    by its own ``controller_class`` in a worker process. Each partition
+    has its own iteration key, so it is resumed from its own checkpoint.
+    At most ``workers`` partitions are processed at a time, and a
+    partition is only started when a worker is free, so the load on the
+    databases does not grow with the number of partitions.
+
+    The doc processor is copied to each worker process when it is
+    started, and its ``reset_connections`` is called before the worker
+    processes documents. Its ``processing_complete`` is called at the end
+    of each partition.
+
+    :param document_provider: A ``DocumentProvider`` object
+    :param doc_processor: A ``BaseDocProcessor`` object used to process documents.
+    :param workers: Maximum number of worker processes.
+    :param reset: Reset existing processor state (if any) of all partitions.
+    :param chunk_size: Maximum number of records to read from the database at one time.
+    :param progress_logger: A ``ProcessorProgressLogger`` object to notify of the
+    combined progress of all partitions.
+    :param controller_class: ``DocumentProcessorController`` or ``BulkDocProcessor``
+    """
+    def __init__(self, document_provider, doc_processor, workers, reset=False,
+                 chunk_size=100, progress_logger=None, controller_class=DocumentProcessorController):
+        self.document_provider = document_provider
+        self.doc_processor = doc_processor
+        self.workers = workers
+        self.reset = reset
+        self.chunk_size = chunk_size
+        self.progress_logger = progress_logger or ProcessorProgressLogger()
+        self.controller_class = controller_class
+        self.partitions = document_provider.get_partitions()
+
+    def has_started(self):
+        return any(
+            partition.get_document_iterator(self.chunk_size).get_iterator_detail('progress')
+            for partition in self.partitions
+        )
+
+    def run(self):
+        """
+        :returns: A tuple `(<num processed>, <num skipped>)`
+        """
+        total = self.document_provider.get_total_document_count()
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        pending = list(enumerate(self.partitions))
+        running = {}
+        progress = {}
+        previously_visited = {}
+        failed = []
+        processed = skipped = 0
+        self.start = datetime.now()
+        self._next_progress_update = self.start
+        self.progress_logger.progress_starting(total, 0)
+        try:
+            while pending or running:
+                while pending and len(running) < self.workers:
+                    index, partition = pending.pop(0)
+                    # don't share database connections with the workers
+                    connections.close_all()
+                    worker = context.Process(target=self._process_partition, args=(index, partition, queue))
+                    worker.start()
+                    running[index] = worker
+                try:
+                    message = queue.get(timeout=10)
+                except Empty:
+                    _check_workers_alive(running)
+                    continue
+                if isinstance(message, PartitionStarting):
+                    previously_visited[message.index] = message.previously_visited
+                    progress[message.index] = PartitionProgress(
+                        message.index, 0, message.previously_visited, message.total)
+                elif isinstance(message, PartitionProgress):
+                    progress[message.index] = message
+                    self._log_progress(progress, total)
+                else:
+                    running.pop(message.index).join()
+                    processed += message.processed
+                    skipped += message.skipped
+                    if not message.success:
+                        # let the running partitions finish, so that they
+                        # save their progress, but don't start any more
+                        failed.append(message.index)
+                        pending = []
+        finally:
+            for worker in running.values():
+                worker.terminate()
+
+        if failed:
+            raise ParallelProcessingFailed('Processing of partitions {} failed'.format(failed))
+
+        visited = sum(p.visited for p in progress.values())
+        self.progress_logger.progress_complete(
+            processed,
+            visited,
+            max(total, visited),
+            sum(previously_visited.values()),
+        )
+        return processed, skipped
+
+    def _process_partition(self, index, document_provider, queue):
+        progress_logger = PartitionProgressLogger(index, queue, self.progress_logger)
+        try:
+            self.doc_processor.reset_connections()
+            controller = self.controller_class(
+                document_provider,
+                self.doc_processor,
+                reset=self.reset,
+                chunk_size=self.chunk_size,
+                progress_logger=progress_logger,
+            )
+            processed, skipped = controller.run()
+        except Exception:
+            logger.exception('Error processing partition {}'.format(index))
+            queue.put(PartitionDone(index, progress_logger.processed, 0, False))
+        else:
+            queue.put(PartitionDone(index, processed, skipped, True))
+
+    def _log_progress(self, progress, total):
+        now = datetime.now()
+        if now < self._next_progress_update:
+            return
+        self._next_progress_update = now + PROGRESS_INTERVAL
+        processed = sum(p.processed for p in progress.values())
+        visited = sum(p.visited for p in progress.values())
+        total = max(total, sum(p.total for p in progress.values()))
+        elapsed = now - self.start
+        if processed and visited < total:
+            remaining = elapsed // processed * (total - visited)
+        else:
+            remaining = "?"
+        self.progress_logger.progress(processed, visited, total, elapsed, remaining)
+
+
+def _check_workers_alive(workers):
+    for index, worker in workers.items():
+        # workers that exit normally send a PartitionDone message first
+        if worker.exitcode:
+            raise ParallelProcessingFailed(
+                'Worker of partition {} exited with code {}'.format(index, worker.exitcode))
+
+
+class PartitionProgressLogger(ProcessorProgressLogger):
+    """Sends the progress of a partition to the process that combines
+    the progress of all partitions"""
+
+    def __init__(self, index, queue, parent_logger):
+        super().__init__(prefix='[partition {}] '.format(index), stream=getattr(parent_logger, 'stream', None))
+        self.index = index
+        self.queue = queue
+        self.processed = 0
+
+    def progress_starting(self, total, previously_visited):
+        self.queue.put(PartitionStarting(self.index, total, previously_visited))
+
+    def progress(self, processed, visited, total, time_elapsed, time_remaining):
+        self.processed = processed
+        self.queue.put(PartitionProgress(self.index, processed, visited, total))
+
+    def progress_complete(self, processed, visited, total, previously_visited):
+        self.processed = processed
+        self.queue.put(PartitionProgress(self.index, processed, visited, total))
@@ -1,3 +1,5 @@
+from copy import copy
+
 from corehq.util.doc_processor.interface import DocumentProvider
 from corehq.util.pagination import ResumableFunctionIterator, ArgsProvider
 
@@ -90,3 +92,17 @@ class SqlDocumentProvider(DocumentProvider):
             self.reindex_accessor.get_approximate_doc_count(from_db)
             for from_db in self.reindex_accessor.sql_db_aliases
         )
+
+    def get_partitions(self):
+        """One partition for each database"""
+        db_aliases = self.reindex_accessor.sql_db_aliases
+        if len(db_aliases) < 2:
+            return [self]
+        partitions = []
+        for db_alias in db_aliases:
+            reindex_accessor = copy(self.reindex_accessor)
+            reindex_accessor.limit_db_aliases = [db_alias]
+            partitions.append(SqlDocumentProvider(
+                '{}_{}'.format(self.iteration_key, db_alias), reindex_accessor
+            ))
+        return partitions
@@ -1,4 +1,6 @@
 import datetime
+import hashlib
+import json
 
 from django.core.serializers.json import DjangoJSONEncoder
 from django.utils.functional import Promise
@@ -16,3 +18,12 @@ class CommCareJSONEncoder(DjangoJSONEncoder):
             return json_format_datetime(o)
         else:
             return super(CommCareJSONEncoder, self).default(o)
+
+
+def hash_json(value):
+    """SHA1 hex digest of a value serialized to JSON with sorted keys
+
+    Values that cannot be serialized are converted with ``str``, so sets
+    must be sorted first to get the same hash in each process.
+    """
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
@@ -1,4 +1,6 @@
 import uuid
+from io import StringIO
+from unittest.mock import patch
 
 from couchdbkit import ResourceConflict, ResourceNotFound
 from django.test import TestCase
@@ -20,7 +22,14 @@ from corehq.util.doc_processor.interface import (
     DocumentProcessorController,
     UnhandledDocumentError,
 )
-from corehq.util.doc_processor.sql import resumable_sql_model_iterator
+from corehq.util.doc_processor.parallel import (
+    ParallelDocumentProcessorController,
+)
+from corehq.util.doc_processor.progress import ProcessorProgressLogger
+from corehq.util.doc_processor.sql import (
+    SqlDocumentProvider,
+    resumable_sql_model_iterator,
+)
 from dimagi.ext.couchdbkit import Document
 from dimagi.utils.chunked import chunked
 from dimagi.utils.couch.database import get_db
@@ -568,3 +577,73 @@ class TestBulkDocProcessor(BaseCouchDocProcessorTest):
             {'bar-{}'.format(ident) for ident in range(4)} | {'foo-{}'.format(ident) for ident in range(4)},
             doc_processor.docs_processed
         )
+
+
+class TestDocumentProviderPartitions(SimpleTestCase):
+
+    def test_couch_partitions(self):
+        provider = CouchDocumentProvider('iteration', [Bar, ('Foo', Bar)], domain='test')
+        partitions = provider.get_partitions()
+        self.assertEqual(
+            [(p.iteration_key, p.doc_types, p.domain) for p in partitions],
+            [('iteration_Bar', ['Bar'], 'test'), ('iteration_Foo', ['Foo'], 'test')],
+        )
+
+    def test_single_doc_type_is_not_partitioned(self):
+        provider = CouchDocumentProvider('iteration', [Bar])
+        self.assertEqual(provider.get_partitions(), [provider])
+
+    @patch('corehq.form_processor.backends.sql.dbaccessors.get_db_aliases_for_partitioned_query',
+           return_value=['p1', 'p2'])
+    def test_sql_partitions(self, *args):
+        provider = SqlDocumentProvider('iteration', FormReindexAccessor())
+        partitions = provider.get_partitions()
+        self.assertEqual(
+            [(p.iteration_key, p.reindex_accessor.sql_db_aliases) for p in partitions],
+            [('iteration_p1', ['p1']), ('iteration_p2', ['p2'])],
+        )
+        self.assertEqual(provider.reindex_accessor.sql_db_aliases, ['p1', 'p2'])
+
+    @patch('corehq.form_processor.backends.sql.dbaccessors.get_db_aliases_for_partitioned_query',
+           return_value=['p1'])
+    def test_single_database_is_not_partitioned(self, *args):
+        provider = SqlDocumentProvider('iteration', FormReindexAccessor())
+        self.assertEqual(provider.get_partitions(), [provider])
+
+
+class ConnectionResettingProcessor(DemoProcessor):
+    connections_reset = False
+
+    def reset_connections(self):
+        self.connections_reset = True
+
+    def process_doc(self, doc):
+        # fail unless the worker process has reset its connections
+        return self.connections_reset and super().process_doc(doc)
+
+
+class TestParallelDocumentProcessorController(BaseCouchDocProcessorTest):
+
+    def setUp(self):
+        super().setUp()
+        self.db.add_view("all_docs/by_doc_type", self._get_view_results(4, 2, doc_type="Foo"))
+        # resumable iterators save their state in the meta db
+        patcher = patch('corehq.util.pagination.get_db', return_value=self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _get_controller(self, workers):
+        doc_provider = CouchDocumentProvider(self.processor_slug, [Bar, ('Foo', Bar)])
+        return ParallelDocumentProcessorController(
+            doc_provider,
+            ConnectionResettingProcessor(),
+            workers,
+            chunk_size=2,
+            progress_logger=ProcessorProgressLogger(stream=StringIO()),
+        )
+
+    def test_run(self):
+        self.assertEqual(self._get_controller(workers=2).run(), (8, 0))
+
+    def test_run_with_fewer_workers_than_partitions(self):
+        self.assertEqual(self._get_controller(workers=1).run(), (8, 0))
@@ -543,6 +543,10 @@ FIXTURE_GENERATORS = [
     "corehq.apps.registry.fixtures.registry_fixture_generator",
 ]
 
+# Maximum number of case batches fetched concurrently (one thread per
+# batch) by a single livequery restore. 1 fetches batches serially.
+RESTORE_CASE_FETCH_WORKERS = 1
+
 ### Shared drive settings ###
 # Also see section after localsettings import
 SHARED_DRIVE_ROOT = None
@@ -667,6 +671,10 @@ SMS_QUEUE_DOMAIN_RESTRICTED_RETRY_INTERVAL = 15
 # messages will not be processed.
 SMS_QUEUE_STALE_MESSAGE_DURATION = 7 * 24
 
+# Maximum number of outgoing SMS of the same domain and backend to process
+# in one celery task. When 0, each queued SMS is processed in its own task.
+SMS_QUEUE_BATCH_SIZE = 0
+
 
 ####### Reminders Queue Settings #######
 
@@ -693,6 +701,20 @@ REMINDERS_QUEUE_MAX_PROCESSING_ATTEMPTS = 3
 # reminders will not be processed.
 REMINDERS_QUEUE_STALE_REMINDER_DURATION = 7 * 24
 
+# Setting this to True will keep an index in redis of the schedule instances
+# by the time that their next event is due, and make queue_schedule_instances
+# read the due instances from it instead of querying every partitioned database.
+USE_SCHEDULE_INSTANCE_DUE_INDEX = False
+
+# Number of minutes between the queries of every partitioned database for due
+# schedule instances when USE_SCHEDULE_INSTANCE_DUE_INDEX is True, to find the
+# instances that were saved without being added to the index.
+SCHEDULE_INSTANCE_DUE_INDEX_FULL_SCAN_INTERVAL = 10
+
+# Maximum number of instances of the same broadcast schedule to handle in one
+# task when they are read from the due index.
+SCHEDULE_INSTANCE_BATCH_SIZE = 100
+
 # Reminders rate limiting settings. A single project will only be allowed to
 # fire REMINDERS_RATE_LIMIT_COUNT reminders every REMINDERS_RATE_LIMIT_PERIOD
 # seconds.